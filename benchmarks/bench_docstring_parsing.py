@@ -0,0 +1,66 @@
+"""
+Benchmark of the docstring parsers of i2i.pymint, on a large synthetic corpus.
+
+Run with:
+    python -m benchmarks.bench_docstring_parsing [n_docstrings]  # from the root of the repository
+
+Reports the throughput of parse_docstring, parse_mint_doc and parse_doc (both at once) on a corpus of docstrings of
+varying complexity, and the time per line of parsing single docstrings of increasing size (which should be constant,
+since parsing is linear in the size of the docstring).
+"""
+import random
+import sys
+import time
+
+from i2i.pymint import parse_doc, parse_docstring, parse_mint_doc
+
+TYPES = ['int', 'float', 'str', 'list', 'dict', 'bool', '']
+
+
+def mk_docstring(n_params, n_description_lines=2, n_continuation_lines=1, seed=None):
+    rand = random.Random(seed)
+    lines = ['Summary of a function with {} params.'.format(n_params), '']
+    lines += ['Some long description, line {}: with colons and :colon: words.'.format(i)
+              for i in range(n_description_lines)]
+    lines.append('')
+    for i in range(n_params):
+        type_ = rand.choice(TYPES)
+        lines.append(':param {}: description of the param {}'.format(' '.join(filter(None, [type_, 'x%d' % i])), i))
+        lines += ['    continued ({}) description'.format(j) for j in range(rand.randint(0, n_continuation_lines))]
+    lines.append(':return {}: what is returned'.format(rand.choice(TYPES)))
+    lines.append(':tags foo, bar')
+    return '\n    '.join(lines) + '\n    '
+
+
+def mk_corpus(n_docstrings, seed=0):
+    rand = random.Random(seed)
+    return [mk_docstring(rand.randint(0, 12), rand.randint(0, 8), rand.randint(0, 3), seed=rand.random())
+            for _ in range(n_docstrings)]
+
+
+def timeit(func, items):
+    tic = time.perf_counter()
+    for item in items:
+        func(item)
+    return time.perf_counter() - tic
+
+
+def main(n_docstrings=20000):
+    corpus = mk_corpus(n_docstrings)
+    n_chars = sum(map(len, corpus))
+    print('Corpus: {} docstrings, {:.1f} MB'.format(n_docstrings, n_chars / 1e6))
+    for func in (parse_docstring, parse_mint_doc, parse_doc):
+        elapsed = timeit(func, corpus)
+        print('  {:<16} {:>10.0f} docstrings/s {:>8.1f} MB/s'.format(
+            func.__name__, n_docstrings / elapsed, n_chars / elapsed / 1e6))
+
+    print('Single docstrings of increasing size (time per line should stay flat):')
+    for n_params in (100, 1000, 10000, 100000):
+        doc = mk_docstring(n_params, n_description_lines=n_params, seed=n_params)
+        n_lines = doc.count('\n')
+        elapsed = timeit(parse_doc, [doc])
+        print('  {:>7} lines: {:8.4f} s, {:6.2f} us/line'.format(n_lines, elapsed, elapsed / n_lines * 1e6))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,119 @@
+"""
+Benchmark of the per-call overhead of Py2Request methods.
+
+Run with:
+    python -m benchmarks.bench_py2request [n_calls]  # from the root of the repository
+
+Reports:
+    * the time to make the request_kwargs of a call: interpreting the method_spec on every call (as request functions
+      used to), versus calling the function compile_method_spec made of it
+    * the overhead of a Py2Request method call, with a transport that doesn't make requests
+    * end-to-end calls to a local http server: requests.request (a new session, so connection, per call), a raw
+      requests.Session, and a Py2Request method (whose HttpTransport keeps the connection alive)
+"""
+import sys
+import threading
+import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request, compile_method_spec
+
+METHOD_SPEC = {
+    'url_template': 'http://127.0.0.1:{port}/users/{user}/items?limit={limit}',
+    'args': ['port', 'user', 'limit'],
+    'input_trans': {'limit': int},
+    'json_arg_names': ['item'],
+    'request_kwargs': {'method': 'POST', 'headers': {'Accept': 'application/json'}},
+}
+
+
+def interpreted_request_kwargs(method_spec, args, kwargs):
+    """How request functions made request_kwargs before method specs were compiled"""
+    arg_order = method_spec.get('args', [])
+    kwargs = dict(kwargs, **{argname: argval for argname, argval in zip(arg_order, args)})
+    for arg_name, converter in method_spec.get('input_trans', {}).items():
+        if arg_name in kwargs:
+            kwargs[arg_name] = converter(kwargs[arg_name])
+    json_data = {}
+    for arg_name in method_spec.get('json_arg_names', []):
+        if arg_name in kwargs:
+            json_data[arg_name] = kwargs.pop(arg_name)
+    request_kwargs = dict(method_spec.get('request_kwargs', {}))
+    request_kwargs['method'] = request_kwargs.get('method', 'GET')
+    if 'url_template' in method_spec:
+        request_kwargs['url'] = method_spec['url_template'].format(**kwargs)
+    elif 'url' in method_spec:
+        request_kwargs['url'] = method_spec['url']
+    if json_data:
+        request_kwargs['json'] = json_data
+    return request_kwargs
+
+
+class NullTransport(object):
+    def request(self, **request_kwargs):
+        return request_kwargs
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+def per_call_us(func, n_calls):
+    tic = time.perf_counter()
+    for i in range(n_calls):
+        func(i)
+    return (time.perf_counter() - tic) / n_calls * 1e6
+
+
+def main(n_calls=100000):
+    port = 0
+    request_kwargs_of = compile_method_spec(METHOD_SPEC)
+    print('Making request_kwargs ({} calls):'.format(n_calls))
+    for name, func in [
+        ('interpreted', lambda i: interpreted_request_kwargs(METHOD_SPEC, (port, 'bob', '10'), {'item': i})),
+        ('compiled', lambda i: request_kwargs_of((port, 'bob', '10'), {'item': i})),
+    ]:
+        print('  {:<40} {:8.2f} us/call'.format(name, per_call_us(func, n_calls)))
+
+    pr = Py2Request({'post_item': dict(METHOD_SPEC)}, transport=NullTransport())
+    print('  {:<40} {:8.2f} us/call'.format(
+        'Py2Request method, NullTransport', per_call_us(lambda i: pr.post_item(port, 'bob', '10', item=i), n_calls)))
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+    url = 'http://127.0.0.1:{}/users/bob/items?limit=10'.format(port)
+    n_http_calls = max(n_calls // 100, 10)
+    session = requests.Session()
+    pr = Py2Request({'post_item': dict(METHOD_SPEC)})
+    print('Requests to a local server ({} calls):'.format(n_http_calls))
+    for name, func in [
+        ('requests.request', lambda i: requests.request('POST', url, json={'item': i})),
+        ('requests.Session.request', lambda i: session.request('POST', url, json={'item': i})),
+        ('Py2Request method', lambda i: pr.post_item(port, 'bob', '10', item=i)),
+    ]:
+        print('  {:<40} {:8.2f} us/call'.format(name, per_call_us(func, n_http_calls)))
+    pr.close()
+    session.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,191 @@
+"""
+Benchmark of the minting pipeline of i2i.pymint, on synthetic corpora of callables.
+
+Run with:
+    python -m benchmarks.bench_pymint  # from the root of the repository
+    python -m benchmarks.bench_pymint --sizes 100 1000 --kinds function class --json > results.json
+
+Corpora of functions, bound methods and classes, of varying signature and docstring complexity, are made by
+executing generated source code. For each kind and size, reports the throughput (items per second) of:
+    * mint_of_callable, without (cold) and with (warm) the mint_cache
+    * mint_many (materializing every Mint)
+    * parse_mint_doc, parse_docstring and trim, on the docstrings of the corpus
+and the peak memory (measured with tracemalloc, in a separate run) of minting the whole corpus.
+
+With --json, the results are written to stdout as a JSON list of records (one per benchmark, kind and size), so that
+they can be stored and compared between releases.
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from i2i.pymint import mint_cache, mint_many, mint_of_callable, parse_docstring, parse_mint_doc, trim
+
+KINDS = ('function', 'bound_method', 'class')
+DFLT_SIZES = (100, 1000, 10000, 100000)
+TYPES = ['int', 'float', 'str', 'list', 'dict', 'bool', '']
+DFLTS = ['None', '0', '1.5', "'abc'", '()', 'True']
+METHODS_PER_CLASS = 10
+
+
+def mk_params(n_params, rand):
+    params = []
+    for i in range(n_params):
+        param = 'x{}'.format(i)
+        type_ = rand.choice(TYPES)
+        if type_:
+            param += ': ' + type_
+        if i >= n_params // 2:
+            param += ' = ' + rand.choice(DFLTS)
+        params.append(param)
+    return params
+
+
+def mk_doc(n_params, rand, indent='    '):
+    lines = ['Summary of a callable with {} params.'.format(n_params), '']
+    lines += ['Some longer description, line {}.'.format(i) for i in range(rand.randint(0, 6))]
+    lines.append('')
+    for i in range(n_params):
+        lines.append(':param {} x{}: the param {}'.format(rand.choice(TYPES), i, i).replace('param  ', 'param '))
+        lines += ['    continued description'] * rand.randint(0, 2)
+    lines.append(':return: what is returned')
+    return '"""\n' + indent + ('\n' + indent).join(lines) + '\n' + indent + '"""'
+
+
+def mk_function_source(name, rand, indent='', self_param=False):
+    n_params = rand.randint(0, 12)
+    params = (['self'] if self_param else []) + mk_params(n_params, rand)
+    return_type = rand.choice(TYPES)
+    return '{indent}def {name}({params}){returns}:\n{indent}    {doc}\n{indent}    pass\n'.format(
+        indent=indent, name=name, params=', '.join(params), returns=' -> ' + return_type if return_type else '',
+        doc=mk_doc(n_params, rand, indent=indent + '    '))
+
+
+def mk_class_source(name, n_methods, rand):
+    doc = mk_doc(0, rand, indent='    ')
+    methods = [mk_function_source('__init__', rand, indent='    ', self_param=True)]
+    methods += [mk_function_source('method_{}'.format(i), rand, indent='    ', self_param=True)
+                for i in range(n_methods)]
+    return 'class {}(object):\n    {}\n'.format(name, doc) + '\n'.join(methods)
+
+
+def _exec(source):
+    namespace = {}
+    exec(compile(source, '<synthetic>', 'exec'), namespace)
+    return namespace
+
+
+def mk_corpus(n_callables, kind='function', seed=0):
+    """
+    Make a list of n_callables callables of the given kind: 'function', 'bound_method' (methods of instances of
+    classes of METHODS_PER_CLASS methods) or 'class' (each with an __init__ and a few methods).
+    """
+    rand = random.Random(seed)
+    if kind == 'function':
+        namespace = _exec('\n'.join(mk_function_source('f{}'.format(i), rand) for i in range(n_callables)))
+        return [namespace['f{}'.format(i)] for i in range(n_callables)]
+    elif kind == 'bound_method':
+        n_classes = -(-n_callables // METHODS_PER_CLASS)
+        namespace = _exec('\n'.join(mk_class_source('C{}'.format(i), METHODS_PER_CLASS, rand)
+                                    for i in range(n_classes)))
+        instances = [object.__new__(namespace['C{}'.format(i)]) for i in range(n_classes)]
+        return [getattr(instance, 'method_{}'.format(j)) for instance in instances
+                for j in range(METHODS_PER_CLASS)][:n_callables]
+    elif kind == 'class':
+        namespace = _exec('\n'.join(mk_class_source('C{}'.format(i), rand.randint(0, 3), rand)
+                                    for i in range(n_callables)))
+        return [namespace['C{}'.format(i)] for i in range(n_callables)]
+    raise ValueError("kind should be one of {}, was {!r}".format(KINDS, kind))
+
+
+def mint_func_of_kind(kind):
+    if kind == 'class':
+        return lambda cls, use_cache=True: mint_of_callable(cls, ismethod=True, use_cache=use_cache)
+    return mint_of_callable
+
+
+def mint_all(corpus, kind):
+    if kind == 'class':
+        return [dict(mint) for cls in corpus for mint in mint_many(cls)]
+    return [dict(mint) for mint in mint_many(corpus)]
+
+
+def timeit(func, items):
+    gc.collect()
+    tic = time.perf_counter()
+    for item in items:
+        func(item)
+    return time.perf_counter() - tic
+
+
+def peak_memory_of(func, *args):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def bench_corpus(corpus, kind):
+    """Yield (benchmark_name, n_items, seconds, peak_bytes) tuples for a corpus"""
+    n = len(corpus)
+    mint = mint_func_of_kind(kind)
+    docs = [getattr(c, '__doc__', None) or '' for c in corpus]
+
+    mint_cache.clear()
+    yield 'mint_of_callable (cold)', n, timeit(lambda c: mint(c, use_cache=False), corpus), None
+    timeit(mint, corpus)  # fill the cache
+    yield 'mint_of_callable (warm)', n, timeit(mint, corpus), None
+    mint_cache.clear()
+    yield 'mint_many', n, timeit(lambda c: mint_all(c, kind), [corpus]), None
+    mint_cache.clear()
+    yield 'mint_many (peak memory)', n, None, peak_memory_of(mint_all, corpus, kind)
+    mint_cache.clear()
+    for func in (parse_mint_doc, parse_docstring, trim):
+        yield func.__name__, n, timeit(func, docs), None
+
+
+def run(sizes=DFLT_SIZES, kinds=KINDS, seed=0):
+    """Run the benchmarks, yielding a record (dict) per benchmark, kind and size"""
+    for kind in kinds:
+        for size in sizes:
+            corpus = mk_corpus(size, kind, seed=seed)
+            for name, n, seconds, peak_bytes in bench_corpus(corpus, kind):
+                yield {'benchmark': name, 'kind': kind, 'n': n, 'seconds': seconds,
+                       'per_second': n / seconds if seconds else None, 'peak_bytes': peak_bytes}
+
+
+def format_record(record):
+    if record['peak_bytes'] is not None:
+        measure = '{:>12.1f} MB peak'.format(record['peak_bytes'] / 1e6)
+    else:
+        measure = '{:>12.0f} items/s'.format(record['per_second'])
+    return '  {:<14} {:>7} {:<26} {}'.format(record['kind'], record['n'], record['benchmark'], measure)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1].strip())
+    parser.add_argument('--sizes', type=int, nargs='+', default=DFLT_SIZES, help='The numbers of callables')
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=KINDS, help='The kinds of callables')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Output the results as a JSON list of records')
+    options = parser.parse_args(args)
+    records = run(options.sizes, options.kinds, options.seed)
+    if options.json:
+        json.dump(list(records), sys.stdout, indent=1)
+        print()
+    else:
+        for record in records:
+            print(format_record(record), flush=True)
+
+
+if __name__ == '__main__':
+    main()
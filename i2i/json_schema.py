@@ -0,0 +1,257 @@
+"""
+Resolving python annotations to JSON schema fragments.
+
+>>> from typing import Dict, List, Literal, Optional
+>>> json_schema_of_annotation(List[int])
+{'type': 'array', 'items': {'type': 'integer'}}
+>>> json_schema_of_annotation(Optional[Dict[str, float]])
+{'anyOf': [{'type': 'object', 'additionalProperties': {'type': 'number'}}, {'type': 'null'}]}
+>>> json_schema_of_annotation(Literal['a', 'b'])
+{'type': 'string', 'enum': ['a', 'b']}
+
+Resolutions are memoized per annotation, so resolving an annotation that's shared by many functions is only done once.
+The memoized schemas are shared: json_schema_of_annotation returns a (deep) copy of them, that can be modified.
+(The parts of a recursive type that are resolved within its own resolution, and cut where they refer to it, are
+not memoized: They resolve further on their own.)
+"""
+import collections
+import collections.abc
+import copy
+import dataclasses
+import datetime
+import decimal
+import enum
+import threading
+import types
+import typing
+import uuid
+
+DFLT_MEMO_SIZE = 4096
+
+NoneType = type(None)
+
+json_schema_of_type = {
+    str: {'type': 'string'},
+    int: {'type': 'integer'},
+    float: {'type': 'number'},
+    bool: {'type': 'boolean'},
+    list: {'type': 'array'},
+    tuple: {'type': 'array'},
+    set: {'type': 'array', 'uniqueItems': True},
+    frozenset: {'type': 'array', 'uniqueItems': True},
+    dict: {'type': 'object'},
+    NoneType: {'type': 'null'},
+    bytes: {'type': 'string', 'format': 'binary'},
+    decimal.Decimal: {'type': 'number'},
+    datetime.datetime: {'type': 'string', 'format': 'date-time'},
+    datetime.date: {'type': 'string', 'format': 'date'},
+    datetime.time: {'type': 'string', 'format': 'time'},
+    uuid.UUID: {'type': 'string', 'format': 'uuid'},
+}
+
+json_type_of_pytype = {str: 'string', int: 'integer', float: 'number', bool: 'boolean', NoneType: 'null'}
+
+_sequence_origins = {list, collections.abc.Sequence, collections.abc.MutableSequence, collections.abc.Iterable,
+                     collections.abc.Collection, collections.abc.Iterator, collections.abc.Generator}
+_set_origins = {set, frozenset, collections.abc.Set, collections.abc.MutableSet}
+_mapping_origins = {dict, collections.abc.Mapping, collections.abc.MutableMapping, collections.OrderedDict,
+                    collections.defaultdict}
+
+_resolving = threading.local()
+
+
+def json_schema_of_annotation(annotation) -> dict:
+    """
+    Get the JSON schema fragment corresponding to an annotation.
+
+    Handles builtin types, typing generics (and their builtin and collections.abc equivalents), Optional and Union
+    (including X | Y), Literal, Annotated, Enum subclasses, dataclasses, TypedDicts and NamedTuples.
+    Anything else (Any, forward references given as strings, other classes...) gives the "anything" schema: {}
+
+    >>> import dataclasses, enum
+    >>> class Color(enum.Enum):
+    ...     red = 'r'
+    ...     green = 'g'
+    >>> @dataclasses.dataclass
+    ... class Point:
+    ...     x: float
+    ...     color: Color = Color.red
+    >>> json_schema_of_annotation(Point)  # doctest: +NORMALIZE_WHITESPACE
+    {'type': 'object', 'title': 'Point',
+     'properties': {'x': {'type': 'number'}, 'color': {'type': 'string', 'enum': ['r', 'g']}},
+     'required': ['x']}
+    """
+    return copy.deepcopy(_memoized_json_schema_of_annotation(annotation))
+
+
+def _memoized_json_schema_of_annotation(annotation) -> dict:
+    """The (shared, so not to be modified) schema of annotation: Resolved once, then taken from the memo"""
+    try:
+        schema = _memo.get(annotation)
+    except TypeError:  # an unhashable annotation (Literal of a list, for example)
+        return _json_schema_of_annotation(annotation)[0]
+    if schema is not None:
+        _memo_counts['hits'] += 1
+        return schema
+    _memo_counts['misses'] += 1
+    schema, complete = _json_schema_of_annotation(annotation)
+    if complete:
+        with _memo_lock:
+            while len(_memo) >= DFLT_MEMO_SIZE:
+                _memo.pop(next(iter(_memo)))  # (the oldest)
+            _memo[annotation] = schema
+    return schema
+
+
+def _json_schema_of_annotation(annotation):
+    """
+    The (schema, complete) of annotation: The schema isn't complete (and isn't memoized) if it was resolved within the
+    resolution of a recursive type, and cut where it referred to it (List['Node'] within Node, for example): On its
+    own, it would resolve further.
+    """
+    in_progress = _resolving.__dict__.setdefault('in_progress', [])
+    key = id(annotation)
+    if key in in_progress:  # a recursive type: Don't recurse forever
+        depth = in_progress.index(key) + 1  # (the resolutions deeper than the one of the type are cut)
+        _resolving.cut_depth = min(getattr(_resolving, 'cut_depth', depth), depth)
+        return {}, False
+    in_progress.append(key)
+    depth = len(in_progress)
+    try:
+        schema = _resolve(annotation)
+    finally:
+        in_progress.pop()
+        cut_depth = getattr(_resolving, 'cut_depth', None)
+        if cut_depth is not None and depth <= cut_depth:  # the recursive type (or one containing it) is resolved
+            del _resolving.cut_depth
+    return schema, cut_depth is None or depth <= cut_depth
+
+
+_memo = {}
+_memo_lock = threading.Lock()
+_memo_counts = {'hits': 0, 'misses': 0}
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+def _cache_info():
+    return CacheInfo(_memo_counts['hits'], _memo_counts['misses'], DFLT_MEMO_SIZE, len(_memo))
+
+
+def _cache_clear():
+    with _memo_lock:
+        _memo.clear()
+        _memo_counts.update(hits=0, misses=0)
+
+
+json_schema_of_annotation.cache_info = _cache_info
+json_schema_of_annotation.cache_clear = _cache_clear
+
+
+def _json_type_of_values(values):
+    json_types = {json_type_of_pytype.get(type(value)) for value in values}
+    if len(json_types) == 1:
+        return json_types.pop()
+    return None
+
+
+def _enum_schema(values):
+    schema = {}
+    json_type = _json_type_of_values(values)
+    if json_type is not None:
+        schema['type'] = json_type
+    schema['enum'] = list(values)
+    return schema
+
+
+def _type_hints(cls):
+    try:
+        return typing.get_type_hints(cls)
+    except Exception:  # unresolvable forward references, for example
+        return dict(getattr(cls, '__annotations__', {}))
+
+
+def _object_schema(cls, properties, required):
+    schema = {'type': 'object', 'title': cls.__name__, 'properties': properties}
+    if required:
+        schema['required'] = required
+    return schema
+
+
+def _tuple_schema(item_schemas):
+    return {'type': 'array', 'prefixItems': item_schemas,
+            'minItems': len(item_schemas), 'maxItems': len(item_schemas)}
+
+
+def _union_schema(args):
+    return {'anyOf': [_memoized_json_schema_of_annotation(arg) for arg in args]}
+
+
+def _resolve(annotation):
+    if annotation is None:
+        return json_schema_of_type[NoneType]
+    if annotation is typing.Any:
+        return {}
+
+    origin = typing.get_origin(annotation)
+    if origin is not None:
+        return _resolve_generic(annotation, origin, typing.get_args(annotation))
+
+    if isinstance(annotation, type):
+        if annotation in json_schema_of_type:
+            return json_schema_of_type[annotation]
+        if issubclass(annotation, enum.Enum):
+            return _enum_schema([member.value for member in annotation])
+        if dataclasses.is_dataclass(annotation):
+            hints = _type_hints(annotation)
+            fields = [field for field in dataclasses.fields(annotation) if field.init]
+            properties = {field.name: _memoized_json_schema_of_annotation(hints.get(field.name, field.type))
+                          for field in fields}
+            required = [field.name for field in fields if field.default is dataclasses.MISSING
+                        and field.default_factory is dataclasses.MISSING]
+            return _object_schema(annotation, properties, required)
+        if issubclass(annotation, dict) and hasattr(annotation, '__total__'):  # a TypedDict
+            hints = _type_hints(annotation)
+            properties = {name: _memoized_json_schema_of_annotation(hint) for name, hint in hints.items()}
+            required_keys = getattr(annotation, '__required_keys__', hints if annotation.__total__ else ())
+            return _object_schema(annotation, properties, [name for name in hints if name in required_keys])
+        if issubclass(annotation, tuple) and hasattr(annotation, '_fields'):  # a NamedTuple
+            hints = _type_hints(annotation)
+            schema = _tuple_schema([_memoized_json_schema_of_annotation(hints.get(field, typing.Any))
+                                    for field in annotation._fields])
+            schema['title'] = annotation.__name__
+            return schema
+        for pytype in (bool, int, float, str, bytes, list, tuple, set, frozenset, dict):  # builtin subclasses
+            if issubclass(annotation, pytype):
+                return json_schema_of_type[pytype]
+    return {}
+
+
+def _resolve_generic(annotation, origin, args):
+    if origin is typing.Union or origin is getattr(types, 'UnionType', None):
+        return _union_schema(args)
+    if origin is typing.Literal:
+        return _enum_schema(args)
+    if origin is typing.Annotated:
+        return _memoized_json_schema_of_annotation(args[0])
+    if origin is tuple:
+        if len(args) == 2 and args[1] is Ellipsis:
+            return {'type': 'array', 'items': _memoized_json_schema_of_annotation(args[0])}
+        if args == ((),):  # Tuple[()]
+            return _tuple_schema([])
+        return _tuple_schema([_memoized_json_schema_of_annotation(arg) for arg in args])
+    if origin in _sequence_origins:
+        if not args:
+            return {'type': 'array'}
+        return {'type': 'array', 'items': _memoized_json_schema_of_annotation(args[0])}
+    if origin in _set_origins:
+        schema = {'type': 'array', 'uniqueItems': True}
+        if args:
+            schema['items'] = _memoized_json_schema_of_annotation(args[0])
+        return schema
+    if origin in _mapping_origins:
+        if len(args) == 2:
+            return {'type': 'object', 'additionalProperties': _memoized_json_schema_of_annotation(args[1])}
+        return {'type': 'object'}
+    if isinstance(origin, type):  # some other generic class: resolve as its origin
+        return _memoized_json_schema_of_annotation(origin)
+    return {}
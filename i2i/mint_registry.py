@@ -0,0 +1,185 @@
+"""
+A persistent, on-disk, registry of the mints of modules.
+
+Minting a module means importing it, which can be much more expensive than minting it. A MintRegistry keeps the
+mints of modules in a SQLite file, along with the modification time, size and hash of the module's source file, so
+that a module is only imported (and re-minted) when its source changed, or when the format of mints changed (see
+MINT_FORMAT_VERSION).
+
+Note that only the module's own source file is checked: If a module's annotations refer to types defined in other
+modules (a dataclass, for example), changes of these types aren't detected. Remove the module (or clear the registry)
+when they change.
+
+>>> import tempfile, os
+>>> registry = MintRegistry(os.path.join(tempfile.mkdtemp(), 'mints.sqlite'))
+>>> [m['name'] for m in registry.mints_of_module('i2i.factories')]
+['method_for_func']
+>>> [m['name'] for m in registry.mints_of_module('i2i.factories')]  # this time, from the registry
+['method_for_func']
+>>> registry.stats()
+{'hits': 1, 'misses': 1, 'size': 1}
+
+The openapi specs of modules can so be made from the registry, without importing them
+(see i2i.py2openapi.openapi_gen.make_openapi_spec_of_modules).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+
+from i2i.pymint import MINT_FORMAT_VERSION, mint_modules, module_names_of_package, source_filepath_of_module
+
+DFLT_REGISTRY_FILEPATH = os.path.join(os.path.expanduser('~'), '.i2i', 'mint_registry.sqlite')
+
+VALIDATION_MODES = ('mtime', 'hash')
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS module_mints (
+    module TEXT NOT NULL,
+    include_private INTEGER NOT NULL,
+    filepath TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    mints TEXT NOT NULL,
+    format_version INTEGER NOT NULL,
+    PRIMARY KEY (module, include_private)
+)
+"""
+
+
+def hash_of_file(filepath):
+    with open(filepath, 'rb') as fp:
+        return hashlib.sha1(fp.read()).hexdigest()
+
+
+def _file_state(filepath):
+    """The (mtime_ns, size, hash) of a file"""
+    stat = os.stat(filepath)
+    return stat.st_mtime_ns, stat.st_size, hash_of_file(filepath)
+
+
+class MintRegistry(object):
+    """
+    A SQLite registry of module mints, keyed by module name, and validated against the module's source file.
+
+    Mints are stored as JSON, so defaults that aren't JSON serializable are stored (and returned) as their repr,
+    and tuples come back as lists.
+    """
+
+    def __init__(self, filepath=DFLT_REGISTRY_FILEPATH, validate='mtime'):
+        """
+        :param filepath: The filepath of the SQLite file (made if it doesn't exist)
+        :param validate: How to check that an entry is still valid. With 'mtime', an entry is valid if the modification
+            time and size of the source file didn't change. With 'hash', a changed modification time or size will
+            then be checked against the hash of the contents of the file (so that touching a file, or checking it out
+            again, doesn't make its entry stale).
+        """
+        if validate not in VALIDATION_MODES:
+            raise ValueError("validate should be one of {}, was {!r}".format(VALIDATION_MODES, validate))
+        self.filepath = filepath
+        self.validate = validate
+        dirpath = os.path.dirname(filepath)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+        self._conn = sqlite3.connect(filepath)
+        with self._conn:
+            columns = [row[1] for row in self._conn.execute('PRAGMA table_info(module_mints)')]
+            if columns and 'format_version' not in columns:  # a registry made before mints had a format version
+                self._conn.execute('DROP TABLE module_mints')
+            self._conn.execute(_CREATE_TABLE)
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh_mints(self, module_name, include_private, filepath):
+        """The stored mints of the module, if they're still valid, and None if not"""
+        row = self._conn.execute(
+            'SELECT filepath, mtime_ns, size, hash, mints, format_version FROM module_mints '
+            'WHERE module = ? AND include_private = ?',
+            (module_name, int(include_private))).fetchone()
+        if row is None or row[0] != filepath or row[5] != MINT_FORMAT_VERSION:
+            return None
+        _, mtime_ns, size, hash_, mints, _ = row
+        stat = os.stat(filepath)
+        if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+            return json.loads(mints)
+        if self.validate == 'hash' and hash_of_file(filepath) == hash_:
+            with self._conn:
+                self._conn.execute(
+                    'UPDATE module_mints SET mtime_ns = ?, size = ? WHERE module = ? AND include_private = ?',
+                    (stat.st_mtime_ns, stat.st_size, module_name, int(include_private)))
+            return json.loads(mints)
+        return None
+
+    def _store(self, module_name, include_private, filepath, file_state, mints):
+        """
+        Store the mints of a module, with the (mtime_ns, size, hash) file_state its source file had before it was
+        minted, returning them as they'll be loaded later (so as JSON would make them)
+        """
+        serialized = json.dumps(mints, default=repr)
+        with self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO module_mints VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (module_name, int(include_private), filepath) + tuple(file_state) + (serialized, MINT_FORMAT_VERSION))
+        return json.loads(serialized)
+
+    def mints_of_modules(self, module_names, include_private=False, skip_errors=False, max_workers=1) -> dict:
+        """
+        Get the mints of modules, only importing and minting the modules that aren't in the registry, or whose
+        source changed since they were registered.
+
+        :param module_names: The (dotted) names of the modules
+        :param include_private: Whether to include callables whose name starts with an underscore
+        :param skip_errors: If True, modules that can't be imported, and callables that can't be minted, are skipped
+            (with a warning) instead of raising an error.
+        :param max_workers: The number of processes to mint stale modules with (see mint_modules)
+        :return: A {module_name: mints, ...} dict, in the order of module_names
+        """
+        module_names = list(module_names)
+        minted = {}
+        filepaths = {}
+        for module_name in module_names:
+            filepath = filepaths[module_name] = source_filepath_of_module(module_name)
+            mints = filepath and self._fresh_mints(module_name, include_private, filepath)
+            if mints is not None:
+                self.hits += 1
+                minted[module_name] = mints
+        stale = [module_name for module_name in module_names if module_name not in minted]
+        self.misses += len(stale)
+        # (before minting: if a file changes while its module is minted, its entry is stale, instead of wrongly fresh)
+        file_states = {module_name: _file_state(filepaths[module_name]) for module_name in stale
+                       if filepaths[module_name] is not None}
+        newly_minted = mint_modules(stale, max_workers=max_workers, include_private=include_private,
+                                    skip_errors=skip_errors)
+        for module_name, mints in newly_minted.items():
+            if module_name in file_states:
+                mints = self._store(module_name, include_private, filepaths[module_name], file_states[module_name],
+                                    mints)
+            minted[module_name] = mints
+        return {module_name: minted[module_name] for module_name in module_names if module_name in minted}
+
+    def mints_of_module(self, module_name, include_private=False, skip_errors=False) -> list:
+        """The mints of a module, taken from the registry if they're still valid (see mints_of_modules)"""
+        return self.mints_of_modules([module_name], include_private, skip_errors).get(module_name, [])
+
+    def mints_of_package(self, package_name, include_private=False, skip_errors=False, max_workers=None) -> dict:
+        """The mints of all the modules of a package, taken from the registry when valid (see mints_of_modules)"""
+        return self.mints_of_modules(module_names_of_package(package_name), include_private=include_private,
+                                     skip_errors=skip_errors, max_workers=max_workers)
+
+    def remove(self, module_name):
+        with self._conn:
+            self._conn.execute('DELETE FROM module_mints WHERE module = ?', (module_name,))
+
+    def stats(self):
+        size = self._conn.execute('SELECT COUNT(*) FROM module_mints').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'size': size}
+
+    def clear(self):
+        with self._conn:
+            self._conn.execute('DELETE FROM module_mints')
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self._conn.close()
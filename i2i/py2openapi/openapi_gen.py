@@ -1,8 +1,12 @@
+import copy
 import inspect
 import json
+from contextlib import closing
+
 import yaml
 
-from i2i.pymint import mint_many
+from i2i.mint_registry import MintRegistry
+from i2i.pymint import mint_many, fingerprint_of_mint
 
 
 default_bad_request_description = 'Generic bad request response.'
@@ -58,17 +62,120 @@ def make_openapi_root_spec(title,
         'info': info,
         'servers': [server_spec],
     }
-    add_extensions(info_extensions, info)
-    add_extensions(root_extensions, root_spec)
-    add_extensions(server_extensions, server_spec)
+    add_extensions(info, info_extensions)
+    add_extensions(root_spec, root_extensions)
+    add_extensions(server_spec, server_extensions)
     if isinstance(contact, dict):
         info['contact'] = contact
     if isinstance(license_object, dict):
         info['license'] = license_object
+    return root_spec
+
+
+root_spec_params = set(inspect.signature(make_openapi_root_spec).parameters) - {'title'}
+
+
+def _root_spec_kwargs(kwargs):
+    return {k: v for k, v in kwargs.items() if k in root_spec_params}
+
+
+def _path_kwargs(kwargs):
+    return {k: v for k, v in kwargs.items() if k not in root_spec_params}
+
+
+json_schema_of_type_name = {
+    'string': {'type': 'string'},
+    'int': {'type': 'integer'},
+    'float': {'type': 'number'},
+    'boolean': {'type': 'boolean'},
+    'array': {'type': 'array'},
+    'object': {'type': 'object'},
+}
+
+
+def _is_null_schema(schema):
+    return schema.get('type') == 'null'
+
+
+def openapi_schema_of(json_schema) -> dict:
+    """
+    The OpenAPI 3.0 schema object of a JSON schema (as json_schema_of_annotation makes them): A new one, so that it
+    can be modified without modifying json_schema.
+    OpenAPI 3.0 has no null type, and no prefixItems, so null alternatives are made nullable, and tuples are made
+    arrays of (any of) their items' schemas, of a fixed length.
+
+    >>> openapi_schema_of({'anyOf': [{'type': 'array', 'items': {'type': 'integer'}}, {'type': 'null'}]})
+    {'type': 'array', 'items': {'type': 'integer'}, 'nullable': True}
+    >>> openapi_schema_of({'type': 'array', 'prefixItems': [{'type': 'integer'}, {'type': 'string'}],
+    ...                    'minItems': 2, 'maxItems': 2})
+    {'type': 'array', 'items': {'anyOf': [{'type': 'integer'}, {'type': 'string'}]}, 'minItems': 2, 'maxItems': 2}
+    """
+    schema = {}
+    for key, value in json_schema.items():
+        if key == 'anyOf':
+            alternatives = [openapi_schema_of(alternative) for alternative in value if not _is_null_schema(alternative)]
+            if len(alternatives) == 1:
+                schema.update(alternatives[0])
+            elif alternatives:
+                schema['anyOf'] = alternatives
+            if len(alternatives) < len(value):
+                schema['nullable'] = True
+        elif key == 'type' and value == 'null':
+            schema['nullable'] = True
+        elif key == 'prefixItems':
+            items = [openapi_schema_of(item) for item in value]
+            distinct_items = [item for i, item in enumerate(items) if item not in items[:i]]
+            if len(distinct_items) == 1:
+                schema['items'] = distinct_items[0]
+            elif distinct_items:
+                schema['items'] = {'anyOf': distinct_items}
+        elif key in ('items', 'additionalProperties') and isinstance(value, dict):
+            schema[key] = openapi_schema_of(value)
+        elif key == 'properties':
+            schema[key] = {name: openapi_schema_of(prop) for name, prop in value.items()}
+        else:
+            schema[key] = copy.deepcopy(value)
+    if schema.get('type') == 'array' and 'items' not in schema:  # (items is required for arrays in OpenAPI 3.0)
+        schema['items'] = {}
+    return schema
+
+
+def schema_of_spec(spec) -> dict:
+    """
+    The (OpenAPI 3.0) schema of an input or output spec of a mint: Its 'schema' (resolved from the annotation of the
+    minted callable) if it has one, and the schema of its 'type' if not (mints made from docstrings only, for example).
+    It's a new one (see openapi_schema_of), so it can be modified without modifying the (shared) mints.
+
+    >>> schema_of_spec({'type': 'array', 'schema': {'type': 'array', 'items': {'type': 'integer'}}})
+    {'type': 'array', 'items': {'type': 'integer'}}
+    >>> schema_of_spec({'type': 'int'})
+    {'type': 'integer'}
+    >>> schema_of_spec({})
+    {}
+    """
+    if 'schema' in spec:
+        return openapi_schema_of(spec['schema'])
+    return openapi_schema_of(json_schema_of_type_name.get(spec.get('type'), {}))
 
 
 def format_request_prop(input_param) -> dict:
-    return dict(input_param, nullable=True)
+    prop = dict(schema_of_spec(input_param), nullable=True)
+    if 'default' in input_param:
+        prop['default'] = input_param['default']
+    if input_param.get('description'):
+        prop['description'] = input_param['description']
+    return prop
+
+
+def make_request_schema(mint_input) -> dict:
+    schema = {
+        'type': 'object',
+        'properties': {key: format_request_prop(input_param) for key, input_param in mint_input.items()},
+    }
+    required = [key for key, input_param in mint_input.items() if 'default' not in input_param]
+    if required:
+        schema['required'] = required
+    return schema
 
 
 def make_openapi_path(mint, **kwargs) -> dict:
@@ -76,31 +183,23 @@ def make_openapi_path(mint, **kwargs) -> dict:
     name = mint.get('name')
     path_dict = {
         'post': {
-            'description': mint['description'],
+            'description': mint.get('description', ''),
             'operationId': name,
             'tags': mint.get('tags', []),
-            'summary': mint['summary'],
+            'summary': mint.get('summary', ''),
             'requestBody': {
                 'content': {
                     'application/json': {
-                        'schema': {
-                            'type': 'object',
-                            'properties': {
-                                key: format_request_prop(input_param)
-                                for key, input_param in mint['input'].items()
-                            }
-                        }
+                        'schema': make_request_schema(mint['input'])
                     }
                 }
             },
             'responses': {
                 '200': {
-                    'description': mint['output']['description'],
+                    'description': mint['output'].get('description', ''),
                     'content': {
                         'application/json': {
-                            'schema': {
-                                'type': mint['output']['type']
-                            }
+                            'schema': schema_of_spec(mint['output'])
                         }
                     }
                 },
@@ -131,16 +230,91 @@ def make_openapi_path(mint, **kwargs) -> dict:
 
 
 def make_openapi_spec(input_construct, title, **kwargs) -> dict:
-    minted = mint_many(input_construct)
+    return make_openapi_spec_from_mints(mint_many(input_construct, lazy=True), title, **kwargs)
+
+
+def make_openapi_spec_from_mints(minted, title, **kwargs) -> dict:
+    """
+    Make an openapi spec from mints (for example, the mints of a MintRegistry, which don't need the minted callables
+    to be imported).
+    """
     paths = {}
     for mint in minted:
-        pathname, spec = make_openapi_path(mint, **kwargs)
+        pathname, spec = make_openapi_path(mint, **_path_kwargs(kwargs))
         paths[pathname] = spec
-    openapi_details = make_openapi_root_spec(title, **kwargs)
+    openapi_details = make_openapi_root_spec(title, **_root_spec_kwargs(kwargs))
     openapi_spec = dict(openapi_details, paths=paths)
     return openapi_spec
 
 
+def make_openapi_spec_of_modules(module_names, title, registry=None, include_private=False, **kwargs) -> dict:
+    """
+    Make an openapi spec of the functions and classes of modules, with their mints taken from a MintRegistry, so that
+    only the modules whose source changed since they were registered are imported (and minted).
+    :param module_names: The (dotted) names of the modules
+    :param title: The title of the api
+    :param registry: The MintRegistry, or the filepath of its SQLite file (default: the default registry file)
+    :param include_private: Whether to include callables whose name starts with an underscore
+    :param kwargs: The options of make_openapi_root_spec and make_openapi_path
+    """
+    if registry is None or isinstance(registry, str):
+        with closing(MintRegistry() if registry is None else MintRegistry(registry)) as registry:
+            return make_openapi_spec_of_modules(module_names, title, registry, include_private, **kwargs)
+    minted = [mint for mints in registry.mints_of_modules(module_names, include_private).values() for mint in mints]
+    return make_openapi_spec_from_mints(minted, title, **kwargs)
+
+
+def _fingerprint(mint):
+    try:
+        return mint.fingerprint  # a Mint keeps its fingerprint
+    except AttributeError:
+        return fingerprint_of_mint(mint)
+
+
+def make_openapi_spec_incrementally(minted, title, previous_spec=None, previous_fingerprints=None, **kwargs):
+    """
+    Make an openapi spec from mints, reusing the paths of a previous spec for the mints that didn't change.
+
+    Only the paths of mints that were added, or whose fingerprint changed, are made. The paths of mints that
+    aren't there anymore are removed. The previous spec is not modified.
+
+    :param minted: The mints to make the spec of
+    :param title: The title of the api
+    :param previous_spec: The spec previously made (by this function, or make_openapi_spec(_from_mints)), if any
+    :param previous_fingerprints: The {path_name: fingerprint} dict returned with previous_spec. The paths of
+        previous_spec that have no fingerprint here are made again.
+    :param kwargs: The options of make_openapi_root_spec and make_openapi_path. The path options should be the same as
+        the ones previous_spec was made with (paths whose mint didn't change are not made again).
+    :return: A (spec, fingerprints) pair, to give as previous_spec and previous_fingerprints the next time around
+
+    >>> def f(x: int): ...
+    >>> def g(y='y'): ...
+    >>> spec, fingerprints = make_openapi_spec_incrementally(mint_many([f, g], lazy=True), 'api')
+    >>> def g(y='y', z=0): ...  # g changed
+    >>> def h(): ...
+    >>> new_spec, _ = make_openapi_spec_incrementally(mint_many([f, g, h], lazy=True), 'api', spec, fingerprints)
+    >>> list(new_spec['paths'])
+    ['f', 'g', 'h']
+    >>> new_spec['paths']['f'] is spec['paths']['f'], new_spec['paths']['g'] is spec['paths']['g']
+    (True, False)
+    """
+    previous_paths = (previous_spec or {}).get('paths', {})
+    previous_fingerprints = previous_fingerprints or {}
+    path_kwargs = _path_kwargs(kwargs)
+    paths = {}
+    fingerprints = {}
+    for mint in minted:
+        pathname = mint.get('name')
+        fingerprint = _fingerprint(mint)
+        if pathname in previous_paths and previous_fingerprints.get(pathname) == fingerprint:
+            paths[pathname] = previous_paths[pathname]
+        else:
+            pathname, paths[pathname] = make_openapi_path(mint, **path_kwargs)
+        fingerprints[pathname] = fingerprint
+    openapi_details = make_openapi_root_spec(title, **_root_spec_kwargs(kwargs))
+    return dict(openapi_details, paths=paths), fingerprints
+
+
 def make_and_save_openapi_json(input_construct, title, target_path='openapi.json', **kwargs):
     spec = make_openapi_spec(input_construct, title, **kwargs)
     serialized = json.dumps(spec)
@@ -0,0 +1,288 @@
+"""
+An asyncio counterpart of Py2Request: The same method_specs make coroutine (async def) methods, whose requests are
+made with a pooled aiohttp client, at most max_concurrency at a time (per AsyncPy2Request object).
+
+>>> import asyncio
+>>> method_specs = {'my_ip': {'url': 'https://api.ipify.org?format=json', 'output_trans': lambda r: r.json()}}
+>>> async def main():
+...     async with AsyncPy2Request(method_specs, max_concurrency=10) as pr:
+...         return await asyncio.gather(*[pr.my_ip() for _ in range(3)])
+>>> ips = asyncio.run(main())  # doctest: +SKIP
+
+The output_trans of a method is called with the aiohttp response, whose body has been read already (so its coroutine
+methods, like json or text, can be used after the request), and can be a coroutine function, or return an awaitable
+(like lambda r: r.json()): It is awaited.
+"""
+import asyncio
+import inspect
+import time
+from functools import partial
+
+import aiohttp
+
+from i2i.py2request.py2request import (Py2Request, DebugOptions, add_url_template_args, check_response_options,
+                                       compile_method_spec, _set_signature)
+from i2i.py2request.compression import AIOHTTP_ACCEPT_ENCODING, body_compressor_of
+from i2i.py2request.decoding import adecoded_output_trans, decoder_of
+from i2i.py2request.instrumentation import (ameasured_request, instrumentation_of, method_stats_of,
+                                             stamp_headers_received)
+from i2i.py2request.pagination import AsyncPaginatedItems, pagination_of
+from i2i.py2request.rate_limit import host_limits_of, token_bucket_of
+from i2i.py2request.response_cache import response_cache_of
+from i2i.py2request.single_flight import single_flight_of
+from i2i.py2request.streaming import AsyncResponseStream, stream_options_of
+from i2i.py2request.transport import DFLT_TIMEOUT
+
+DFLT_MAX_CONCURRENCY = 10
+DFLT_LIMIT = 100
+DFLT_LIMIT_PER_HOST = 10
+DFLT_KEEP_ALIVE_TIMEOUT = 15
+
+
+def client_timeout(timeout):
+    """
+    The aiohttp.ClientTimeout of a requests timeout: A number of seconds, a (connect, read) pair, or None
+
+    >>> timeout = client_timeout((1, 5))
+    >>> timeout.sock_connect, timeout.sock_read
+    (1, 5)
+    """
+    if timeout is None or isinstance(timeout, aiohttp.ClientTimeout):
+        return timeout or aiohttp.ClientTimeout(total=None)
+    if isinstance(timeout, tuple):
+        connect_timeout, read_timeout = timeout
+        return aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+    return aiohttp.ClientTimeout(total=timeout)
+
+
+class AsyncHttpTransport(object):
+    """
+    The async counterpart of HttpTransport: Makes http requests with an aiohttp.ClientSession, whose connections are
+    pooled and kept alive. The session is made on the first request (it has to be made in a running event loop).
+    """
+
+    def __init__(self, limit=DFLT_LIMIT, limit_per_host=DFLT_LIMIT_PER_HOST, keep_alive_timeout=DFLT_KEEP_ALIVE_TIMEOUT,
+                 timeout=DFLT_TIMEOUT, headers=None, rate_limit_of_host=None, adaptive_concurrency=None):
+        """
+        :param limit: The maximum number of (simultaneous) connections
+        :param limit_per_host: The maximum number of connections to a same host
+        :param keep_alive_timeout: The number of seconds idle connections are kept alive (None: not kept alive)
+        :param timeout: The timeout of requests that don't specify theirs: A number of seconds, or a
+            (connect timeout, read timeout) pair. None (the default, as with the HttpTransport) means waiting forever.
+        :param headers: Headers to send with every request
+        :param rate_limit_of_host: A {host: rate_limit, ...} dict of the rate limits of the requests to some hosts
+        :param adaptive_concurrency: True, or a dict of AdaptiveConcurrency kwargs, to adapt the concurrency of the
+            requests to every host (see HttpTransport)
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keep_alive_timeout = keep_alive_timeout
+        self.timeout = timeout
+        self.headers = headers
+        self.host_limits = host_limits_of(rate_limit_of_host, adaptive_concurrency)
+        self.session = None
+        self._n_requests = 0
+
+    def _mk_session(self):
+        if self.keep_alive_timeout is None:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host, force_close=True)
+        else:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=self.keep_alive_timeout)
+        return aiohttp.ClientSession(connector=connector, headers=self.headers)
+
+    async def request(self, method, url, **kwargs):
+        """
+        Make a request (with the arguments of requests.request), returning the aiohttp response, whose body was read
+        (and its connection released), unless stream=True
+        """
+        if self.session is None or self.session.closed:
+            self.session = self._mk_session()
+        kwargs['timeout'] = client_timeout(kwargs.get('timeout', self.timeout))
+        stream = kwargs.pop('stream', False)
+        self._n_requests += 1
+        if self.host_limits is None:
+            return await self._request(method, url, stream, kwargs)
+        rate_limit, concurrency = self.host_limits.limits_of(url)
+        if rate_limit is not None:
+            await rate_limit.aacquire()
+        if concurrency is None:
+            return await self._request(method, url, stream, kwargs)
+        await concurrency.aacquire()
+        latency = status = None
+        try:
+            tic = time.perf_counter()
+            response = await self._request(method, url, stream, kwargs)
+            latency, status = time.perf_counter() - tic, response.status
+            return response
+        finally:
+            concurrency.release(latency, status)
+
+    async def _request(self, method, url, stream, kwargs):
+        if stream:  # the body isn't read: The caller has to read it, and release the response
+            return stamp_headers_received(await self.session.request(method, url, **kwargs))
+        async with self.session.request(method, url, **kwargs) as response:
+            stamp_headers_received(response)
+            await response.read()
+        return response
+
+    def stats(self):
+        stats = {'requests': self._n_requests}
+        if self.host_limits is not None:
+            stats['limits'] = self.host_limits.stats()
+        return stats
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+def mk_async_request_function(method_spec):
+    """
+    Makes a coroutine function that will make http requests for you, on your own terms: The async counterpart of
+    mk_request_function, with the same method_spec (url_template, url, args, json_arg_names, params_arg_names,
+    input_trans, output_trans, output_format, request_kwargs, debug, wraps, cache, stream, paginate, rate_limit,
+    compress and instrument).
+
+    The function is meant to be a method of an AsyncPy2Request: Its requests are made with the transport of the object
+    it's called from, limited by the object's semaphore (if it has one).
+    """
+    request_kwargs_of = compile_method_spec(method_spec)
+    output_trans = method_spec.get('output_trans', None)
+    debug = method_spec.get('debug', None)
+    check_response_options(method_spec)
+    cache = response_cache_of(method_spec.get('cache', None))
+    stream_options = stream_options_of(method_spec.get('stream', None))
+    pagination = pagination_of(method_spec.get('paginate', None))
+    decode = decoder_of(method_spec.get('output_format', None))
+    if decode is not None and stream_options is not None:
+        raise ValueError("A method_spec can't have both a stream and an output_format (the stream has a kind)")
+    response_trans = output_trans if decode is None else adecoded_output_trans(decode, output_trans)
+    decode_response = None if decode is None else adecoded_output_trans(decode)
+    rate_limit = token_bucket_of(method_spec.get('rate_limit', None))
+    send = _limited_request if rate_limit is None else partial(_rate_limited_request, rate_limit)
+    compressor = body_compressor_of(method_spec.get('compress', None))
+    if compressor is not None:
+        send = partial(_compressed_request, compressor, send)
+    request = partial(_coalesced_request, send)
+    method_stats = method_stats_of(method_spec.get('instrument', None))
+    stream = None if stream_options is None else partial(AsyncResponseStream, **stream_options)
+    paginate = None if pagination is None else partial(
+        AsyncPaginatedItems, pagination=pagination, output_trans=output_trans, decode=decode, method_stats=method_stats)
+
+    async def request_func(self, *args, **kwargs):
+        if method_stats is not None and debug is None:
+            return await ameasured_request(method_stats, request_kwargs_of, partial(request, self),
+                                           output_trans, args, kwargs, decode, cache, stream, paginate)
+        request_kwargs = request_kwargs_of(args, kwargs)
+        if debug == DebugOptions.print_request_kwargs:
+            print(request_kwargs)
+        elif debug == DebugOptions.return_request_kwargs:
+            return request_kwargs
+
+        if pagination is not None:
+            return AsyncPaginatedItems(partial(request, self), request_kwargs, pagination, output_trans, decode)
+        if cache is not None:
+            return await cache.arequest(partial(request, self), request_kwargs, output_trans, decode=decode_response)
+        r = await request(self, **request_kwargs)
+        if stream_options is not None:
+            r = AsyncResponseStream(r, **stream_options)
+        if response_trans is not None:
+            r = response_trans(r)
+            if inspect.isawaitable(r):
+                r = await r
+        return r
+
+    request_func.cache = cache
+    request_func.rate_limit = rate_limit
+    request_func.compressor = compressor
+    request_func.stats = method_stats
+    return _set_signature(request_func, method_spec)
+
+
+async def _rate_limited_request(rate_limit, obj, **request_kwargs):
+    await rate_limit.aacquire()
+    return await _limited_request(obj, **request_kwargs)
+
+
+async def _compressed_request(compressor, send, obj, **request_kwargs):
+    """Make a request with send(obj, **request_kwargs), with a body compressed by compressor (if it pays off)"""
+    return await send(obj, **compressor.compressed(request_kwargs, AIOHTTP_ACCEPT_ENCODING))
+
+
+async def _coalesced_request(send, obj, **request_kwargs):
+    """Make a request with send(obj, **request_kwargs), coalesced by the single_flight of obj, if it has one"""
+    single_flight = getattr(obj, 'single_flight', None)
+    if single_flight is None:
+        return await send(obj, **request_kwargs)
+    return await single_flight.arequest(partial(send, obj), request_kwargs)
+
+
+async def _limited_request(obj, **request_kwargs):
+    """Make a request with the transport of obj, limited by the semaphore of obj, if it has one"""
+    semaphore = getattr(obj, 'semaphore', None)
+    if semaphore is None:
+        return await obj.transport.request(**request_kwargs)
+    async with semaphore:
+        return await obj.transport.request(**request_kwargs)
+
+
+class AsyncPy2Request(Py2Request):
+    """ Make a class that has coroutine methods that offer a python interface to (concurrent) web requests """
+
+    _dflt_method_func_from_method_spec = staticmethod(mk_async_request_function)
+
+    def __init__(self, method_specs=None,
+                 method_func_from_method_spec=mk_async_request_function,
+                 transport=None,
+                 max_concurrency=DFLT_MAX_CONCURRENCY,
+                 single_flight=None,
+                 instrument=None):
+        """
+        Initialize the object with (coroutine) web request calling methods.
+
+        :param method_specs: A {method_name: method_spec,...} dict: The same as the ones of Py2Request
+        :param method_func_from_method_spec: The function that makes a coroutine function from a method_spec
+        :param transport: The (async) transport that makes the requests of the methods. By default, the object gets
+            its own AsyncHttpTransport. Give one to share it (and its connections) between objects.
+        :param max_concurrency: The maximum number of requests the methods of the object make concurrently (the other
+            calls wait for one of these to be done). None means no limit (other than the transport's).
+        :param single_flight: To coalesce identical concurrent requests of the methods into one (see Py2Request)
+        :param instrument: To measure the calls of the methods: True, or an Instrumentation (see Py2Request)
+        """
+        self._method_specs = {} if method_specs is None else method_specs
+        self._dflt_method_func_from_method_spec = method_func_from_method_spec
+        self._owns_transport = transport is None
+        self.transport = AsyncHttpTransport() if transport is None else transport
+        self.max_concurrency = max_concurrency
+        self.semaphore = None if max_concurrency is None else asyncio.Semaphore(max_concurrency)
+        self.single_flight = single_flight_of(single_flight)
+        self.instrumentation = instrumentation_of(instrument)
+        self._process_method_specs()
+
+        for method_name, method_spec in self._method_specs.items():
+            self._inject_method(method_name, method_spec, method_func_from_method_spec)
+
+    def _process_method_specs(self):
+        if self._dflt_method_func_from_method_spec == mk_async_request_function:
+            add_url_template_args(self._method_specs)
+
+    async def close(self):
+        """Close the transport of the object (and its connections), unless it was given (so maybe shared)"""
+        if self._owns_transport:
+            await self.transport.close()
+
+    def __enter__(self):
+        raise TypeError("An {} is an async context manager: Use 'async with'".format(type(self).__name__))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
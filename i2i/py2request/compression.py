@@ -0,0 +1,168 @@
+"""
+Compression of the bodies of requests: For big (JSON) payloads to servers that accept compressed requests.
+
+A method_spec can ask for the bodies of its requests to be compressed, with a 'compress' key, whose value can be:
+    * True: The bodies are gzipped (if they're big enough, and it pays off)
+    * 'gzip' or 'zstd': The encoding to compress with (zstd needs the zstandard package)
+    * a dict: The keyword arguments of a BodyCompressor, for example {'encoding': 'gzip', 'min_size': 4096}
+    * a BodyCompressor: To share one (and its stats) between methods
+
+The json body (of the json_arg_names of the method) or the bytes data of a request is compressed if it has at least
+min_size bytes, and sent with a Content-Encoding header. If compressing doesn't pay off (the compressed body would be
+more than min_ratio of the size of the body, as with already compressed data), the body is sent as is (a json body
+being sent as the JSON it was serialized to, to be compressed). Requests also advertise (with an Accept-Encoding header)
+the encodings their responses can be compressed with: The ones the client (requests or aiohttp) can decode.
+
+>>> compressor = BodyCompressor(min_size=100)
+>>> request_kwargs = compressor.compressed({'method': 'POST', 'url': 'http://host', 'json': {'x': [0] * 1000}})
+>>> request_kwargs['headers']['Content-Encoding'], len(request_kwargs['data']) < 100
+('gzip', True)
+>>> compressor.compressed({'method': 'POST', 'url': 'http://host', 'json': {'x': 0}})['data']  # too small
+b'{"x":0}'
+>>> stats = compressor.stats()
+>>> stats['compressed'], stats['skipped'], stats['bytes_in']
+(1, 1, 2007)
+"""
+import gzip
+import json
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from urllib3.util.request import ACCEPT_ENCODING  # the encodings the installed packages can decode
+except ImportError:
+    ACCEPT_ENCODING = 'gzip,deflate'
+
+try:
+    from aiohttp import compression_utils as _aiohttp_compression_utils
+except ImportError:
+    _aiohttp_compression_utils = None
+
+
+def _aiohttp_accept_encoding():
+    """The encodings aiohttp (with the packages installed) can decode"""
+    encodings = ['gzip', 'deflate']
+    if getattr(_aiohttp_compression_utils, 'HAS_BROTLI', False):
+        encodings.append('br')
+    if getattr(_aiohttp_compression_utils, 'HAS_ZSTD', False):
+        encodings.append('zstd')
+    return ','.join(encodings)
+
+
+AIOHTTP_ACCEPT_ENCODING = _aiohttp_accept_encoding()
+
+ENCODINGS = ('gzip', 'zstd')
+DFLT_MIN_SIZE = 1024
+DFLT_MIN_RATIO = 0.9
+DFLT_LEVEL_OF_ENCODING = {'gzip': 6, 'zstd': 3}
+
+
+def _dumps_json(obj):
+    """The (compact) JSON bytes of obj, as requests would send them"""
+    return json.dumps(obj, separators=(',', ':'), allow_nan=False).encode('utf-8')
+
+
+class BodyCompressor(object):
+    """Compresses the bodies of requests (see the module's doc)"""
+
+    def __init__(self, encoding='gzip', min_size=DFLT_MIN_SIZE, min_ratio=DFLT_MIN_RATIO, level=None,
+                 accept_encoding=True):
+        """
+        :param encoding: The encoding to compress with: 'gzip' or 'zstd'
+        :param min_size: The number of bytes under which bodies are not compressed
+        :param min_ratio: The (compressed size / size) ratio over which the body is sent uncompressed
+        :param level: The compression level (default: 6 for gzip, 3 for zstd)
+        :param accept_encoding: The Accept-Encoding header of requests: True for the encodings the client (requests or
+            aiohttp) can decode, or None for the one of the transport
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError("encoding should be one of {}, was {!r}".format(ENCODINGS, encoding))
+        if encoding == 'zstd' and zstandard is None:
+            raise ModuleNotFoundError("No module named 'zstandard': Install it (pip install zstandard) to use zstd")
+        self.encoding = encoding
+        self.min_size = min_size
+        self.min_ratio = min_ratio
+        self.level = DFLT_LEVEL_OF_ENCODING[encoding] if level is None else level
+        self.accept_encoding = accept_encoding
+        if encoding == 'gzip':
+            self.compress = lambda body: gzip.compress(body, compresslevel=self.level, mtime=0)
+        else:
+            self.compress = zstandard.ZstdCompressor(level=self.level).compress  # (thread-safe for one-shot calls)
+        self.compressed_count = self.skipped_count = self.bytes_in = self.bytes_out = 0
+        self._lock = threading.Lock()
+
+    def compressed(self, request_kwargs, client_accept_encoding=ACCEPT_ENCODING):
+        """
+        The request_kwargs, with a compressed body (if it pays off), and encoding headers
+        :param request_kwargs: The arguments of the request
+        :param client_accept_encoding: The encodings the client sending the request can decode (ACCEPT_ENCODING for
+            requests, AIOHTTP_ACCEPT_ENCODING for aiohttp), advertised if accept_encoding is True
+        """
+        headers = dict(request_kwargs.get('headers') or {})
+        accept_encoding = client_accept_encoding if self.accept_encoding is True else self.accept_encoding
+        if accept_encoding is not None:
+            headers.setdefault('Accept-Encoding', accept_encoding)
+        json_body = request_kwargs.get('json')
+        data = request_kwargs.get('data')
+        if json_body is not None:
+            body = _dumps_json(json_body)
+        elif isinstance(data, bytes):
+            body = data
+        else:  # no body, or not one we can compress (a dict of form fields, a file...)
+            return dict(request_kwargs, headers=headers)
+        request_kwargs = dict(request_kwargs, headers=headers)
+        if json_body is not None:  # (sent as the JSON serialized here, compressed or not)
+            del request_kwargs['json']
+            headers.setdefault('Content-Type', 'application/json')
+        compressed_body = self.compress(body) if len(body) >= self.min_size else None
+        if compressed_body is None or len(compressed_body) > self.min_ratio * len(body):
+            with self._lock:
+                self.skipped_count += 1
+            request_kwargs['data'] = body
+            return request_kwargs
+        with self._lock:
+            self.compressed_count += 1
+            self.bytes_in += len(body)
+            self.bytes_out += len(compressed_body)
+        headers['Content-Encoding'] = self.encoding
+        request_kwargs['data'] = compressed_body
+        return request_kwargs
+
+    def stats(self):
+        with self._lock:
+            return {'compressed': self.compressed_count, 'skipped': self.skipped_count,
+                    'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out}
+
+
+def decompressed(body, encoding):
+    """
+    The body of a request (or response) compressed with encoding (its Content-Encoding): 'gzip' or 'zstd' (or None,
+    or 'identity', for a body that isn't compressed)
+    """
+    if encoding in (None, 'identity'):
+        return body
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    if encoding == 'zstd':
+        if zstandard is None:
+            raise ModuleNotFoundError("No module named 'zstandard': Install it (pip install zstandard) to use zstd")
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise ValueError("Can't decompress a body of Content-Encoding {!r}: Only {} are supported".format(
+        encoding, ', '.join(ENCODINGS)))
+
+
+def body_compressor_of(compress_spec):
+    """The BodyCompressor of the 'compress' value of a method_spec (see the module's doc), or None if it's falsy"""
+    if not compress_spec:
+        return None
+    if isinstance(compress_spec, BodyCompressor):
+        return compress_spec
+    if compress_spec is True:
+        return BodyCompressor()
+    if isinstance(compress_spec, str):
+        return BodyCompressor(compress_spec)
+    return BodyCompressor(**compress_spec)
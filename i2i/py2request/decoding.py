@@ -0,0 +1,134 @@
+"""
+Decoding of the bodies of responses: Parse them straight from their bytes, with the fastest backend available.
+
+A method_spec can ask for the body of its responses to be decoded, with an 'output_format' key, whose value can be:
+    * 'json': The body is a JSON document
+    * 'ndjson': The body is newline-delimited JSON: The output is the list of its records
+    * 'msgpack': The body is MessagePack (needs the msgpack package)
+    * a function: Decoding the bytes of the body (to use another backend, or format)
+The output of the method is then the decoded body (or, if it has one, the output_trans of the decoded body).
+
+JSON is parsed with orjson, if it's installed (it parses bytes directly, without decoding them into a str first, and
+parses lines of NDJSON from views of the body, without copying them), and with the json package otherwise.
+
+>>> loads_json(b'{"a": [1, 2]}')
+{'a': [1, 2]}
+>>> loads_ndjson(b'{"a": 1}\\n\\n{"a": 2}\\n')
+[{'a': 1}, {'a': 2}]
+>>> decoder_of('json') is loads_json
+True
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_BACKEND = 'json' if orjson is None else 'orjson'
+
+
+if orjson is not None:
+    loads_json = orjson.loads
+
+    def loads_ndjson(content):
+        """The list of the records of an NDJSON body (bytes)"""
+        view = memoryview(content)
+        records = []
+        start, end = 0, len(content)
+        while start < end:
+            newline = content.find(b'\n', start)
+            if newline == -1:
+                newline = end
+            if newline > start:
+                line = view[start:newline]
+                try:
+                    records.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    if bytes(line).strip():  # (blank lines are skipped)
+                        raise
+            start = newline + 1
+        return records
+else:
+    def loads_json(content):
+        """The object of a JSON body (bytes)"""
+        return json.loads(content)
+
+    def loads_ndjson(content):
+        """The list of the records of an NDJSON body (bytes)"""
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def loads_msgpack(content):
+    """The object of a MessagePack body (bytes)"""
+    return msgpack.unpackb(content, raw=False)
+
+
+DECODER_OF_FORMAT = {
+    'json': loads_json,
+    'ndjson': loads_ndjson,
+    'msgpack': loads_msgpack,
+}
+
+
+def decoder_of(output_format):
+    """The function decoding the body (bytes) of responses, of the 'output_format' value of a method_spec, or None"""
+    if output_format is None:
+        return None
+    if callable(output_format):
+        return output_format
+    if output_format not in DECODER_OF_FORMAT:
+        raise ValueError("output_format should be one of {}, or a function, was {!r}".format(
+            tuple(DECODER_OF_FORMAT), output_format))
+    if output_format == 'msgpack' and msgpack is None:
+        raise ModuleNotFoundError("No module named 'msgpack': Install it (pip install msgpack) to decode msgpack")
+    return DECODER_OF_FORMAT[output_format]
+
+
+_BUILTIN_DECODERS = frozenset(DECODER_OF_FORMAT.values())
+_NO_BODY = object()
+
+
+def decoded_body_of(response, decode):
+    """
+    The body of a (requests) response, decoded with decode. The responses of in-process transports (see
+    i2i.py2request.local_transport) have a decoded_body already: It's the output of the built-in decoders.
+    """
+    if decode in _BUILTIN_DECODERS:
+        decoded_body = getattr(response, 'decoded_body', _NO_BODY)
+        if decoded_body is not _NO_BODY:
+            return decoded_body
+    return decode(response.content)
+
+
+def decoded_output_trans(decode, output_trans=None):
+    """The function of a (requests) response that decodes its body, then applies output_trans (if any) to it"""
+    if output_trans is None:
+        return lambda response: decoded_body_of(response, decode)
+    return lambda response: output_trans(decoded_body_of(response, decode))
+
+
+async def abody_of(response):
+    """The body (bytes) of an aiohttp response, whether it was read (and released) by the transport, or not"""
+    body = getattr(response, '_body', None)  # (read raises once the response is released, even if the body was read)
+    return body if body is not None else await response.read()
+
+
+def adecoded_output_trans(decode, output_trans=None):
+    """The async counterpart of decoded_output_trans, for aiohttp responses (output_trans can be a coroutine function)"""
+
+    async def decoded_output(response):
+        output = decode(await abody_of(response))
+        if output_trans is None:
+            return output
+        output = output_trans(output)
+        if hasattr(output, '__await__'):
+            output = await output
+        return output
+
+    return decoded_output
@@ -0,0 +1,229 @@
+"""
+Concurrent fan-out of (request) methods over many inputs.
+
+The methods Py2Request injects are MappableMethod objects: Bound methods that also have a map method, calling the
+method on every item of an iterable, concurrently, on a bounded thread pool.
+
+>>> import time
+>>> def slow_inverse(self, x):
+...     time.sleep(0.01)
+...     return 1 / x
+>>> method = MappableMethod(slow_inverse, object())
+>>> results = method.map([1, 2, 0, 4], max_workers=4)
+>>> list(results)
+[1.0, 0.5, ZeroDivisionError('division by zero'), 0.25]
+>>> results.errors
+[(2, ZeroDivisionError('division by zero'))]
+
+Inputs are consumed as results are (so the iterable can be a generator of millions of items): At most max_pending
+calls (running or waiting for a worker) are submitted ahead of the result being yielded.
+"""
+import asyncio
+import inspect
+import types
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import update_wrapper
+
+DFLT_MAX_WORKERS = 8
+UNPACK_OPTIONS = (None, '*', '**')
+
+
+def _call_of_unpack(func, unpack):
+    if unpack is None:
+        return func
+    elif unpack == '*':
+        return lambda item: func(*item)
+    elif unpack == '**':
+        return lambda item: func(**item)
+    raise ValueError("unpack should be one of {}, was {!r}".format(UNPACK_OPTIONS, unpack))
+
+
+class MapResults(object):
+    """
+    An iterator of the results of calls to a function (in the order of the inputs, or as they complete).
+    A call that raised an exception has that exception as a result, and (index of its input, exception) pair is
+    appended to the errors list.
+    """
+
+    def __init__(self, results):
+        self.errors = []
+        self._results = results(self.errors)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._results)
+
+    def close(self):
+        """Stop: Cancel the calls that didn't start yet, and wait for the running ones to end"""
+        self._results.close()
+
+
+def fan_out_map(func, iterable, max_workers=DFLT_MAX_WORKERS, ordered=True, max_pending=None, unpack=None):
+    """
+    Call func on every item of iterable, on a pool of max_workers threads, yielding the results as they come.
+
+    :param func: The function to call
+    :param iterable: The inputs
+    :param max_workers: The number of threads calling func
+    :param ordered: If True, results are yielded in the order of their input. If False, as soon as they're done.
+    :param max_pending: The maximum number of calls submitted (running, or waiting for a worker) but whose result
+        wasn't yielded yet, to bound the memory used when results are consumed slower than they're made.
+        Defaults to twice max_workers.
+    :param unpack: How to call func with an item: None for func(item), '*' for func(*item), '**' for func(**item)
+    :return: A MapResults iterator of the results (exceptions raised by calls are results too, and are also collected
+        in its errors attribute)
+    """
+    call = _call_of_unpack(func, unpack)
+    max_pending = max_pending or 2 * max_workers
+    if max_pending < max_workers:
+        raise ValueError("max_pending can't be smaller than max_workers")
+
+    def results(errors):
+        executor = ThreadPoolExecutor(max_workers)
+        index_of_future = {}
+        pending = deque() if ordered else set()
+        add = pending.append if ordered else pending.add
+        items = enumerate(iterable)
+
+        def submit_next():
+            for index, item in items:
+                future = executor.submit(call, item)
+                index_of_future[future] = index
+                add(future)
+                return True
+            return False
+
+        def result_of(future):
+            index = index_of_future.pop(future)
+            exception = future.exception()
+            if exception is not None:
+                errors.append((index, exception))
+                return exception
+            return future.result()
+
+        try:
+            while len(pending) < max_pending and submit_next():
+                pass
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    pending.difference_update(done)
+                for future in done:
+                    submit_next()
+                    yield result_of(future)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    return MapResults(results)
+
+
+class AsyncMapResults(object):
+    """The async counterpart of MapResults: An async iterator of the results of calls to a coroutine function"""
+
+    def __init__(self, results):
+        self.errors = []
+        self._results = results(self.errors)
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return self._results.__anext__()
+
+    async def aclose(self):
+        """Stop: Cancel the calls that are still running"""
+        await self._results.aclose()
+
+
+def async_fan_out_map(func, iterable, max_workers=DFLT_MAX_WORKERS, ordered=True, unpack=None):
+    """
+    The async counterpart of fan_out_map: Call the coroutine function func on every item of iterable, with at most
+    max_workers calls running concurrently, yielding the results as they come (see fan_out_map).
+    """
+    call = _call_of_unpack(func, unpack)
+
+    async def results(errors):
+        index_of_task = {}
+        pending = deque() if ordered else set()
+        add = pending.append if ordered else pending.add
+        items = enumerate(iterable)
+
+        def submit_next():
+            for index, item in items:
+                task = asyncio.ensure_future(call(item))
+                index_of_task[task] = index
+                add(task)
+                return True
+            return False
+
+        def result_of(task):
+            index = index_of_task.pop(task)
+            exception = task.exception()
+            if exception is not None:
+                errors.append((index, exception))
+                return exception
+            return task.result()
+
+        try:
+            while len(pending) < max_workers and submit_next():
+                pass
+            while pending:
+                if ordered:
+                    task = pending.popleft()
+                    await asyncio.wait([task])
+                    done = [task]
+                else:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    pending.difference_update(done)
+                for task in done:
+                    submit_next()
+                    yield result_of(task)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    return AsyncMapResults(results)
+
+
+class MappableMethod(object):
+    """
+    A method (a function bound to an object) that also has a map method, calling it concurrently on many inputs
+    (see fan_out_map). It has the name, doc and signature of the bound method.
+    """
+
+    def __init__(self, func, obj):
+        self.__func__ = func
+        self.__self__ = obj
+        self._method = types.MethodType(func, obj)
+        update_wrapper(self, self._method)
+        self.__dict__.pop('__signature__', None)  # so that inspect.signature gives the bound method's signature
+
+    def __call__(self, *args, **kwargs):
+        return self._method(*args, **kwargs)
+
+    def map(self, iterable, max_workers=DFLT_MAX_WORKERS, ordered=True, max_pending=None, unpack=None):
+        """Call the method on all the items of iterable, concurrently. See fan_out_map."""
+        return fan_out_map(self._method, iterable, max_workers, ordered, max_pending, unpack)
+
+    def __repr__(self):
+        return '<mappable method {} of {!r}>'.format(self.__name__, self.__self__)
+
+
+class AsyncMappableMethod(MappableMethod):
+    """A MappableMethod of a coroutine function, whose map is an async iterator (see async_fan_out_map)"""
+
+    def map(self, iterable, max_workers=DFLT_MAX_WORKERS, ordered=True, unpack=None):
+        """Call the method on all the items of iterable, concurrently. See async_fan_out_map."""
+        return async_fan_out_map(self._method, iterable, max_workers, ordered, unpack)
+
+
+def mappable_method(func, obj):
+    """The (Async)MappableMethod of func bound to obj"""
+    if inspect.iscoroutinefunction(func):
+        return AsyncMappableMethod(func, obj)
+    return MappableMethod(func, obj)
@@ -0,0 +1,404 @@
+"""
+Instrumentation of request methods: Where the time of a call goes, how big its payloads are, and how it ended.
+
+A method is instrumented when its method_spec has an 'instrument' key, whose value is True (the method gets its own
+MethodStats) or a MethodStats. A Py2Request (or AsyncPy2Request) made with instrument=True (or an Instrumentation)
+instruments all its methods, with the MethodStats of an Instrumentation, named after the method.
+
+Every call of an instrumented method records its measurements:
+    * the time (in seconds) of its stages: input_trans (with the binding of the args to their names), url_format
+      (with the making of the json body), time_to_first_byte (from sending the request to having the headers of the
+      response, including the time spent waiting for rate limits or concurrency slots), download (of the body of
+      the response, for transports that stamp the time they got the headers of responses, see
+      stamp_headers_received), decode (of the body, for methods with an output_format), output_trans, and total
+    * request_bytes and response_bytes: The sizes of the bodies of the request and of the response
+    * status: The status code of the response
+    * cache: Whether the response was a cache 'hit', 'miss' or 'revalidated', for methods with a cache (whose
+      decode is only measured on misses: The cache has the decoded bodies)
+    * error: The exception the call raised, if any
+in histograms (whose stats are the count, mean, min, max and approximate percentiles of the values) and counters.
+The measurements dict of every call is also given to the hooks of the MethodStats, to forward them to other metrics
+systems: hook(method_name, measurements).
+
+The body of a streamed response is read as the stream is iterated over, after the call: Only its time_to_first_byte
+is recorded. The pages of a paginated method are fetched after the call too: Every page is recorded (see
+MethodStats.record_page) with its own time_to_first_byte, download, decode (of its body, JSON by default),
+response_bytes and status, and its page time (from its request to its decoded body).
+
+>>> histogram = Histogram()
+>>> for value in [0.01, 0.02, 0.02, 0.03, 1.0]:
+...     histogram.record(value)
+>>> stats = histogram.stats()
+>>> stats['count'], stats['min'], stats['max']
+(5, 0.01, 1.0)
+>>> round(stats['p50'], 3)  # approximately 0.02 (histograms know values within about 5%)
+0.021
+"""
+import inspect
+import math
+import threading
+from collections import Counter
+from functools import partial
+from time import perf_counter
+
+from i2i.py2request.decoding import abody_of, adecoded_output_trans, decoded_body_of, decoded_output_trans
+
+STAGES = ('input_trans', 'url_format', 'time_to_first_byte', 'download', 'decode', 'output_trans', 'total')
+PAGE = 'page'
+SIZES = ('request_bytes', 'response_bytes')
+PERCENTILES = (50, 90, 99)
+_LOG_BASE = math.log(1.2 ** 0.5)  # buckets are about 9.5% wide, so values are known within about 4.6%
+
+
+class Histogram(object):
+    """
+    A histogram of (non-negative) values, with logarithmic buckets, so that recording a value costs a few operations,
+    and the memory doesn't grow with the number of values. Not thread-safe: MethodStats records under a lock.
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max', '_counts')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self._counts = {}
+
+    def record(self, value):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        bucket = math.floor(math.log(value) / _LOG_BASE) if value > 0 else None
+        self._counts[bucket] = self._counts.get(bucket, 0) + 1
+
+    def percentile(self, percent):
+        """The (approximate) value that percent % of the values are under (None if there are no values)"""
+        if not self.count:
+            return None
+        rank = percent / 100 * self.count
+        seen = 0
+        for bucket in sorted(self._counts, key=lambda b: -math.inf if b is None else b):
+            seen += self._counts[bucket]
+            if seen >= rank:
+                if bucket is None:
+                    return 0
+                value = math.exp((bucket + 0.5) * _LOG_BASE)  # the (geometric) middle of the bucket
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def stats(self):
+        stats = {'count': self.count, 'mean': self.total / self.count if self.count else None,
+                 'min': self.min, 'max': self.max}
+        for percent in PERCENTILES:
+            stats['p{}'.format(percent)] = self.percentile(percent)
+        return stats
+
+
+class MethodStats(object):
+    """The (thread-safe) histograms and counters of the measurements of the calls to a method"""
+
+    def __init__(self, name=None, hooks=None):
+        """
+        :param name: The name of the method (given to hooks)
+        :param hooks: A list of hook(method_name, measurements) functions called with the measurements of every call
+        """
+        self.name = name
+        self.hooks = [] if hooks is None else hooks
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {key: Histogram() for key in STAGES + (PAGE,) + SIZES}
+            self.statuses = Counter()
+            self.errors = Counter()
+            self.cache = Counter()
+            self.calls = 0
+            self.pages = 0
+
+    def record(self, measurements):
+        """Record the measurements (a dict, see the module's doc) of a call"""
+        with self._lock:
+            self.calls += 1
+            self._record(measurements)
+            cache = measurements.get('cache')
+            if cache is not None:
+                self.cache[cache] += 1
+        for hook in self.hooks:
+            hook(self.name, measurements)
+
+    def record_page(self, measurements):
+        """Record the measurements of a page of a paginated call (hooks can tell them by their 'page' key)"""
+        with self._lock:
+            self.pages += 1
+            self._record(measurements)
+        for hook in self.hooks:
+            hook(self.name, measurements)
+
+    def _record(self, measurements):
+        for key, value in measurements.items():
+            histogram = self.histograms.get(key)
+            if histogram is not None and value is not None:
+                histogram.record(value)
+        status = measurements.get('status')
+        if status is not None:
+            self.statuses[status] += 1
+        error = measurements.get('error')
+        if error is not None:
+            self.errors[type(error).__name__] += 1
+
+    def stats(self):
+        """
+        A {'calls': ..., 'pages': ..., 'errors': {exception name: count, ...}, 'statuses': {status: count, ...},
+        'cache': {outcome: count, ...}, stage_or_size: {'count': ..., 'mean': ..., 'min': ..., 'max': ..., 'p50': ...,
+        'p90': ..., 'p99': ...}, ...} dict
+        """
+        with self._lock:
+            stats = {'calls': self.calls, 'pages': self.pages, 'errors': dict(self.errors),
+                     'statuses': dict(self.statuses), 'cache': dict(self.cache)}
+            for key, histogram in self.histograms.items():
+                stats[key] = histogram.stats()
+        return stats
+
+
+class Instrumentation(object):
+    """The MethodStats of the methods of an object (see the module's doc), with hooks shared by all of them"""
+
+    def __init__(self, hooks=()):
+        """
+        :param hooks: Functions called with the (method_name, measurements) of every call of every method
+        """
+        self.hooks = list(hooks)
+        self._stats_of_method = {}
+        self._lock = threading.Lock()
+
+    def of_method(self, name):
+        """The MethodStats of the method with that name"""
+        with self._lock:
+            method_stats = self._stats_of_method.get(name)
+            if method_stats is None:
+                method_stats = self._stats_of_method[name] = MethodStats(name, self.hooks)
+            return method_stats
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def stats(self):
+        """The {method_name: method_stats, ...} of the methods that were instrumented (see MethodStats.stats)"""
+        return {name: method_stats.stats() for name, method_stats in list(self._stats_of_method.items())}
+
+    def reset(self):
+        for method_stats in list(self._stats_of_method.values()):
+            method_stats.reset()
+
+
+def instrumentation_of(instrument):
+    """The Instrumentation of the instrument argument of a Py2Request (True or an Instrumentation), or None"""
+    if not instrument:
+        return None
+    if instrument is True:
+        return Instrumentation()
+    return instrument
+
+
+def method_stats_of(instrument):
+    """The MethodStats of the 'instrument' value of a method_spec (True or a MethodStats), or None"""
+    if not instrument:
+        return None
+    if instrument is True:
+        return MethodStats()
+    return instrument
+
+
+def _request_bytes_of(response, request_kwargs):
+    body = getattr(getattr(response, 'request', None), 'body', None)  # the prepared request of a requests response
+    if body is None:
+        body = request_kwargs.get('data')
+    return len(body) if isinstance(body, (bytes, str)) else None
+
+
+def stamp_headers_received(response, *args, **kwargs):
+    """
+    Write the time the headers of response were received, as its headers_received attribute: The transports do (the
+    HttpTransport with a response hook), so that instrumented requests, whose body is read by the transport, can tell
+    their time to first byte from the download of their body.
+    """
+    response.headers_received = perf_counter()
+    return response
+
+
+def _record_transfer(measurements, response, sent):
+    """Record the time_to_first_byte and download of a response, whose request was sent at the sent time"""
+    received = perf_counter()
+    headers_received = getattr(response, 'headers_received', None)
+    if headers_received is None:  # (a transport that doesn't stamp its responses)
+        measurements['time_to_first_byte'] = received - sent
+        return
+    headers_received = min(max(headers_received, sent), received)  # (coalesced calls share an earlier response)
+    measurements['time_to_first_byte'] = headers_received - sent
+    measurements['download'] = received - headers_received
+
+
+def _measured_send(send, measurements, **request_kwargs):
+    """
+    Make a request with send, recording its transfer, status and sizes in measurements (the body of a streamed
+    response isn't read: Only its time_to_first_byte is recorded)
+    """
+    sent = perf_counter()
+    response = send(**request_kwargs)
+    if request_kwargs.get('stream'):
+        measurements['time_to_first_byte'] = perf_counter() - sent
+    else:
+        _record_transfer(measurements, response, sent)
+        # (the responses of in-process transports have a decoded body, that's not serialized to be measured)
+        content = None if hasattr(response, 'decoded_body') else getattr(response, 'content', None)
+        measurements['response_bytes'] = len(content) if isinstance(content, bytes) else None
+    measurements['status'] = getattr(response, 'status_code', None)
+    measurements['request_bytes'] = _request_bytes_of(response, request_kwargs)
+    return response
+
+
+def _measured_output(measurements, decode, output_trans, response):
+    """The output_trans of the body of response decoded with decode (if not None), recording the time of both"""
+    tic = perf_counter()
+    if decode is not None:
+        response = decoded_body_of(response, decode)
+        decoded = perf_counter()
+        measurements['decode'] = decoded - tic
+        tic = decoded
+    if output_trans is not None:
+        response = output_trans(response)
+        measurements['output_trans'] = perf_counter() - tic
+    return response
+
+
+def _timed(func, measurements, stage):
+    """func, writing the time (in seconds) its calls take in measurements[stage] (None if func is None)"""
+    if func is None:
+        return None
+
+    def timed_func(*args):
+        tic = perf_counter()
+        output = func(*args)
+        measurements[stage] = perf_counter() - tic
+        return output
+
+    return timed_func
+
+
+def measured_request(method_stats, request_kwargs_of, send, output_trans, args, kwargs, decode=None, cache=None,
+                     stream=None, paginate=None):
+    """
+    Make the request of a call, measuring it (see the module's doc)
+    :param method_stats: The MethodStats the measurements are recorded in
+    :param request_kwargs_of: The function making the request_kwargs, measuring it (see compile_method_spec)
+    :param send: The function making the request: send(**request_kwargs) should return the response
+    :param output_trans: The function to apply to the response, or to its decoded body if there's a decode (None:
+        the output is the response, or its decoded body, itself)
+    :param args: The args of the call
+    :param kwargs: The kwargs of the call
+    :param decode: The function decoding the body (bytes) of the response (None: the response isn't decoded)
+    :param cache: The ResponseCache the output is taken from, if it has it (None: no cache)
+    :param stream: The function making the stream of the (streamed) response, output_trans is applied to (None: the
+        response isn't streamed)
+    :param paginate: The function making the iterator of the items of the pages: paginate(send, request_kwargs),
+        which records its pages itself (None: the method isn't paginated)
+    """
+    measurements = {}
+    tic = perf_counter()
+    try:
+        request_kwargs = request_kwargs_of(args, kwargs, measurements)
+        if paginate is not None:
+            return paginate(send, request_kwargs)
+        measured_send = partial(_measured_send, send, measurements)
+        if cache is not None:  # (only the responses of misses are decoded: the cache has their decoded body)
+            decode_response = None if decode is None else _timed(decoded_output_trans(decode), measurements, 'decode')
+            return cache.request(measured_send, request_kwargs, _timed(output_trans, measurements, 'output_trans'),
+                                 measurements, decode_response)
+        response = measured_send(**request_kwargs)
+        return _measured_output(measurements, decode, output_trans, response if stream is None else stream(response))
+    except Exception as error:
+        measurements['error'] = error
+        raise
+    finally:
+        measurements['total'] = perf_counter() - tic
+        method_stats.record(measurements)
+
+
+async def _ameasured_send(send, measurements, **request_kwargs):
+    """The async counterpart of _measured_send: send is a coroutine function, returning an aiohttp response"""
+    sent = perf_counter()
+    response = await send(**request_kwargs)
+    if request_kwargs.get('stream'):
+        measurements['time_to_first_byte'] = perf_counter() - sent
+    else:
+        _record_transfer(measurements, response, sent)
+        measurements['response_bytes'] = len(await abody_of(response))
+    measurements['status'] = response.status
+    measurements['request_bytes'] = _request_bytes_of(response, request_kwargs)
+    return response
+
+
+async def _ameasured_output(measurements, decode, output_trans, response):
+    """The async counterpart of _measured_output: output_trans can be a coroutine function"""
+    tic = perf_counter()
+    if decode is not None:
+        response = decode(await abody_of(response))
+        decoded = perf_counter()
+        measurements['decode'] = decoded - tic
+        tic = decoded
+    if output_trans is not None:
+        response = output_trans(response)
+        if inspect.isawaitable(response):
+            response = await response
+        measurements['output_trans'] = perf_counter() - tic
+    return response
+
+
+def _atimed(func, measurements, stage):
+    """The async counterpart of _timed: func can be a coroutine function (or return an awaitable)"""
+    if func is None:
+        return None
+
+    async def timed_func(*args):
+        tic = perf_counter()
+        output = func(*args)
+        if inspect.isawaitable(output):
+            output = await output
+        measurements[stage] = perf_counter() - tic
+        return output
+
+    return timed_func
+
+
+async def ameasured_request(method_stats, request_kwargs_of, send, output_trans, args, kwargs, decode=None,
+                            cache=None, stream=None, paginate=None):
+    """
+    The async counterpart of measured_request: send is a coroutine function, returning an aiohttp response (and
+    paginate makes an async iterator)
+    """
+    measurements = {}
+    tic = perf_counter()
+    try:
+        request_kwargs = request_kwargs_of(args, kwargs, measurements)
+        if paginate is not None:
+            return paginate(send, request_kwargs)
+        measured_send = partial(_ameasured_send, send, measurements)
+        if cache is not None:
+            decode_response = None if decode is None else _atimed(adecoded_output_trans(decode), measurements, 'decode')
+            return await cache.arequest(measured_send, request_kwargs,
+                                        _atimed(output_trans, measurements, 'output_trans'), measurements,
+                                        decode_response)
+        response = await measured_send(**request_kwargs)
+        return await _ameasured_output(measurements, decode, output_trans,
+                                       response if stream is None else stream(response))
+    except Exception as error:
+        measurements['error'] = error
+        raise
+    finally:
+        measurements['total'] = perf_counter() - tic
+        method_stats.record(measurements)
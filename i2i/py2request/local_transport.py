@@ -0,0 +1,182 @@
+"""
+An in-process transport: Requests are dispatched straight to (registered) python functions, without sockets, and
+without serializing their arguments and results to JSON (and back).
+
+The same method_specs (with the same input_trans and output_trans) can so be used to make a client of a remote API, or
+of the functions of that API, in the same process (for tests, or co-located deployments), at function-call speed:
+
+>>> def add(a, b=0):
+...     return a + b
+>>> transport = LocalTransport([add])  # routed like i2i web services route functions: /add
+>>> method_specs = {'add': {'url': 'http://localhost:5000/add', 'request_kwargs': {'method': 'POST'},
+...                         'json_arg_names': ['a', 'b'], 'output_trans': lambda r: r.json()}}
+>>> from i2i.py2request.py2request import Py2Request
+>>> Py2Request(method_specs, transport=transport).add(a=[1], b=[2])
+[1, 2]
+
+A function is called with the (path parameters, query parameters and) json body of the request, as keyword arguments,
+and its result is the (already decoded) body of the response: A LocalResponse, with the interface of a requests
+response, whose json method returns the result itself (and whose content is only serialized if it's asked for).
+"""
+import json
+import re
+from urllib.parse import parse_qsl, urlsplit
+
+from requests import HTTPError
+
+from i2i.py2request.compression import decompressed
+
+_ROUTE_FIELD = re.compile(r'{(\w+)}')
+
+
+class LocalResponse(object):
+    """A response of the LocalTransport, with the interface of a requests.Response"""
+
+    def __init__(self, decoded_body, status_code=200, url=None, reason='OK', headers=None):
+        """
+        :param decoded_body: The (python object) body of the response: The result of the function
+        :param status_code: The status of the response
+        """
+        self.decoded_body = decoded_body
+        self.status_code = status_code
+        self.url = url
+        self.reason = reason
+        self.headers = {'Content-Type': 'application/json'} if headers is None else headers
+        self.encoding = 'utf-8'
+        self.links = {}
+        self.request = None
+        self._content = None
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self, **kwargs):
+        return self.decoded_body
+
+    @property
+    def content(self):
+        """The body, serialized (the first time it's asked for)"""
+        if self._content is None:
+            if isinstance(self.decoded_body, bytes):
+                self._content = self.decoded_body
+            else:
+                self._content = json.dumps(self.decoded_body, default=repr).encode('utf-8')
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding)
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        content = self.content
+        for i in range(0, len(content), chunk_size or len(content) or 1):
+            yield content[i:i + chunk_size] if chunk_size else content
+
+    def iter_lines(self, chunk_size=None, decode_unicode=False, delimiter=None):
+        return iter(self.content.split(delimiter.encode() if delimiter else b'\n'))
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPError('{} Error: {} for url: {}'.format(self.status_code, self.reason, self.url), response=self)
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return '<LocalResponse [{}]>'.format(self.status_code)
+
+
+def _kwargs_of_body(request_kwargs):
+    json_body = request_kwargs.get('json')
+    data = request_kwargs.get('data')
+    if json_body is None and isinstance(data, bytes):  # a json body that was compressed (or serialized) already
+        headers = request_kwargs.get('headers') or {}
+        json_body = json.loads(decompressed(data, headers.get('Content-Encoding')))
+    elif json_body is None and isinstance(data, dict):
+        json_body = data
+    if json_body is None:
+        return {}
+    if not isinstance(json_body, dict):
+        raise TypeError("The json body of a request to a local function should be a dict (of its kwargs)")
+    return json_body
+
+
+class LocalTransport(object):
+    """
+    A transport that dispatches requests to python functions, by the path of their url (whatever their scheme and
+    host), and returns their results as LocalResponse objects.
+    """
+
+    def __init__(self, funcs=(), raise_errors=True):
+        """
+        :param funcs: The functions to register: A list of functions (routed by their name), or a {route: func} dict
+        :param raise_errors: If True, exceptions raised by functions are raised by requests (so that tests see them).
+            If False, they're responses with a 500 status (and the repr of the exception as body), as with a server.
+        """
+        self.raise_errors = raise_errors
+        self._func_of_route = {}
+        self._templated_routes = []
+        self._n_requests = 0
+        if isinstance(funcs, dict):
+            for route, func in funcs.items():
+                self.register(func, route)
+        else:
+            for func in funcs:
+                self.register(func)
+
+    def register(self, func, route=None):
+        """
+        Register func, as the function of requests to route: A path (default: '/' + the name of func), which can be
+        a template, whose {fields} are given to func as keyword arguments (for example '/users/{user}/items')
+        """
+        if route is None:
+            route = '/' + func.__name__
+        if not route.startswith('/'):
+            route = '/' + route
+        if _ROUTE_FIELD.search(route):
+            pattern = re.compile('^' + _ROUTE_FIELD.sub(r'(?P<\1>[^/]+)', re.escape(route).replace(r'\{', '{').replace(
+                r'\}', '}')) + '$')
+            self._templated_routes.append((pattern, func))
+        else:
+            self._func_of_route[route] = func
+        return func
+
+    def _func_and_path_kwargs_of(self, path):
+        func = self._func_of_route.get(path)
+        if func is not None:
+            return func, {}
+        for pattern, func in self._templated_routes:
+            match = pattern.match(path)
+            if match is not None:
+                return func, match.groupdict()
+        return None, None
+
+    def request(self, method, url, **kwargs):
+        """Call the function of the route of url, with the parameters and json body of the request (see the doc)"""
+        self._n_requests += 1
+        parts = urlsplit(url)
+        func, func_kwargs = self._func_and_path_kwargs_of(parts.path)
+        if func is None:
+            return LocalResponse({'error': 'Not Found'}, 404, url, 'Not Found')
+        func_kwargs.update(parse_qsl(parts.query))
+        func_kwargs.update(kwargs.get('params') or {})
+        func_kwargs.update(_kwargs_of_body(kwargs))
+        try:
+            return LocalResponse(func(**func_kwargs), 200, url)
+        except Exception as exception:
+            if self.raise_errors:
+                raise
+            return LocalResponse({'error': repr(exception)}, 500, url, 'Internal Server Error')
+
+    def stats(self):
+        return {'requests': self._n_requests}
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,6 +1,6 @@
 from __future__ import division
 
-import requests
+from i2i.py2request.transport import transport_of
 
 
 def mk_request_function(method_spec):
@@ -26,7 +26,7 @@ def mk_request_function(method_spec):
         # kwargs = input_trans(kwargs)
         # kwargs = kwargs_validator(kwargs)
         # kwargs['url'] = base_url + kwargs['url']  # prepend url with base_url TODO: Consider other name (suff_url?)
-        r = requests.request(**request_kwargs)
+        r = transport_of(self).request(**request_kwargs)
         if 'output_trans' in method_spec:
             r = method_spec['output_trans'](r)
         return r
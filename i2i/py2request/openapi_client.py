@@ -0,0 +1,389 @@
+"""
+Clients of OpenAPI (3) documents: The method_specs of the operations of a document, and python modules of (written
+out) client classes of a document.
+
+method_specs_of_openapi makes the method_specs of a Py2Request (or of Py2Request.class_of_specs) from an OpenAPI
+document: A dict, a JSON or YAML string, or the path of a .json, .yaml or .yml file (the ones i2i.py2openapi makes, for
+example). There's a method per operation, named after its operationId (or its method and path), whose args are the
+path parameters, the query parameters and the properties of the (JSON object) body of the operation, and whose output
+is the decoded body of the response (for operations responding JSON, NDJSON or MessagePack), or the response.
+The required args come first (and can be given positionally), and the others are only sent if they're given.
+
+>>> openapi_spec = {
+...     'openapi': '3.0.2',
+...     'info': {'title': 'users', 'version': '0.0.1'},
+...     'servers': [{'url': 'http://localhost:3000'}],
+...     'paths': {
+...         '/users/{user-id}': {'get': {
+...             'operationId': 'get_user',
+...             'parameters': [{'name': 'user-id', 'in': 'path', 'required': True}, {'name': 'fields', 'in': 'query'}],
+...             'responses': {'200': {'content': {'application/json': {}}}}}},
+...         'add_user': {'post': {  # (the paths of make_openapi_spec are the names of the functions)
+...             'operationId': 'add_user',
+...             'requestBody': {'content': {'application/json': {'schema': {
+...                 'type': 'object', 'properties': {'name': {}, 'tags': {}}, 'required': ['name']}}}}}}}}
+>>> method_specs = method_specs_of_openapi(openapi_spec)
+>>> method_specs['get_user']['url_template'], method_specs['get_user']['params_arg_names']
+('http://localhost:3000/users/{user_id}', {'fields': 'fields'})
+>>> method_specs['add_user']['args'], method_specs['add_user']['json_arg_names']
+(['name'], ['name', 'tags'])
+
+For big documents (that are slow to read and parse), write_client_module writes the python module of a client class
+of the document instead, whose methods are written out, with explicit signatures and docs, and make their requests
+without interpreting any spec: Importing the module doesn't read the document. cached_client_module (re)writes the
+module only if the document changed since it was written, and imports it.
+
+>>> code = client_module_code(openapi_spec, class_name='Users')
+>>> print(code[code.index('    def get_user'):code.index('    def add_user')].rstrip())
+    def get_user(self, user_id, fields=None):
+        _request_kwargs = {'method': 'GET', 'url': f'{self.base_url}/users/{user_id}'}
+        _params = {}
+        if fields is not None:
+            _params['fields'] = fields
+        if _params:
+            _request_kwargs['params'] = _params
+        _response = send_request(self, **_request_kwargs)
+        return decoded_body_of(_response, loads_json)
+
+The args of parameters and properties whose names aren't python identifiers (or are keywords, or names the methods
+use) are named after them, with their invalid characters replaced by underscores (and an underscore appended, for
+keywords): 'user-id' is user_id, 'from' is from_. Query parameters and body properties whose arg would have the name
+of another arg are prefixed: A 'name' property of an operation with a 'name' path parameter is body_name. Operations
+whose body isn't a JSON object only get the args of their parameters. References ('$ref') are resolved if they're local
+to the document.
+"""
+import importlib.util
+import json
+import keyword
+import os
+import re
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from i2i.py2request.py2request import Py2Request
+
+HTTP_METHODS = ('get', 'put', 'post', 'delete', 'options', 'head', 'patch', 'trace')
+OUTPUT_FORMAT_OF_CONTENT_TYPE = {
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'application/msgpack': 'msgpack',
+    'application/x-msgpack': 'msgpack',
+}
+DFLT_CLASS_NAME = 'Client'
+_DECODER_NAME_OF_FORMAT = {'json': 'loads_json', 'ndjson': 'loads_ndjson', 'msgpack': 'loads_msgpack'}
+_PATH_FIELD = re.compile(r'{([^{}]+)}')
+# the names the code of the methods of client modules uses (that args can't have)
+_RESERVED_NAMES = frozenset(['self', '_request_kwargs', '_params', '_json', '_response', 'send_request',
+                             'decoded_body_of'] + list(_DECODER_NAME_OF_FORMAT.values()))
+# the attributes the instances of clients (of Py2Request, and of client modules) set, that methods can't be named after
+_CLIENT_INSTANCE_NAMES = frozenset(['base_url', 'transport', 'single_flight', 'instrumentation', '_method_specs',
+                                    '_dflt_method_func_from_method_spec', '_owns_transport'])
+
+
+def load_openapi_spec(openapi_spec):
+    """The (dict of the) OpenAPI document openapi_spec: A dict, a JSON or YAML string, or the path of a file of one"""
+    if isinstance(openapi_spec, dict):
+        return openapi_spec
+    if isinstance(openapi_spec, os.PathLike) or '\n' not in openapi_spec and os.path.isfile(openapi_spec):
+        with open(openapi_spec) as fp:
+            openapi_spec = fp.read()
+    if openapi_spec.lstrip().startswith('{'):
+        return json.loads(openapi_spec)
+    if yaml is None:
+        raise ModuleNotFoundError("No module named 'yaml': Install it (pip install pyyaml) to read YAML documents")
+    return yaml.safe_load(openapi_spec)
+
+
+def _resolved(obj, document):
+    """obj, or the object its (local) '$ref' refers to"""
+    while isinstance(obj, dict) and '$ref' in obj:
+        ref = obj['$ref']
+        if not ref.startswith('#/'):
+            raise ValueError("Only references to the document itself ('#/...') are supported, not {!r}".format(ref))
+        obj = document
+        for key in ref[2:].split('/'):
+            obj = obj[key.replace('~1', '/').replace('~0', '~')]
+    return obj
+
+
+def _identifier(name):
+    """A python identifier for name (the name of a parameter, or of an operation)"""
+    identifier = re.sub(r'\W', '_', str(name)) or '_'
+    if identifier[0].isdigit():
+        identifier = '_' + identifier
+    if keyword.iskeyword(identifier) or identifier in _RESERVED_NAMES:
+        identifier += '_'
+    return identifier
+
+
+def _unique_arg_name(name, prefix, arg_names):
+    """The (identifier) arg name of name, prefixed if it's in arg_names already (and then added to arg_names)"""
+    arg_name = _identifier(name)
+    if arg_name in arg_names:
+        arg_name = _identifier(prefix + arg_name)
+    while arg_name in arg_names:
+        arg_name += '_'
+    arg_names.add(arg_name)
+    return arg_name
+
+
+def base_url_of(document):
+    """The url of the first server of the document (with the default values of its variables), or ''"""
+    servers = document.get('servers') or [{}]
+    url = servers[0].get('url', '')
+    for name, variable in (servers[0].get('variables') or {}).items():
+        url = url.replace('{' + name + '}', str(variable.get('default', '')))
+    return url.rstrip('/')
+
+
+def _output_format_of(operation, document):
+    responses = operation.get('responses') or {}
+    for status in sorted(responses):
+        if str(status).startswith('2') or status == 'default':
+            content = _resolved(responses[status], document).get('content') or {}
+            for content_type in content:
+                content_type = content_type.split(';')[0].strip()
+                if content_type in OUTPUT_FORMAT_OF_CONTENT_TYPE:
+                    return OUTPUT_FORMAT_OF_CONTENT_TYPE[content_type]
+                if content_type.endswith('+json'):
+                    return 'json'
+            return None
+    return None
+
+
+def _body_properties_of(operation, document):
+    """The [(property, required), ...] of the JSON object body of the operation"""
+    request_body = _resolved(operation.get('requestBody'), document) or {}
+    for content_type, media_type in (request_body.get('content') or {}).items():
+        content_type = content_type.split(';')[0].strip()
+        if content_type == 'application/json' or content_type.endswith('+json'):
+            schema = _resolved(media_type.get('schema'), document) or {}
+            required = set(schema.get('required', ()))
+            return [(name, name in required) for name in schema.get('properties') or {}]
+    return []
+
+
+class Operation(object):
+    """What a client needs to know of an operation of an OpenAPI document, to make its requests"""
+
+    def __init__(self, name, method, path, path_args, query, body, output_format=None, doc=''):
+        """
+        :param name: The name of the method of the operation
+        :param method: The http method (in upper case)
+        :param path: The path of the operation, whose {fields} are the (python identifier) names of path_args
+        :param path_args: The names of the path parameters
+        :param query: The [(arg_name, query_param, required), ...] of the query parameters
+        :param body: The [(arg_name, property, required), ...] of the properties of the JSON body
+        :param output_format: The output_format of the responses (see i2i.py2request.decoding), or None
+        :param doc: The doc of the method (the summary and description of the operation)
+        """
+        self.name = name
+        self.method = method
+        self.path = path
+        self.path_args = path_args
+        self.query = query
+        self.body = body
+        self.output_format = output_format
+        self.doc = doc
+
+    @property
+    def required_args(self):
+        return (list(self.path_args) + [arg_name for arg_name, _, required in self.query if required]
+                + [arg_name for arg_name, _, required in self.body if required])
+
+    @property
+    def optional_args(self):
+        return ([arg_name for arg_name, _, required in self.query if not required]
+                + [arg_name for arg_name, _, required in self.body if not required])
+
+
+def operations_of_openapi(openapi_spec):
+    """The Operations of the OpenAPI document openapi_spec (see load_openapi_spec)"""
+    document = load_openapi_spec(openapi_spec)
+    operations = []
+    names = set(dir(Py2Request)) | _CLIENT_INSTANCE_NAMES  # (so that methods don't hide the attributes of the client)
+    for path, path_item in (document.get('paths') or {}).items():
+        path_item = _resolved(path_item, document)
+        if not path.startswith('/'):
+            path = '/' + path
+        for method in HTTP_METHODS:
+            operation = path_item.get(method)
+            if operation is None:
+                continue
+            name = _identifier(operation.get('operationId') or method + '_' + re.sub(r'\W+', '_', path).strip('_'))
+            while name in names:
+                name += '_'
+            names.add(name)
+            parameters = {}
+            for parameter in path_item.get('parameters', []) + operation.get('parameters', []):
+                parameter = _resolved(parameter, document)
+                parameters[parameter['name'], parameter.get('in')] = parameter  # (the operation's override the path's)
+            arg_of_field = {field: _identifier(field) for field in _PATH_FIELD.findall(path)}
+            arg_names = set(arg_of_field.values())
+            query = []
+            for (param, location), parameter in parameters.items():
+                if location == 'query':
+                    query.append((_unique_arg_name(param, 'query_', arg_names), param, bool(parameter.get('required'))))
+            body = [(_unique_arg_name(prop, 'body_', arg_names), prop, required)
+                    for prop, required in _body_properties_of(operation, document)]
+            doc = '\n\n'.join(filter(None, [operation.get('summary'), operation.get('description')]))
+            operations.append(Operation(
+                name, method.upper(), _PATH_FIELD.sub(lambda m: '{' + arg_of_field[m.group(1)] + '}', path),
+                list(arg_of_field.values()), query, body, _output_format_of(operation, document), doc))
+    return operations
+
+
+def method_specs_of_openapi(openapi_spec, base_url=None):
+    """
+    The {method_name: method_spec, ...} of the operations of the OpenAPI document openapi_spec (see the module's doc)
+    :param openapi_spec: The OpenAPI document: A dict, a JSON or YAML string, or the path of a file of one
+    :param base_url: The url the paths of the operations are relative to (default: the one of the first server)
+    """
+    document = load_openapi_spec(openapi_spec)
+    if base_url is None:
+        base_url = base_url_of(document)
+    base_url = base_url.replace('{', '{{').replace('}', '}}')
+    method_specs = {}
+    for operation in operations_of_openapi(document):
+        method_spec = {'url_template': base_url + operation.path,
+                       'request_kwargs': {'method': operation.method},
+                       'args': operation.required_args}
+        if operation.query:
+            method_spec['params_arg_names'] = {arg_name: param for arg_name, param, _ in operation.query}
+        if operation.body:
+            if all(arg_name == prop for arg_name, prop, _ in operation.body):
+                method_spec['json_arg_names'] = [arg_name for arg_name, _, _ in operation.body]
+            else:
+                method_spec['json_arg_names'] = {arg_name: prop for arg_name, prop, _ in operation.body}
+        if operation.output_format is not None:
+            method_spec['output_format'] = operation.output_format
+        method_specs[operation.name] = method_spec
+    return method_specs
+
+
+_MODULE_HEAD = '''"""
+A client of {title} (version {version}), written (by i2i.py2request.openapi_client) from its OpenAPI document.
+Don't edit it: Write it again when the document changes.
+"""
+from i2i.py2request.decoding import decoded_body_of, {decoders}
+from i2i.py2request.py2request import Py2Request, send_request
+
+BASE_URL = {base_url!r}
+{written_with}
+
+
+class {class_name}(Py2Request):
+    """{title}"""
+
+    def __init__(self, base_url=BASE_URL, transport=None, single_flight=None):
+        Py2Request.__init__(self, None, transport=transport, single_flight=single_flight)
+        self.base_url = base_url
+'''
+
+
+def _doc_lines(doc, indent):
+    doc = doc.replace('\\', '\\\\').replace('"""', '\\"\\"\\"')
+    lines = doc.splitlines()
+    if len(lines) == 1:
+        return [indent + '"""' + lines[0] + '"""']
+    return [indent + '"""'] + [(indent + line).rstrip() for line in lines] + [indent + '"""']
+
+
+def _method_code(operation):
+    """The code of the method of the operation (of a client class)"""
+    indent = ' ' * 8
+    args = ['self'] + operation.required_args + [arg_name + '=None' for arg_name in operation.optional_args]
+    path = _PATH_FIELD.sub(lambda m: '\0' + m.group(1) + '\1', operation.path)  # (so that the rest can be escaped)
+    path = path.replace('{', '{{').replace('}', '}}').replace('\0', '{').replace('\1', '}')
+    url = 'f' + repr('{self.base_url}' + path)
+    lines = ['    def {}({}):'.format(operation.name, ', '.join(args))]
+    if operation.doc:
+        lines += _doc_lines(operation.doc, indent)
+    lines.append(indent + "_request_kwargs = {{'method': {!r}, 'url': {}}}".format(operation.method, url))
+    for key, items in [('params', operation.query), ('json', operation.body)]:
+        if not items:
+            continue
+        required_items = ', '.join('{!r}: {}'.format(name, arg_name) for arg_name, name, required in items if required)
+        lines.append(indent + '_{} = {{{}}}'.format(key, required_items))
+        for arg_name, name, required in items:
+            if not required:
+                lines += [indent + 'if {} is not None:'.format(arg_name),
+                          indent + '    _{}[{!r}] = {}'.format(key, name, arg_name)]
+        if any(required for _, _, required in items):
+            lines.append(indent + "_request_kwargs[{0!r}] = _{0}".format(key))
+        else:
+            lines += [indent + 'if _{}:'.format(key), indent + "    _request_kwargs[{0!r}] = _{0}".format(key)]
+    lines.append(indent + '_response = send_request(self, **_request_kwargs)')
+    if operation.output_format is None:
+        lines.append(indent + 'return _response')
+    else:
+        lines.append(indent + 'return decoded_body_of(_response, {})'.format(
+            _DECODER_NAME_OF_FORMAT[operation.output_format]))
+    return '\n'.join(lines) + '\n'
+
+
+def _written_with_line(class_name, base_url):
+    """The line of the code of a client module recording the arguments it was written with (see cached_client_module)"""
+    return '_WRITTEN_WITH = {!r}'.format({'class_name': class_name, 'base_url': base_url})
+
+
+def _is_written_with(module_path, class_name, base_url):
+    with open(module_path) as fp:
+        return _written_with_line(class_name, base_url) + '\n' in fp.read()
+
+
+def client_module_code(openapi_spec, class_name=DFLT_CLASS_NAME, base_url=None):
+    """
+    The code of a python module of a client class of the OpenAPI document openapi_spec (see the module's doc)
+    :param openapi_spec: The OpenAPI document: A dict, a JSON or YAML string, or the path of a file of one
+    :param class_name: The name of the client class
+    :param base_url: The default base_url of the client (default: the url of the first server of the document)
+    """
+    document = load_openapi_spec(openapi_spec)
+    operations = operations_of_openapi(document)
+    output_formats = {operation.output_format for operation in operations} - {None}
+    info = document.get('info') or {}
+    code = _MODULE_HEAD.format(
+        title=str(info.get('title', 'an API')).replace('"', "'"), version=info.get('version', '?'),
+        decoders=', '.join(sorted(_DECODER_NAME_OF_FORMAT[output_format] for output_format in output_formats)
+                           or ['loads_json']),
+        base_url=base_url_of(document) if base_url is None else base_url, class_name=class_name,
+        written_with=_written_with_line(class_name, base_url))
+    return '\n'.join([code] + [_method_code(operation) for operation in operations])
+
+
+def write_client_module(openapi_spec, target_path, class_name=DFLT_CLASS_NAME, base_url=None):
+    """
+    Write the python module of a client class of the OpenAPI document openapi_spec (see client_module_code) to the
+    target_path file (replacing it at once, so that it's never imported half written)
+    """
+    code = client_module_code(openapi_spec, class_name, base_url)
+    compile(code, target_path, 'exec')  # (fail before writing anything, if the code isn't valid)
+    temp_path = '{}.{}.tmp'.format(target_path, os.getpid())
+    with open(temp_path, 'w') as fp:
+        fp.write(code)
+    os.replace(temp_path, target_path)
+    try:  # (its bytecode would be used if the module was written again in the same second, with the same size)
+        os.remove(importlib.util.cache_from_source(target_path))
+    except OSError:
+        pass
+    return target_path
+
+
+def cached_client_module(openapi_path, module_path, class_name=DFLT_CLASS_NAME, base_url=None):
+    """
+    The (imported) module of a client class of the OpenAPI document of the openapi_path file, written to module_path
+    if it wasn't already, or if the document changed since, or if it was written with another class_name or base_url
+    (see write_client_module)
+    """
+    if (not os.path.isfile(module_path) or os.path.getmtime(module_path) <= os.path.getmtime(openapi_path)
+            or not _is_written_with(module_path, class_name, base_url)):
+        write_client_module(openapi_path, module_path, class_name, base_url)
+    module_name = os.path.splitext(os.path.basename(module_path))[0]
+    module_spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(module)
+    return module
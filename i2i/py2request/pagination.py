@@ -0,0 +1,409 @@
+"""
+Pagination: Methods of paged APIs that are lazy iterators of all the items of all the pages.
+
+A method_spec declares that its API is paged with a 'paginate' key, whose value is a style, a dict of the keyword
+arguments of a Pagination, or a Pagination. The style says how the next page is requested:
+    * 'offset': With an offset (query) parameter, incremented by the number of items of every page
+    * 'page': With a page number parameter, incremented by one
+    * 'cursor': With a cursor parameter, whose value is the next_cursor of the (JSON) body of the previous page
+    * 'link': With the 'next' url of the Link header of the previous page
+
+The items of a page are taken from its JSON body (or its body decoded with the output_format of the method, see
+i2i.py2request.decoding), with items (a 'key.path', or a function of the body, by default
+the body itself), and the output_trans of the method (if any) is applied to every item.
+A page_size hint can be sent (as the limit_param parameter), and a page with fewer items (or none) is the last.
+
+The method then returns a PaginatedItems (or AsyncPaginatedItems) iterator of all the items. The next pages are
+fetched in the background (prefetch pages ahead) while the items of the current one are consumed, so that the
+consumer doesn't wait a round-trip per page. Every page of an instrumented method is recorded (see
+i2i.py2request.instrumentation).
+
+>>> pagination = Pagination('cursor', items='data', next_cursor='meta.next', page_size=2)
+>>> pagination.first_request_kwargs({'url': 'http://host/users'})
+{'url': 'http://host/users', 'params': {'limit': 2}}
+>>> body = {'data': [{'name': 'a'}, {'name': 'b'}], 'meta': {'next': 'xyz'}}
+>>> pagination.items_of(body)
+[{'name': 'a'}, {'name': 'b'}]
+>>> pagination.next_request_kwargs({'url': 'http://host/users', 'params': {'limit': 2}}, None, body, 2)
+{'url': 'http://host/users', 'params': {'limit': 2, 'cursor': 'xyz'}}
+"""
+import asyncio
+import inspect
+import queue
+import threading
+import weakref
+from functools import partial
+from time import perf_counter
+from urllib.parse import urljoin
+
+from i2i.py2request.decoding import abody_of, decoded_body_of
+from i2i.py2request.instrumentation import _ameasured_send, _measured_send
+
+PAGINATION_STYLES = ('offset', 'page', 'cursor', 'link')
+DFLT_PREFETCH = 1
+DFLT_STOP_CHECK_INTERVAL = 0.1  # how often (in seconds) a thread waiting for room for a page checks if it should stop
+
+
+def _getter_of(path):
+    """The function getting the value of a 'key.path' (or integer index) of a JSON body (None: the body itself)"""
+    if path is None:
+        return lambda body: body
+    if callable(path):
+        return path
+    keys = [int(key) if key.isdigit() else key for key in str(path).split('.')]
+
+    def get(body):
+        for key in keys:
+            if body is None:
+                return None
+            body = body[key] if isinstance(key, int) else body.get(key)
+        return body
+
+    return get
+
+
+class Pagination(object):
+    """How the pages of a paged API are requested, and how their items are found (see the module's doc)"""
+
+    def __init__(self, style='offset', items=None, page_size=None, prefetch=DFLT_PREFETCH,
+                 offset_param='offset', limit_param='limit', page_param='page', first_page=1,
+                 cursor_param='cursor', next_cursor='next_cursor', max_pages=None):
+        """
+        :param style: How the next page is requested: 'offset', 'page', 'cursor' or 'link'
+        :param items: Where the items are in the JSON body of a page: A 'key.path', or a function of the body
+        :param page_size: The number of items per page to ask for (as the limit_param parameter), if not None
+        :param prefetch: The number of pages fetched ahead, in the background (0: pages are fetched when needed)
+        :param offset_param: The parameter of the offset of the first item of a page (offset style)
+        :param limit_param: The parameter of the page size (None: the page size isn't sent)
+        :param page_param: The parameter of the page number (page style)
+        :param first_page: The number of the first page (page style)
+        :param cursor_param: The parameter of the cursor (cursor style)
+        :param next_cursor: Where the cursor of the next page is in the JSON body of a page: A 'key.path', or a
+            function of the body (cursor style)
+        :param max_pages: The maximum number of pages to fetch (None: all)
+        """
+        if style not in PAGINATION_STYLES:
+            raise ValueError("The style of pagination should be one of {}, was {!r}".format(PAGINATION_STYLES, style))
+        self.style = style
+        self.items_of = _getter_of(items)
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.offset_param = offset_param
+        self.limit_param = limit_param
+        self.page_param = page_param
+        self.first_page = first_page
+        self.cursor_param = cursor_param
+        self.next_cursor_of = _getter_of(next_cursor)
+        self.max_pages = max_pages
+
+    def first_request_kwargs(self, request_kwargs):
+        """The request_kwargs of the first page, from those of the method call"""
+        params = dict(request_kwargs.get('params') or {})
+        if self.page_size is not None and self.limit_param is not None:
+            params[self.limit_param] = self.page_size
+        if self.style == 'offset':
+            params.setdefault(self.offset_param, 0)
+        elif self.style == 'page':
+            params.setdefault(self.page_param, self.first_page)
+        return dict(request_kwargs, params=params)
+
+    def next_request_kwargs(self, request_kwargs, response, body, n_items):
+        """The request_kwargs of the page after the one requested with request_kwargs, or None if it was the last"""
+        if self.style in ('offset', 'page'):
+            if n_items == 0 or (self.page_size is not None and n_items < self.page_size):
+                return None
+            params = dict(request_kwargs['params'])
+            if self.style == 'offset':
+                params[self.offset_param] = int(params[self.offset_param]) + n_items
+            else:
+                params[self.page_param] = int(params[self.page_param]) + 1
+            return dict(request_kwargs, params=params)
+        elif self.style == 'cursor':
+            cursor = self.next_cursor_of(body)
+            if cursor is None or cursor == '' or n_items == 0:
+                return None
+            return dict(request_kwargs, params=dict(request_kwargs.get('params') or {}, **{self.cursor_param: cursor}))
+        else:
+            next_link = response.links.get('next')
+            if next_link is None:
+                return None
+            request_kwargs = dict(request_kwargs, url=urljoin(request_kwargs['url'], str(next_link['url'])))
+            request_kwargs.pop('params', None)  # the next url has them
+            return request_kwargs
+
+
+def pagination_of(paginate_spec):
+    """The Pagination of the 'paginate' value of a method_spec, or None if it's falsy"""
+    if not paginate_spec:
+        return None
+    if isinstance(paginate_spec, Pagination):
+        return paginate_spec
+    if isinstance(paginate_spec, str):
+        return Pagination(paginate_spec)
+    return Pagination(**paginate_spec)
+
+
+def _page_of(send, request_kwargs, decode):
+    response = send(**request_kwargs)
+    response.raise_for_status()
+    return response, response.json() if decode is None else decoded_body_of(response, decode)
+
+
+def _measured_page_of(method_stats, send, request_kwargs, decode):
+    """The response and (decoded) body of a page, whose measurements are recorded with method_stats.record_page"""
+    measurements = {}
+    tic = perf_counter()
+    try:
+        response = _measured_send(send, measurements, **request_kwargs)
+        response.raise_for_status()
+        received = perf_counter()
+        body = response.json() if decode is None else decoded_body_of(response, decode)
+        measurements['decode'] = perf_counter() - received
+        return response, body
+    except Exception as error:
+        measurements['error'] = error
+        raise
+    finally:
+        measurements['page'] = perf_counter() - tic
+        method_stats.record_page(measurements)
+
+
+def _items_of_pages(send, request_kwargs, pagination, output_trans, decode, method_stats=None):
+    """Generate the (lists of output_trans of) items of the pages, requesting them one after the other"""
+    page_of = _page_of if method_stats is None else partial(_measured_page_of, method_stats)
+    request_kwargs = pagination.first_request_kwargs(request_kwargs)
+    n_pages = 0
+    while request_kwargs is not None and (pagination.max_pages is None or n_pages < pagination.max_pages):
+        response, body = page_of(send, request_kwargs, decode)
+        items = pagination.items_of(body) or []
+        n_pages += 1
+        request_kwargs = pagination.next_request_kwargs(request_kwargs, response, body, len(items))
+        yield items if output_trans is None else list(map(output_trans, items))
+
+
+class _Raised(object):
+    def __init__(self, exception):
+        self.exception = exception
+
+
+_DONE = object()
+
+
+def _put_unless_stopped(page_queue, items, stop):
+    """Put items in page_queue, waiting for room in it unless (and until) stop is set. Return whether it was put."""
+    while not stop.is_set():
+        try:
+            page_queue.put(items, timeout=DFLT_STOP_CHECK_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _fetch_pages(pages, page_queue, stop):
+    """
+    Put the (lists of items of the) pages in page_queue, until they're exhausted, or stop is set.
+    (A function, not a method, so that the thread running it doesn't keep its PaginatedItems alive.)
+    """
+    try:
+        for items in pages:
+            if not _put_unless_stopped(page_queue, items, stop):
+                return
+        _put_unless_stopped(page_queue, _DONE, stop)
+    except BaseException as exception:
+        _put_unless_stopped(page_queue, _Raised(exception), stop)
+    finally:
+        pages.close()
+
+
+class PaginatedItems(object):
+    """
+    A lazy iterator of all the items of all the pages of a request, whose next pages are fetched in a background
+    thread (up to prefetch pages ahead), started on the first iteration. Close it (or use it as a context manager) to
+    stop before the end: An iterator that's abandoned without being closed stops its thread when it's collected.
+    """
+
+    def __init__(self, send, request_kwargs, pagination, output_trans=None, decode=None, method_stats=None):
+        """
+        :param send: The function making a request: send(**request_kwargs) should return the response
+        :param request_kwargs: The arguments of the request of the first page (without the pagination parameters)
+        :param pagination: The Pagination
+        :param output_trans: The function applied to every item (None: the items themselves)
+        :param decode: The function decoding the body (bytes) of pages (None: their json method)
+        :param method_stats: The MethodStats recording every page (None: pages aren't recorded)
+        """
+        self.n_pages = 0
+        self._pages = _items_of_pages(send, request_kwargs, pagination, output_trans, decode, method_stats)
+        self._prefetch = pagination.prefetch
+        self._items = iter(())
+        self._stop = threading.Event()
+        self._queue = None
+        self._thread = None
+
+    def _start_fetching(self):
+        self._queue = queue.Queue(maxsize=self._prefetch)
+        self._thread = threading.Thread(target=_fetch_pages, args=(self._pages, self._queue, self._stop),
+                                        name='fetch_pages', daemon=True)
+        self._pages = iter(())  # (they're the thread's now)
+        weakref.finalize(self, self._stop.set)
+        self._thread.start()
+
+    def _next_page(self):
+        if not self._prefetch:
+            return next(self._pages, _DONE)
+        if self._thread is None:
+            self._start_fetching()
+        items = self._queue.get()
+        if items is _DONE or isinstance(items, _Raised):
+            self._prefetch = 0  # the thread is done: the next iterations end right away
+        if isinstance(items, _Raised):
+            raise items.exception
+        return items
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            for item in self._items:
+                return item
+            items = self._next_page()
+            if items is _DONE:
+                raise StopIteration
+            self.n_pages += 1
+            self._items = iter(items)
+
+    def close(self):
+        """Stop fetching pages"""
+        self._stop.set()
+        if self._thread is None:
+            self._pages.close()
+        self._prefetch = 0
+        self._pages = self._items = iter(())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+async def _awaited(obj):
+    if inspect.isawaitable(obj):
+        return await obj
+    return obj
+
+
+async def _apage_of(send, request_kwargs, decode):
+    response = await send(**request_kwargs)
+    response.raise_for_status()
+    if decode is None:
+        return response, await response.json(content_type=None)
+    return response, decode(await abody_of(response))
+
+
+async def _ameasured_page_of(method_stats, send, request_kwargs, decode):
+    """The async counterpart of _measured_page_of"""
+    measurements = {}
+    tic = perf_counter()
+    try:
+        response = await _ameasured_send(send, measurements, **request_kwargs)
+        response.raise_for_status()
+        received = perf_counter()
+        body = await response.json(content_type=None) if decode is None else decode(await abody_of(response))
+        measurements['decode'] = perf_counter() - received
+        return response, body
+    except Exception as error:
+        measurements['error'] = error
+        raise
+    finally:
+        measurements['page'] = perf_counter() - tic
+        method_stats.record_page(measurements)
+
+
+async def _aitems_of_pages(send, request_kwargs, pagination, output_trans, decode, method_stats=None):
+    """The async counterpart of _items_of_pages: send is a coroutine function, returning an aiohttp response"""
+    page_of = _apage_of if method_stats is None else partial(_ameasured_page_of, method_stats)
+    request_kwargs = pagination.first_request_kwargs(request_kwargs)
+    n_pages = 0
+    while request_kwargs is not None and (pagination.max_pages is None or n_pages < pagination.max_pages):
+        response, body = await page_of(send, request_kwargs, decode)
+        items = pagination.items_of(body) or []
+        n_pages += 1
+        request_kwargs = pagination.next_request_kwargs(request_kwargs, response, body, len(items))
+        if output_trans is not None:
+            items = [await _awaited(output_trans(item)) for item in items]
+        yield items
+
+
+class AsyncPaginatedItems(object):
+    """
+    The async counterpart of PaginatedItems: An async iterator of all the items of all the pages of a request, whose
+    next pages are fetched in a background task (up to prefetch pages ahead).
+    """
+
+    def __init__(self, send, request_kwargs, pagination, output_trans=None, decode=None, method_stats=None):
+        self.n_pages = 0
+        self._pages = _aitems_of_pages(send, request_kwargs, pagination, output_trans, decode, method_stats)
+        self._prefetch = pagination.prefetch
+        self._items = iter(())
+        self._queue = None
+        self._task = None
+
+    async def _fetch_pages(self):
+        try:
+            async for items in self._pages:
+                await self._queue.put(items)
+            await self._queue.put(_DONE)
+        except Exception as exception:
+            await self._queue.put(_Raised(exception))
+        finally:
+            await self._pages.aclose()
+
+    async def _next_page(self):
+        if not self._prefetch:
+            try:
+                return await self._pages.__anext__()
+            except StopAsyncIteration:
+                return _DONE
+        if self._task is None:  # the task is started on the first iteration, in the loop the iteration is made in
+            self._queue = asyncio.Queue(maxsize=self._prefetch)
+            self._task = asyncio.ensure_future(self._fetch_pages())
+        items = await self._queue.get()
+        if items is _DONE or isinstance(items, _Raised):
+            self._prefetch = 0  # the pages (async generator) are exhausted: the next iterations end right away
+        if isinstance(items, _Raised):
+            raise items.exception
+        return items
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            for item in self._items:
+                return item
+            items = await self._next_page()
+            if items is _DONE:
+                raise StopAsyncIteration
+            self.n_pages += 1
+            self._items = iter(items)
+
+    async def aclose(self):
+        """Stop fetching pages"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task  # (so that the pages are closed by the time aclose returns)
+            except asyncio.CancelledError:
+                pass
+        else:
+            await self._pages.aclose()
+        self._prefetch = 0
+        self._items = iter(())
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
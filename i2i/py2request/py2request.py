@@ -17,10 +17,24 @@ Are you enjoying yourself?
 
 There must be a better way...
 """
-from functools import wraps
-from requests import request
+from functools import partial, wraps
+from itertools import chain
+from time import perf_counter
 import string
-from i2i.util import inject_method, imdict
+import threading
+import types
+import weakref
+from i2i.util import inject_method, imdict, function_type
+from i2i.py2request.transport import HttpTransport, transport_of
+from i2i.py2request.compression import body_compressor_of
+from i2i.py2request.decoding import decoded_output_trans, decoder_of
+from i2i.py2request.fan_out import mappable_method
+from i2i.py2request.instrumentation import instrumentation_of, measured_request, method_stats_of
+from i2i.py2request.pagination import PaginatedItems, pagination_of
+from i2i.py2request.rate_limit import token_bucket_of
+from i2i.py2request.response_cache import response_cache_of
+from i2i.py2request.single_flight import single_flight_of
+from i2i.py2request.streaming import ResponseStream, stream_options_of
 from i2.signatures import set_signature_of_func
 
 from warnings import warn
@@ -59,83 +73,115 @@ def _ensure_list(x):
     return x
 
 
-def mk_request_function(method_spec):
+def _name_of_arg(arg_names):
     """
-    Makes function that will make http requests for you, on your own terms.
-
-    Specify what API you want to talk to, and how you want to talk to it (and it talk back to you), and
-    get a function that does exactly that.
-
-    Essentially, this factory function allows you to take an API specification, specify how you want it to
-    relate to python objects (how to convert input arguments to API elements, and how to convert the response of
-    the request, for instance), and get a method that is ready to be used.
-
-    :param method_spec: Specification of how to convert arguments of the function that is being made to an http request.
-    :return: A function.
-        Note: I say "function", but the function is meant to be a method, so the function has a self as first argument.
-        That argument is ignored.
-
+    The (arg_name, name) pairs of the params_arg_names or json_arg_names of a method_spec: A list of names (that are
+    the names of the query parameters, or json keys, too), or an {arg_name: name} dict
     """
-    # defaults
-    method_spec = method_spec.copy()
-    method_spec['request_kwargs'] = method_spec.get('request_kwargs', {})
-    method_spec['request_kwargs']['method'] = method_spec['request_kwargs'].get('method', 'GET')
-    arg_order = _ensure_list(method_spec.get('args', []))
+    if isinstance(arg_names, dict):
+        return tuple(arg_names.items())
+    return tuple((arg_name, arg_name) for arg_name in _ensure_list(arg_names))
 
-    # TODO: inject a signature, and possibly a __doc__ in this function
-    def request_func(self, *args, **kwargs):
 
-        # absorb args in kwargs
-        if len(args) > len(arg_order):
-            raise ValueError(
-                f"The number ({len(args)}) of unnamed arguments was greater than "
-                f"the number ({len(arg_order)}of specified arguments in arg_order")
-
-        kwargs = dict(kwargs, **{argname: argval for argname, argval in zip(arg_order, args)})
-
-        # convert argument types TODO: Not efficient. Might could be revised.
-        for arg_name, converter in method_spec.get('input_trans', {}).items():
+def compile_method_spec(method_spec):
+    """
+    Compile a method_spec into a function that makes the request_kwargs of a call, from its args and kwargs.
+
+    Everything that doesn't depend on the call (defaults, the order of args, the input_trans items, the json arg
+    names, the url or the bound format method of the url_template...) is resolved here, once, so that the compiled
+    function only does what the call needs. Each call gets its own, new, request_kwargs dict, so compiled functions
+    can be used from many threads.
+
+    >>> request_kwargs_of = compile_method_spec({
+    ...     'url_template': 'http://host/{user}/items?limit={limit}',
+    ...     'args': ['user'],
+    ...     'input_trans': {'limit': int},
+    ...     'json_arg_names': ['item'],
+    ...     'params_arg_names': {'sort_by': 'sort-by'},  # (query parameters, sent if they're given)
+    ... })
+    >>> request_kwargs_of(('bob',), {'limit': '3', 'item': {'a': 1}})
+    {'method': 'GET', 'url': 'http://host/bob/items?limit=3', 'json': {'item': {'a': 1}}}
+    >>> request_kwargs_of(('bob',), {'limit': '3', 'sort_by': 'date'})['params']
+    {'sort-by': 'date'}
+
+    :param method_spec: The method spec (see mk_request_function)
+    :return: A request_kwargs_of(args, kwargs, measurements=None) function. Note that it may modify the kwargs dict
+        it's given (it's meant to be given the fresh kwargs dict of a call). If it's given a measurements dict, it
+        writes the time (in seconds) the input_trans (and binding of args), and the url formatting (and json body)
+        took in it (see i2i.py2request.instrumentation).
+    """
+    base_request_kwargs = dict(method_spec.get('request_kwargs', {}))
+    base_request_kwargs['method'] = base_request_kwargs.get('method', 'GET')
+    if method_spec.get('stream', None):
+        base_request_kwargs['stream'] = True
+    url_template = method_spec.get('url_template', None)
+    if url_template is None and 'url' in method_spec:
+        base_request_kwargs['url'] = method_spec['url']
+    format_url = url_template.format if url_template is not None else None
+    arg_order = tuple(_ensure_list(method_spec.get('args', [])))
+    n_args = len(arg_order)
+    input_trans = tuple(method_spec.get('input_trans', {}).items())
+    key_of_arg = _name_of_arg(method_spec.get('json_arg_names', ()))
+    param_of_arg = _name_of_arg(method_spec.get('params_arg_names', ()))
+
+    def request_kwargs_of(args, kwargs, measurements=None):
+        if measurements is not None:
+            tic = perf_counter()
+        if args:
+            if len(args) > n_args:
+                raise ValueError(
+                    f"The number ({len(args)}) of unnamed arguments was greater than "
+                    f"the number ({n_args}) of specified arguments in arg_order")
+            kwargs.update(zip(arg_order, args))
+        for arg_name, converter in input_trans:
             if arg_name in kwargs:
                 kwargs[arg_name] = converter(kwargs[arg_name])
-
-        json_data = {}
-        for arg_name in method_spec.get('json_arg_names', []):
-            if arg_name in kwargs:
-                json_data[arg_name] = kwargs.pop(arg_name)
-
-        # making the request_kwargs ####################################################################################
-        request_kwargs = method_spec['request_kwargs']
-        if 'url_template' in method_spec:
-            request_kwargs['url'] = method_spec['url_template'].format(**kwargs)
-        elif 'url' in method_spec:
-            request_kwargs['url'] = method_spec['url']
-
+        if measurements is not None:
+            toc = perf_counter()
+            measurements['input_trans'] = toc - tic
+        json_data = None
+        if key_of_arg:
+            json_data = {key: kwargs.pop(arg_name) for arg_name, key in key_of_arg if arg_name in kwargs}
+        params = None
+        if param_of_arg:
+            params = {param: kwargs.pop(arg_name) for arg_name, param in param_of_arg if arg_name in kwargs}
+        request_kwargs = base_request_kwargs.copy()
+        if format_url is not None:
+            request_kwargs['url'] = format_url(**kwargs)
         if json_data:
             request_kwargs['json'] = json_data
+        if params:
+            request_kwargs['params'] = params
+        if measurements is not None:
+            measurements['url_format'] = perf_counter() - toc
+        return request_kwargs
 
-        if 'debug' in method_spec:
-            debug = method_spec['debug']
-            if debug == 'print_request_kwargs':
-                print(request_kwargs)
-            elif debug == 'return_request_kwargs':
-                return request_kwargs
+    return request_kwargs_of
 
-        r = request(**request_kwargs)
-        if 'output_trans' in method_spec:
-            r = method_spec['output_trans'](r)
-        return r
 
+def _set_signature(request_func, method_spec):
     if 'wraps' in method_spec:
         return wraps(method_spec['wraps'])(request_func)
-    else:
-        all_args = method_spec.get('args', []) + method_spec.get('json_arg_names', [])
-        if all_args:
-            set_signature_of_func(request_func, ['self'] + all_args)
-
+    args = list(_ensure_list(method_spec.get('args', [])))
+    all_args = args + [arg_name for arg_name in chain(
+        (arg_name for arg_name, _ in _name_of_arg(method_spec.get('params_arg_names', ()))),
+        (arg_name for arg_name, _ in _name_of_arg(method_spec.get('json_arg_names', ())))) if arg_name not in args]
+    if all_args:
+        set_signature_of_func(request_func, ['self'] + all_args)
     return request_func
 
 
-def mk_request_method(method_spec):
+RESPONSE_OPTIONS = ('cache', 'stream', 'paginate')
+
+
+def check_response_options(method_spec):
+    """Check that a method_spec has at most one of the (exclusive) options of what's done with the response"""
+    options = [option for option in RESPONSE_OPTIONS if method_spec.get(option, None)]
+    if len(options) > 1:
+        raise ValueError("A method_spec can't have both {} and {}".format(*options[:2]))
+
+
+def mk_request_function(method_spec):
     """
     Makes function that will make http requests for you, on your own terms.
 
@@ -146,69 +192,113 @@ def mk_request_method(method_spec):
     relate to python objects (how to convert input arguments to API elements, and how to convert the response of
     the request, for instance), and get a method that is ready to be used.
 
+    The method_spec is compiled (see compile_method_spec) when the function is made, so the function doesn't
+    interpret it on every call, and can be called from many threads.
+
+    The args in the json_arg_names of the method_spec (a list, or an {arg_name: json_key} dict) are sent in the json
+    body of the request, and the ones in its params_arg_names (a list, or an {arg_name: query_param} dict) as query
+    parameters: Both only if they're given.
+
     :param method_spec: Specification of how to convert arguments of the function that is being made to an http request.
     :return: A function.
         Note: I say "function", but the function is meant to be a method, so the function has a self as first argument.
-        That argument is ignored.
+        That argument is only used to get the transport the request is made with (see transport_of).
 
     """
-    # defaults
-    method_spec = method_spec.copy()
-    method_spec['request_kwargs'] = method_spec.get('request_kwargs', {})
-    method_spec['request_kwargs']['method'] = method_spec['request_kwargs'].get('method', 'GET')
-    arg_order = _ensure_list(method_spec.get('args', []))
+    request_kwargs_of = compile_method_spec(method_spec)
+    output_trans = method_spec.get('output_trans', None)
+    debug = method_spec.get('debug', None)
+    check_response_options(method_spec)
+    cache = response_cache_of(method_spec.get('cache', None))
+    stream_options = stream_options_of(method_spec.get('stream', None))
+    pagination = pagination_of(method_spec.get('paginate', None))
+    decode = decoder_of(method_spec.get('output_format', None))
+    if decode is not None and stream_options is not None:
+        raise ValueError("A method_spec can't have both a stream and an output_format (the stream has a kind)")
+    response_trans = output_trans if decode is None else decoded_output_trans(decode, output_trans)
+    decode_response = None if decode is None else decoded_output_trans(decode)
+    rate_limit = token_bucket_of(method_spec.get('rate_limit', None))
+    send = _request if rate_limit is None else partial(_rate_limited_request, rate_limit)
+    compressor = body_compressor_of(method_spec.get('compress', None))
+    if compressor is not None:
+        send = partial(_compressed_request, compressor, send)
+    request = partial(_coalesced_request, send)
+    method_stats = method_stats_of(method_spec.get('instrument', None))
+
+    if debug == DebugOptions.return_request_kwargs:
+        def request_func(self, *args, **kwargs):
+            return request_kwargs_of(args, kwargs)
+    elif debug == DebugOptions.print_request_kwargs:
+        def request_func(self, *args, **kwargs):
+            request_kwargs = request_kwargs_of(args, kwargs)
+            print(request_kwargs)
+            r = request(self, **request_kwargs)
+            return r if response_trans is None else response_trans(r)
+    elif method_stats is not None:
+        stream = None if stream_options is None else partial(ResponseStream, **stream_options)
+        paginate = None if pagination is None else partial(
+            PaginatedItems, pagination=pagination, output_trans=output_trans, decode=decode, method_stats=method_stats)
+
+        def request_func(self, *args, **kwargs):
+            return measured_request(method_stats, request_kwargs_of, partial(request, self), output_trans,
+                                    args, kwargs, decode, cache, stream, paginate)
+    elif pagination is not None:
+        def request_func(self, *args, **kwargs):
+            return PaginatedItems(partial(request, self), request_kwargs_of(args, kwargs), pagination, output_trans,
+                                  decode)
+    elif stream_options is not None:
+        def request_func(self, *args, **kwargs):
+            response = request(self, **request_kwargs_of(args, kwargs))
+            r = ResponseStream(response, **stream_options)
+            return r if output_trans is None else output_trans(r)
+    elif cache is not None:
+        def request_func(self, *args, **kwargs):
+            return cache.request(partial(request, self), request_kwargs_of(args, kwargs), output_trans,
+                                 decode=decode_response)
+    elif response_trans is None:
+        def request_func(self, *args, **kwargs):
+            return request(self, **request_kwargs_of(args, kwargs))
+    else:
+        def request_func(self, *args, **kwargs):
+            return response_trans(request(self, **request_kwargs_of(args, kwargs)))
 
-    # TODO: inject a signature, and possibly a __doc__ in this function
-    def request_method(self, *args, **kwargs):
+    request_func.cache = cache
+    request_func.rate_limit = rate_limit
+    request_func.compressor = compressor
+    request_func.stats = method_stats
+    return _set_signature(request_func, method_spec)
 
-        # absorb args in kwargs
-        if len(args) > len(arg_order):
-            raise ValueError(
-                f"The number ({len(args)}) of unnamed arguments was greater than "
-                f"the number ({len(arg_order)}of specified arguments in arg_order")
 
-        kwargs = dict(kwargs, **{argname: argval for argname, argval in zip(arg_order, args)})
+def _request(obj, **request_kwargs):
+    """Make a request with the transport of obj"""
+    return transport_of(obj).request(**request_kwargs)
 
-        # convert argument types TODO: Not efficient. Might could be revised.
-        for arg_name, converter in method_spec.get('input_trans', {}).items():
-            if arg_name in kwargs:
-                kwargs[arg_name] = converter(kwargs[arg_name])
 
-        json_data = {}
-        for arg_name in method_spec.get('json_arg_names', []):
-            if arg_name in kwargs:
-                json_data[arg_name] = kwargs.pop(arg_name)
+def _rate_limited_request(rate_limit, obj, **request_kwargs):
+    """Make a request with the transport of obj, once rate_limit allows it"""
+    rate_limit.acquire()
+    return transport_of(obj).request(**request_kwargs)
 
-        # making the request_kwargs ####################################################################################
-        request_kwargs = method_spec['request_kwargs']
-        if 'url_template' in method_spec:
-            request_kwargs['url'] = method_spec['url_template'].format(**kwargs)
-        elif 'url' in method_spec:
-            request_kwargs['url'] = method_spec['url']
 
-        if json_data:
-            request_kwargs['json'] = json_data
+def _compressed_request(compressor, send, obj, **request_kwargs):
+    """Make a request with send(obj, **request_kwargs), with a body compressed by compressor (if it pays off)"""
+    return send(obj, **compressor.compressed(request_kwargs))
 
-        if 'debug' in method_spec:
-            debug = method_spec['debug']
-            if debug == 'print_request_kwargs':
-                print(request_kwargs)
-            elif debug == 'return_request_kwargs':
-                return request_kwargs
 
-        r = request(**request_kwargs)
-        if 'output_trans' in method_spec:
-            r = method_spec['output_trans'](r)
-        return r
+def _coalesced_request(send, obj, **request_kwargs):
+    """Make a request with send(obj, **request_kwargs), coalesced by the single_flight of obj, if it has one"""
+    single_flight = getattr(obj, 'single_flight', None)
+    if single_flight is None:
+        return send(obj, **request_kwargs)
+    return single_flight.request(partial(send, obj), request_kwargs)
 
-    if 'wraps' in method_spec:
-        wraps(method_spec['wraps'])(request_method)
-    else:
-        all_args = method_spec.get('args', []) + method_spec.get('json_arg_names', [])
-        if all_args:
-            set_signature_of_func(request_method, ['self'] + all_args)
 
-    return request_method
+def send_request(obj, **request_kwargs):
+    """Make a request as (plain) methods of obj do: With its transport, coalesced by its single_flight (if any)"""
+    return _coalesced_request(_request, obj, **request_kwargs)
+
+
+mk_request_method = mk_request_function  # they used to be two copies of the same code
 
 
 DFLT_METHOD_FUNC_FROM_METHOD_SPEC = mk_request_function
@@ -216,11 +306,91 @@ DFLT_METHOD_FUNC_FROM_METHOD_SPEC = mk_request_function
 str_formatter = string.Formatter()
 
 
+def add_url_template_args(method_specs):
+    """Add the fields of the url_template of method specs as their args (for those that don't specify args)"""
+    for method_name, method_spec in method_specs.items():
+        if 'args' not in method_spec and 'url_template' in method_spec:
+            method_spec['args'] = list(filter(bool,
+                                              (x[1] for x in str_formatter.parse(method_spec['url_template']))))
+
+
+_compile_lock = threading.RLock()
+
+
+class LazyMethod(object):
+    """
+    A method of the classes made by Py2Request.class_of_specs: Its function is made from its method_spec the first
+    time the method of an instance is asked for (and then shared by all instances), and is bound to instances like
+    the functions of a class are, so that instances don't keep anything per method.
+    The instances of a same Instrumentation get a function of their own (made with the MethodStats of the method).
+    The method has no map method (that would be made for every instance): Use the one of the class instead,
+    Api.method.map(api, iterable, ...) (see MappableMethod.map).
+    """
+
+    def __init__(self, method_name, method_spec, method_func_from_method_spec):
+        self.method_name = method_name
+        self.method_spec = method_spec
+        self.method_func_from_method_spec = method_func_from_method_spec
+        self._func = None
+        self._func_of_instrumentation = weakref.WeakKeyDictionary()
+
+    @property
+    def func(self):
+        """The function of the method (made the first time it's asked for)"""
+        if self._func is None:
+            with _compile_lock:
+                if self._func is None:
+                    self._func = self._func_of(self.method_spec)
+        return self._func
+
+    def _func_of(self, method_spec):
+        if callable(method_spec):
+            return method_spec
+        return self.method_func_from_method_spec(method_spec)
+
+    def func_of(self, obj):
+        """The function of the method of obj: The shared one, or the one of the instrumentation of obj"""
+        instrumentation = obj.instrumentation
+        if instrumentation is None:
+            return self.func
+        func = self._func_of_instrumentation.get(instrumentation)
+        if func is None:
+            method_spec = obj._instrumented(self.method_name, self.method_spec)
+            if method_spec is self.method_spec:  # (the method_spec says how it's instrumented)
+                return self.func
+            with _compile_lock:
+                func = self._func_of_instrumentation.get(instrumentation)
+                if func is None:
+                    func = self._func_of_instrumentation[instrumentation] = self._func_of(method_spec)
+        return func
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return types.MethodType(self.func_of(obj), obj)
+
+    def map(self, obj, iterable, *args, **kwargs):
+        """Call the method of obj on all the items of iterable, concurrently (see MappableMethod.map)"""
+        return mappable_method(self.func_of(obj), obj).map(iterable, *args, **kwargs)
+
+    def __repr__(self):
+        return '<lazy method {}>'.format(self.method_name)
+
+
+# the classes made by class_of_specs, as long as they're used (a class keeps its method_specs, whose id is in its key)
+_class_of_specs = weakref.WeakValueDictionary()
+
+
 class Py2Request(object):
     """ Make a class that has methods that offer a python interface to web requests """
 
+    _dflt_method_func_from_method_spec = staticmethod(DFLT_METHOD_FUNC_FROM_METHOD_SPEC)
+
     def __init__(self, method_specs=None,
-                 method_func_from_method_spec=DFLT_METHOD_FUNC_FROM_METHOD_SPEC):
+                 method_func_from_method_spec=DFLT_METHOD_FUNC_FROM_METHOD_SPEC,
+                 transport=None,
+                 single_flight=None,
+                 instrument=None):
         """
         Initialize the object with web request calling methods.
         You can also just make an empty Py2Request object, and inject methods later on, one by one.
@@ -231,6 +401,13 @@ class Py2Request(object):
             Notice that there's no restriction on method_specs, but by default (becauise
         :param method_func_from_method_spec: The function that makes an actual method (function, which will be bounded)
             from the method_specs
+        :param transport: The transport that makes the requests of the methods (see i2i.py2request.transport).
+            By default, the object gets its own HttpTransport, which keeps its connections alive between requests.
+            Give a transport (an HttpTransport with other pool settings, for example) to share it between objects.
+        :param single_flight: To coalesce identical concurrent requests of the methods into one: True, a dict of
+            SingleFlight kwargs, or a SingleFlight (see i2i.py2request.single_flight). By default, they're not.
+        :param instrument: To measure the calls of the methods: True, or an Instrumentation (to share it, or give
+            it hooks), which is then the instrumentation attribute of the object (see i2i.py2request.instrumentation).
 
         Notice that there's no restriction on the method_spec (singular) values of the method_specs dict.
         Indeed, it could be any object that is understood by the method_func_from_method_spec function, that
@@ -241,8 +418,6 @@ class Py2Request(object):
         >>> # Defining the functions we'll use
         >>> def print_content(r):
         ...     print(r.text)
-        >>> def dict_of_json(r):
-        ...     return json.loads(r.content)
         >>> tokenizer = re.compile('\w+').findall
         >>> # Defining the specs
         >>> method_specs = {
@@ -262,7 +437,7 @@ class Py2Request(object):
         ...     },
         ...     'my_ip': {
         ...         'url_template': 'https://api.ipify.org?format=json',
-        ...         'output_trans': dict_of_json
+        ...         'output_format': 'json'  # the output is the (decoded) json of the response
         ...     },
         ...     'print_ip_location': {
         ...         'url_template': 'http://ip-api.com/#{ip_address}',
@@ -276,8 +451,12 @@ class Py2Request(object):
         >>> # And I'll let the reader try the other requests, whose results are not stable enough to test like this
 
         """
-        self._method_specs = method_specs
+        self._method_specs = {} if method_specs is None else method_specs
         self._dflt_method_func_from_method_spec = method_func_from_method_spec
+        self._owns_transport = transport is None
+        self.transport = HttpTransport() if transport is None else transport
+        self.single_flight = single_flight_of(single_flight)
+        self.instrumentation = instrumentation_of(instrument)
         self._process_method_specs()
 
         for method_name, method_spec in self._method_specs.items():
@@ -285,18 +464,91 @@ class Py2Request(object):
 
     def _process_method_specs(self):
         if self._dflt_method_func_from_method_spec == mk_request_function:
-            for method_name, method_spec in self._method_specs.items():
-                if 'args' not in method_spec and 'url_template' in method_spec:
-                    method_spec['args'] = list(filter(bool,
-                                                      (x[1] for x in str_formatter.parse(method_spec['url_template']))))
+            add_url_template_args(self._method_specs)
 
 
     def _inject_method(self, method_name, method_spec, method_func_from_method_spec=None):
         if not callable(method_spec):
             if method_func_from_method_spec is None:
                 method_func_from_method_spec = self._dflt_method_func_from_method_spec
-            method_spec = method_func_from_method_spec(method_spec)
-        inject_method(self, method_spec, method_name)
+            method_spec = method_func_from_method_spec(self._instrumented(method_name, method_spec))
+        if isinstance(method_spec, function_type):
+            # a bound method, with a map method to call it concurrently on many inputs (see fan_out_map)
+            setattr(self, method_name, mappable_method(method_spec, self))
+        else:
+            inject_method(self, method_spec, method_name)
+
+    @classmethod
+    def class_of_specs(cls, method_specs, method_func_from_method_spec=None, name=None):
+        """
+        A subclass of cls whose methods are the ones of method_specs: For big method_specs (the endpoints of a big
+        API), or many objects, since the methods are made once for all objects, and only when they're first used,
+        instead of all of them for every object. The class is made once per method_specs (and cls), as long as it's
+        used: The method_specs are then frozen, since the class is made from them once (changing them afterwards
+        doesn't change the class, nor make another one: Make the class of a new dict instead).
+        Its objects are made with the arguments of cls, without the method_specs (and method_func_from_method_spec).
+
+        :param method_specs: A {method_name: method_spec,...} dict (see __init__)
+        :param method_func_from_method_spec: The function making the function of a method from its method_spec
+            (by default, the one of cls)
+        :param name: The name of the class (by default, the name of cls, prefixed with 'Lazy')
+
+        >>> method_specs = {'search': {'url_template': 'http://localhost/search?q={query}'}}
+        >>> Api = Py2Request.class_of_specs(method_specs)
+        >>> Api is Py2Request.class_of_specs(method_specs)
+        True
+        >>> Api.search
+        <lazy method search>
+        >>> api = Api()
+        >>> from inspect import signature
+        >>> str(signature(api.search))
+        '(query)'
+        >>> api.search.__func__ is Api().search.__func__
+        True
+        """
+        if method_func_from_method_spec is None:
+            method_func_from_method_spec = cls._dflt_method_func_from_method_spec
+        key = (cls, id(method_specs), method_func_from_method_spec)
+        with _compile_lock:
+            class_of_specs = _class_of_specs.get(key)
+            if class_of_specs is None:
+                class_of_specs = _class_of_specs[key] = cls._mk_class_of_specs(
+                    method_specs, method_func_from_method_spec, name)
+        return class_of_specs
+
+    @classmethod
+    def _mk_class_of_specs(cls, method_specs, method_func_from_method_spec, name):
+        if method_func_from_method_spec is cls._dflt_method_func_from_method_spec:
+            add_url_template_args(method_specs)
+        namespace = {'method_specs': method_specs}
+        for method_name, method_spec in method_specs.items():
+            if hasattr(cls, method_name):
+                raise ValueError("A method can't be named {!r}: {} has an attribute with that name".format(
+                    method_name, cls.__name__))
+            namespace[method_name] = LazyMethod(method_name, method_spec, method_func_from_method_spec)
+
+        def __init__(self, *args, **kwargs):
+            cls.__init__(self, None, method_func_from_method_spec, *args, **kwargs)
+
+        namespace['__init__'] = __init__
+        return type(name or 'Lazy' + cls.__name__, (cls,), namespace)
+
+    def _instrumented(self, method_name, method_spec):
+        """The method_spec, with the MethodStats of the method, if the object is instrumented (and the spec isn't)"""
+        if self.instrumentation is None or not isinstance(method_spec, dict) or 'instrument' in method_spec:
+            return method_spec
+        return dict(method_spec, instrument=self.instrumentation.of_method(method_name))
+
+    def close(self):
+        """Close the transport of the object (and its connections), unless it was given (so maybe shared)"""
+        if self._owns_transport:
+            self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
 
 class UrlMethodSpecsMaker:
@@ -0,0 +1,273 @@
+"""
+Client-side limits of the requests made to a server: Token-bucket rate limits, and adaptive concurrency.
+
+A method_spec can limit the rate of its requests, with a 'rate_limit' key, whose value can be:
+    * a number: The (sustained) number of requests per second
+    * a dict: The keyword arguments of a TokenBucket, for example {'rate': 10, 'burst': 20}
+    * a TokenBucket: To share a rate limit between methods
+
+Limits can also be set per host, on the transport (see HttpTransport and AsyncHttpTransport), so that they're shared
+by all the methods (and objects) that make requests to that host with the transport:
+    * rate_limit_of_host: A {host: rate_limit, ...} dict (host as in pool_maxsize_of_host)
+    * adaptive_concurrency: True, or a dict of the keyword arguments of AdaptiveConcurrency, to limit the number of
+      concurrent requests to every host, adapting that limit to how the host responds
+
+>>> bucket = TokenBucket(rate=10, burst=2, clock=lambda: 0.0)
+>>> [bucket.reserve() for _ in range(4)]  # the seconds to wait before making the request
+[0.0, 0.0, 0.1, 0.2]
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+DFLT_INITIAL_LIMIT = 4
+DFLT_MIN_LIMIT = 1
+DFLT_MAX_LIMIT = 64
+DFLT_LATENCY_TOLERANCE = 2.0
+DFLT_BACKOFF = 0.5
+OVERLOAD_STATUSES = frozenset([429, 503])
+
+
+class TokenBucket(object):
+    """
+    A (thread-safe) token-bucket rate limit: Requests can be made at a sustained rate, with bursts of up to burst
+    requests (after a quiet period). Waiting requests are served in the order they asked.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        """
+        :param rate: The number of requests per second
+        :param burst: The maximum number of requests that can be made at once (default: max(1, rate))
+        :param clock: The function giving the current time (in seconds)
+        """
+        if rate <= 0:
+            raise ValueError("rate should be positive, was {!r}".format(rate))
+        self.rate = rate
+        self.burst = max(1, rate) if burst is None else burst
+        self.clock = clock
+        self._tokens = self.burst
+        self._last = clock()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.waited = 0.0
+
+    def reserve(self):
+        """Take a token, returning the number of seconds to wait before it's actually available"""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate) - 1
+            self._last = now
+            wait = max(0.0, -self._tokens / self.rate)
+            self.requests += 1
+            self.waited += wait
+            return wait
+
+    def acquire(self):
+        """Wait for a token"""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        """Wait for a token, without blocking the event loop"""
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def stats(self):
+        return {'rate': self.rate, 'burst': self.burst, 'requests': self.requests, 'waited': self.waited}
+
+
+def token_bucket_of(rate_limit_spec):
+    """The TokenBucket of a rate limit spec (see the module's doc), or None if it's falsy"""
+    if not rate_limit_spec:
+        return None
+    if isinstance(rate_limit_spec, TokenBucket):
+        return rate_limit_spec
+    if isinstance(rate_limit_spec, dict):
+        return TokenBucket(**rate_limit_spec)
+    return TokenBucket(rate_limit_spec)
+
+
+class AdaptiveConcurrency(object):
+    """
+    A limit of the number of concurrent requests, that adapts to the responses (AIMD: additive increase,
+    multiplicative decrease): The limit grows by about one every limit responses that are fast enough (whose latency
+    is within latency_tolerance times the smallest latency seen), and is multiplied by backoff when a response is
+    slow, has an overload status (429 or 503), or the request failed. It's decreased at most once per latency, so
+    that a burst of overload responses (to requests made at the same time) only counts once.
+
+    Requests wait (in acquire or aacquire) for the number of running requests to be under the limit, and release
+    (with their latency and status) when they're done. It can be used from threads and event loops at the same time.
+
+    >>> concurrency = AdaptiveConcurrency(initial_limit=4, clock=iter(range(100)).__next__)
+    >>> concurrency.acquire()
+    >>> concurrency.release(latency=0.1, status=200)
+    >>> concurrency.limit
+    4.25
+    >>> concurrency.acquire()
+    >>> concurrency.release(latency=0.1, status=429)
+    >>> concurrency.limit
+    2.125
+    """
+
+    def __init__(self, initial_limit=DFLT_INITIAL_LIMIT, min_limit=DFLT_MIN_LIMIT, max_limit=DFLT_MAX_LIMIT,
+                 latency_tolerance=DFLT_LATENCY_TOLERANCE, backoff=DFLT_BACKOFF, clock=time.monotonic):
+        """
+        :param initial_limit: The number of concurrent requests allowed at first
+        :param min_limit: The smallest the limit can get
+        :param max_limit: The largest the limit can get
+        :param latency_tolerance: How many times the smallest latency seen a latency can be, without being too slow
+        :param backoff: The factor the limit is multiplied by when the host is overloaded
+        :param clock: The function giving the current time (in seconds)
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.clock = clock
+        self.in_flight = 0
+        self.min_latency = None
+        self._last_decrease = None
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._async_waiters = deque()
+        self.overloads = 0
+
+    def _try_acquire(self):
+        if self.in_flight < max(int(self.limit), 1):
+            self.in_flight += 1
+            return True
+        return False
+
+    def acquire(self):
+        """Wait for the number of running requests to be under the limit"""
+        with self._condition:
+            while not self._try_acquire():
+                self._condition.wait()
+
+    async def aacquire(self):
+        """Wait for the number of running requests to be under the limit, without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._try_acquire():
+                    return
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._lock:
+                    try:
+                        self._async_waiters.remove((loop, future))
+                    except ValueError:  # it was woken up already: pass the wakeup on (at worst, a spurious one)
+                        self._wake_async_waiters(1)
+                raise
+
+    def release(self, latency=None, status=None):
+        """
+        Tell that a request is done, adapting the limit.
+        :param latency: The number of seconds the request took (None if it failed)
+        :param status: The status code of the response (None if it failed)
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self._adapt(latency, status)
+            n_free = max(int(self.limit), 1) - self.in_flight
+            if n_free > 0:
+                self._condition.notify(n_free)
+                self._wake_async_waiters(n_free)
+
+    def _wake_async_waiters(self, n):
+        """Wake up (at most) n of the waiters of aacquire (with the lock held), skipping the cancelled ones"""
+        while n > 0 and self._async_waiters:
+            loop, future = self._async_waiters.popleft()
+            if future.done():  # cancelled (aacquire will remove it, if it didn't get the chance to)
+                continue
+            loop.call_soon_threadsafe(_set_done, future)
+            n -= 1
+
+    def _adapt(self, latency, status):
+        if latency is not None and status not in OVERLOAD_STATUSES:
+            if self.min_latency is None or latency < self.min_latency:
+                self.min_latency = latency
+            else:  # let the reference latency follow a server that gets slower (but not in a single response)
+                self.min_latency *= 1.01
+            if latency <= self.latency_tolerance * self.min_latency:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                return
+        now = self.clock()
+        if self._last_decrease is None or now - self._last_decrease >= (self.min_latency or 0):
+            self._last_decrease = now
+            self.overloads += 1
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+
+    def stats(self):
+        return {'limit': self.limit, 'in_flight': self.in_flight, 'min_latency': self.min_latency,
+                'overloads': self.overloads}
+
+
+def _set_done(future):
+    if not future.done():  # the waiter could have been cancelled
+        future.set_result(None)
+
+
+def adaptive_concurrency_of(adaptive_concurrency_spec):
+    """The AdaptiveConcurrency of an adaptive_concurrency spec (True or dict of kwargs), or None if it's falsy"""
+    if not adaptive_concurrency_spec:
+        return None
+    if adaptive_concurrency_spec is True:
+        return AdaptiveConcurrency()
+    return AdaptiveConcurrency(**adaptive_concurrency_spec)
+
+
+class HostLimits(object):
+    """
+    The limits (TokenBucket and AdaptiveConcurrency, or None) of the requests to every host, made (for the adaptive
+    concurrency) on the first request to the host.
+    """
+
+    def __init__(self, rate_limit_of_host=None, adaptive_concurrency=None):
+        """
+        :param rate_limit_of_host: A {host: rate_limit, ...} dict, where host is a host name, or a
+            'scheme://host[:port]' prefix, and rate_limit a number, TokenBucket kwargs, or TokenBucket
+        :param adaptive_concurrency: True, or AdaptiveConcurrency kwargs, to adapt the concurrency of every host
+        """
+        self._rate_limit_of_host = {host.rstrip('/'): token_bucket_of(rate_limit)
+                                    for host, rate_limit in (rate_limit_of_host or {}).items()}
+        self._adaptive_concurrency = adaptive_concurrency
+        self._limits_of_origin = {}
+        self._lock = threading.Lock()
+
+    def limits_of(self, url):
+        """The (rate limit, concurrency limit) pair of the host of url"""
+        parts = urlsplit(url)
+        origin = '{}://{}'.format(parts.scheme, parts.netloc)
+        limits = self._limits_of_origin.get(origin)
+        if limits is None:
+            with self._lock:
+                limits = self._limits_of_origin.get(origin)
+                if limits is None:
+                    rate_limit = self._rate_limit_of_host.get(origin, self._rate_limit_of_host.get(parts.hostname))
+                    limits = (rate_limit, adaptive_concurrency_of(self._adaptive_concurrency))
+                    self._limits_of_origin[origin] = limits
+        return limits
+
+    def stats(self):
+        """The stats of the limits of the hosts requests were made to, as a {'scheme://host[:port]': {...}} dict"""
+        stats = {}
+        for origin, (rate_limit, concurrency) in list(self._limits_of_origin.items()):
+            stats[origin] = {'rate_limit': rate_limit and rate_limit.stats(),
+                             'concurrency': concurrency and concurrency.stats()}
+        return stats
+
+
+def host_limits_of(rate_limit_of_host, adaptive_concurrency):
+    """The HostLimits of the rate_limit_of_host and adaptive_concurrency of a transport, or None if there's none"""
+    if not rate_limit_of_host and not adaptive_concurrency:
+        return None
+    return HostLimits(rate_limit_of_host, adaptive_concurrency)
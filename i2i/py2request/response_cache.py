@@ -0,0 +1,271 @@
+"""
+An in-memory cache of the responses of requests, following the http caching semantics of the responses.
+
+A method_spec can ask for its responses to be cached, with a 'cache' key, whose value can be:
+    * True: The method gets its own ResponseCache, with default settings
+    * a dict: The keyword arguments of the ResponseCache the method gets, for example {'maxsize': 100, 'ttl': 60}
+    * a ResponseCache: To share a cache between methods
+
+Responses are cached by the method, url, json body (and params and data, if any) of their request. A cached response is
+reused as long as it's fresh: For the max-age of its Cache-Control header (not its s-maxage, which is for shared
+caches), or else, for the ttl of the cache. Without a ttl, a response with an ETag or Last-Modified header (and no
+max-age) is stale right away, and a response without them is fresh for ever. When it's not fresh anymore and has an
+ETag or Last-Modified header, the request is made again, conditionally (with If-None-Match or If-Modified-Since
+headers): If the server answers with a 304 (not modified), the cached response is used (and is fresh again). Responses whose Cache-Control says no-store are not cached, and those whose Cache-Control
+says no-cache are revalidated every time.
+
+By default, the responses (or, for methods with an output_format, their decoded bodies, so that they're decoded once)
+are cached, and the output_trans of the method is applied to them on every call. With cache_output=True, the output
+of output_trans is cached instead.
+
+>>> cache = ResponseCache(maxsize=2, ttl=60)
+>>> cache.key_of({'method': 'get', 'url': 'http://host/a', 'json': {'b': 1, 'a': 2}})
+('GET', 'http://host/a', '{"a": 2, "b": 1}', None, None)
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+DFLT_MAXSIZE = 256
+CACHEABLE_STATUSES = frozenset([200, 203, 300, 301, 308, 404, 410])
+
+
+def _serialized(obj):
+    if obj is None:
+        return None
+    try:
+        return json.dumps(obj, sort_keys=True, default=repr)
+    except TypeError:  # keys that can't be sorted
+        return repr(obj)
+
+
+def cache_control_directives(headers):
+    """
+    The {directive: value, ...} dict of the Cache-Control header of a response (value is None for valueless directives)
+
+    >>> cache_control_directives({'Cache-Control': 'public, max-age=60, no-cache'})
+    {'public': None, 'max-age': '60', 'no-cache': None}
+    """
+    directives = {}
+    for directive in (headers.get('Cache-Control') or '').split(','):
+        name, _, value = directive.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+def status_of(response):
+    """The status code of a (requests or aiohttp) response"""
+    status = getattr(response, 'status_code', None)
+    return status if status is not None else response.status
+
+
+class CacheEntry(object):
+    __slots__ = ('value', 'expires_at', 'etag', 'last_modified')
+
+    def __init__(self, value, expires_at, etag, last_modified):
+        self.value = value
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class ResponseCache(object):
+    """
+    A thread-safe LRU cache of responses (or of their output_trans), with http semantics (see the module's doc).
+    """
+
+    def __init__(self, maxsize=DFLT_MAXSIZE, ttl=None, cache_output=False, clock=time.monotonic):
+        """
+        :param maxsize: The maximum number of cached responses (the least recently used are dropped first)
+        :param ttl: The number of seconds a response is fresh, if its Cache-Control doesn't say (None: for ever, for
+            responses without validators, and not at all, so revalidated every time, for the ones with an ETag or
+            Last-Modified)
+        :param cache_output: If True, cache the output of the output_trans of responses, instead of the responses
+        :param clock: The function giving the current time (in seconds)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.cache_output = cache_output
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    @staticmethod
+    def key_of(request_kwargs):
+        return (request_kwargs.get('method', 'GET').upper(), request_kwargs.get('url'),
+                _serialized(request_kwargs.get('json')), _serialized(request_kwargs.get('params')),
+                _serialized(request_kwargs.get('data')))
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _remove(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _expires_at(self, response):
+        """When the response stops being fresh, or None if it shouldn't be stored"""
+        directives = cache_control_directives(response.headers)
+        if 'no-store' in directives:
+            return None
+        if 'no-cache' in directives:
+            return self.clock()
+        max_age = directives.get('max-age')  # (s-maxage is for shared caches, which this isn't)
+        if max_age is not None:
+            try:
+                age = int(response.headers.get('Age') or 0)
+                return self.clock() + int(max_age) - age
+            except ValueError:
+                return self.clock()
+        if self.ttl is None:
+            if response.headers.get('ETag') is not None or response.headers.get('Last-Modified') is not None:
+                return self.clock()  # (to be revalidated)
+            return float('inf')
+        return self.clock() + self.ttl
+
+    def _prepare(self, request_kwargs):
+        """
+        The key of the request, its cache entry (if any), whether that entry is fresh, and the request_kwargs to use
+        (with conditional request headers, if the entry isn't fresh, but has validators)
+        """
+        key = self.key_of(request_kwargs)
+        entry = self._get(key)
+        if entry is None:
+            return key, None, False, request_kwargs
+        if self.clock() < entry.expires_at:
+            return key, entry, True, request_kwargs
+        if entry.etag is None and entry.last_modified is None:
+            self._remove(key)
+            return key, None, False, request_kwargs
+        headers = dict(request_kwargs.get('headers') or {})
+        if entry.etag is not None:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified is not None:
+            headers['If-Modified-Since'] = entry.last_modified
+        return key, entry, False, dict(request_kwargs, headers=headers)
+
+    def _revalidated(self, key, entry, response):
+        """Refresh an entry with the headers of the 304 response that validated it"""
+        self._count('revalidations')
+        expires_at = self._expires_at(response)
+        if expires_at is None:
+            self._remove(key)
+        else:
+            entry.expires_at = expires_at
+            entry.etag = response.headers.get('ETag', entry.etag)
+            entry.last_modified = response.headers.get('Last-Modified', entry.last_modified)
+            self._set(key, entry)
+
+    def _store(self, key, response, value):
+        if status_of(response) not in CACHEABLE_STATUSES:
+            return
+        expires_at = self._expires_at(response)
+        if expires_at is not None:
+            self._set(key, CacheEntry(value, expires_at, response.headers.get('ETag'),
+                                      response.headers.get('Last-Modified')))
+
+    def request(self, send, request_kwargs, output_trans=None, measurements=None, decode=None):
+        """
+        Get the output (response, or output_trans of the response) of a request, from the cache, or by calling send.
+        :param send: The function making the request: send(**request_kwargs) should return the response
+        :param request_kwargs: The arguments of the request
+        :param output_trans: The function to apply to the response, or to its decoded body if there's a decode (None:
+            the output is the response, or its decoded body, itself)
+        :param measurements: A dict to record whether the request was a cache 'hit', 'miss' or 'revalidated' in (as
+            its 'cache' value), if not None (see i2i.py2request.instrumentation)
+        :param decode: The function of the response decoding its body, which is then cached instead of the response
+            (None: the response is cached)
+        """
+        measurements = {} if measurements is None else measurements
+        key, entry, fresh, request_kwargs = self._prepare(request_kwargs)
+        if fresh:
+            self._count('hits')
+            measurements['cache'] = 'hit'
+            return self._output_of_entry(entry, output_trans)
+        response = send(**request_kwargs)
+        if entry is not None and status_of(response) == 304:
+            self._revalidated(key, entry, response)
+            self._count('hits')
+            measurements['cache'] = 'revalidated'
+            return self._output_of_entry(entry, output_trans)
+        self._count('misses')
+        measurements['cache'] = 'miss'
+        value = response if decode is None else decode(response)
+        output = value if output_trans is None else output_trans(value)
+        self._store(key, response, output if self.cache_output else value)
+        return output
+
+    async def arequest(self, send, request_kwargs, output_trans=None, measurements=None, decode=None):
+        """The async counterpart of request: send is a coroutine function, and output_trans and decode can be"""
+        measurements = {} if measurements is None else measurements
+        key, entry, fresh, request_kwargs = self._prepare(request_kwargs)
+        if fresh:
+            self._count('hits')
+            measurements['cache'] = 'hit'
+            return await _awaited(self._output_of_entry(entry, output_trans))
+        response = await send(**request_kwargs)
+        if entry is not None and status_of(response) == 304:
+            self._revalidated(key, entry, response)
+            self._count('hits')
+            measurements['cache'] = 'revalidated'
+            return await _awaited(self._output_of_entry(entry, output_trans))
+        self._count('misses')
+        measurements['cache'] = 'miss'
+        value = response if decode is None else await _awaited(decode(response))
+        output = value if output_trans is None else await _awaited(output_trans(value))
+        self._store(key, response, output if self.cache_output else value)
+        return output
+
+    def _output_of_entry(self, entry, output_trans):
+        if self.cache_output or output_trans is None:
+            return entry.value
+        return output_trans(entry.value)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'revalidations': self.revalidations,
+                'size': len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.revalidations = 0
+
+
+async def _awaited(obj):
+    if hasattr(obj, '__await__'):
+        return await obj
+    return obj
+
+
+def response_cache_of(cache_spec):
+    """The ResponseCache of the 'cache' value of a method_spec (see the module's doc), or None if it's falsy"""
+    if not cache_spec:
+        return None
+    if isinstance(cache_spec, ResponseCache):
+        return cache_spec
+    if cache_spec is True:
+        return ResponseCache()
+    return ResponseCache(**cache_spec)
+
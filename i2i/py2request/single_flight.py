@@ -0,0 +1,128 @@
+"""
+Single-flight coalescing of identical concurrent requests: When a request is made while an identical one (same method,
+url, body and headers) is in flight, it doesn't go out on the wire, but waits for the response of the one in flight.
+
+A Py2Request (or AsyncPy2Request) coalesces the requests of its methods when it's made with a single_flight argument,
+which can be:
+    * True: The object gets its own SingleFlight, coalescing the requests of idempotent http methods
+    * a dict: The keyword arguments of the SingleFlight it gets, for example {'methods': ['GET', 'POST']}
+    * a SingleFlight: To coalesce the requests of several objects
+
+All the waiters of a request get the same response (or exception): Each applies the output_trans of its method to
+it. Streamed requests (see i2i.py2request.streaming) are never coalesced, since their response can only be read once.
+
+>>> import threading, time
+>>> def send(**request_kwargs):
+...     time.sleep(0.05)  # a slow server
+...     return 'response to {method} {url}'.format(**request_kwargs)
+>>> single_flight = SingleFlight()
+>>> threads = [threading.Thread(target=single_flight.request, args=(send, {'method': 'GET', 'url': 'http://host'}))
+...            for _ in range(10)]
+>>> for thread in threads:
+...     thread.start()
+>>> for thread in threads:
+...     thread.join()
+>>> single_flight.stats()
+{'calls': 1, 'coalesced': 9, 'in_flight': 0}
+"""
+import asyncio
+import threading
+
+from i2i.py2request.response_cache import ResponseCache, _serialized
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE'])
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'exception')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class SingleFlight(object):
+    """Coalesces identical concurrent requests (of threads, or of event loops) into one (see the module's doc)"""
+
+    def __init__(self, methods=IDEMPOTENT_METHODS):
+        """
+        :param methods: The http methods whose requests are coalesced (by default, the idempotent ones)
+        """
+        self.methods = frozenset(method.upper() for method in methods)
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key_of(request_kwargs):
+        return ResponseCache.key_of(request_kwargs) + (_serialized(request_kwargs.get('headers')),)
+
+    def _coalesces(self, request_kwargs):
+        return (request_kwargs.get('method', 'GET').upper() in self.methods
+                and not request_kwargs.get('stream', False))
+
+    def request(self, send, request_kwargs):
+        """
+        Get the response of a request: By calling send(**request_kwargs), or, if an identical request is in flight,
+        by waiting for its response.
+        """
+        if not self._coalesces(request_kwargs):
+            return send(**request_kwargs)
+        key = self.key_of(request_kwargs)
+        with self._lock:
+            call = self._calls.get(key)
+            leads = call is None
+            if leads:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if leads:
+            try:
+                call.result = send(**request_kwargs)
+            except BaseException as exception:
+                call.exception = exception
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+        if call.exception is not None:
+            raise call.exception
+        return call.result
+
+    async def arequest(self, send, request_kwargs):
+        """
+        The async counterpart of request: send is a coroutine function. The request is made in a task, so that
+        cancelling one of the waiters (even the first one) doesn't cancel it for the others.
+        """
+        if not self._coalesces(request_kwargs):
+            return await send(**request_kwargs)
+        key = (asyncio.get_running_loop(), self.key_of(request_kwargs))
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(send(**request_kwargs))
+                task.add_done_callback(lambda _: self._tasks.pop(key, None))
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': len(self._calls) + len(self._tasks)}
+
+
+def single_flight_of(single_flight_spec):
+    """The SingleFlight of the single_flight argument of a Py2Request (see the module's doc), or None if it's falsy"""
+    if not single_flight_spec:
+        return None
+    if isinstance(single_flight_spec, SingleFlight):
+        return single_flight_spec
+    if single_flight_spec is True:
+        return SingleFlight()
+    return SingleFlight(**single_flight_spec)
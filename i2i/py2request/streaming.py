@@ -0,0 +1,168 @@
+"""
+Streaming responses: Lazy iterators of the chunks, lines, or NDJSON records of the body of a response.
+
+A method_spec can ask for its response to be streamed, with a 'stream' key, whose value can be:
+    * 'chunks' (or True), 'lines' or 'ndjson': What to iterate over
+    * a dict: The keyword arguments of the ResponseStream, for example {'kind': 'lines', 'chunk_size': 65536}
+
+The method then returns a ResponseStream (or, if it has one, the output_trans of it): An iterator that reads the body
+of the response as it's iterated over, so that responses that are bigger than memory can be processed. The
+connection of the response goes back to the pool of the transport when the iterator is exhausted, or closed (which
+it is when it's used as a context manager).
+
+>>> import io, requests
+>>> response = requests.Response()
+>>> response.raw = io.BytesIO(b'{"a": 1}\\n\\n{"a": 2}\\n')
+>>> with ResponseStream(response, 'ndjson') as records:
+...     list(records)
+[{'a': 1}, {'a': 2}]
+"""
+import json
+
+STREAM_KINDS = ('chunks', 'lines', 'ndjson')
+DFLT_CHUNK_SIZE = 64 * 1024
+
+
+def stream_options_of(stream_spec):
+    """The ResponseStream keyword arguments of the 'stream' value of a method_spec, or None if it's falsy"""
+    if not stream_spec:
+        return None
+    if stream_spec is True:
+        return {'kind': 'chunks'}
+    if isinstance(stream_spec, str):
+        stream_spec = {'kind': stream_spec}
+    if stream_spec.get('kind', 'chunks') not in STREAM_KINDS:
+        raise ValueError("The kind of stream should be one of {}, was {!r}".format(STREAM_KINDS, stream_spec['kind']))
+    return dict(stream_spec)
+
+
+def _charset_of(content_type):
+    """The charset parameter of a Content-Type header (None if it doesn't declare one)"""
+    for parameter in (content_type or '').split(';')[1:]:
+        name, _, value = parameter.partition('=')
+        if name.strip().lower() == 'charset':
+            return value.strip().strip('"\'') or None
+    return None
+
+
+def _encoding_of(response, encoding):
+    """
+    The encoding of the lines of a response: encoding, or the charset its Content-Type declares, or utf-8 (not the
+    encoding requests guesses from the content type, which is ISO-8859-1 for text types)
+    """
+    return encoding or _charset_of(response.headers.get('Content-Type')) or 'utf-8'
+
+
+class ResponseStream(object):
+    """
+    A lazy iterator of the chunks (bytes), lines (str) or NDJSON records (parsed with loads) of the body of a
+    (streamed) requests response. The response is closed when the iterator is exhausted, or closed.
+    """
+
+    def __init__(self, response, kind='chunks', chunk_size=DFLT_CHUNK_SIZE, encoding=None, loads=json.loads):
+        """
+        :param response: The response, of a request made with stream=True
+        :param kind: What to iterate over: 'chunks', 'lines' or 'ndjson'
+        :param chunk_size: The number of bytes read at a time
+        :param encoding: The encoding of lines (default: The charset the Content-Type of the response declares, or
+            utf-8)
+        :param loads: The function parsing the (str) lines of NDJSON records
+        """
+        self.response = response
+        self.kind = kind
+        self._items = self._mk_items(chunk_size, _encoding_of(response, encoding), loads)
+
+    def _mk_items(self, chunk_size, encoding, loads):
+        try:
+            if self.kind == 'chunks':
+                yield from self.response.iter_content(chunk_size)
+            else:
+                for line in self.response.iter_lines(chunk_size):
+                    line = line.decode(encoding)
+                    if self.kind == 'lines':
+                        yield line
+                    elif line.strip():
+                        yield loads(line)
+        finally:
+            self.response.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._items)
+
+    def close(self):
+        """Stop iterating, and release the connection of the response"""
+        self._items.close()
+        self.response.close()  # in case iteration didn't start
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+async def _alines_of(chunks):
+    """
+    The (bytes, without their newline) lines of an async iterator of chunks of bytes.
+    (Split here, instead of with the readline of aiohttp, which fails on lines longer than its buffer limit.)
+    """
+    pending = []  # the parts of the line that's not complete yet
+    async for chunk in chunks:
+        *lines, last = chunk.split(b'\n')
+        if lines:
+            pending.append(lines[0])
+            lines[0] = b''.join(pending)
+            pending = []
+            for line in lines:
+                yield line
+        if last:
+            pending.append(last)
+    if pending:
+        yield b''.join(pending)
+
+
+class AsyncResponseStream(object):
+    """
+    The async counterpart of ResponseStream: An async iterator of the chunks, lines or NDJSON records of the body of
+    an (unread) aiohttp response, released when the iterator is exhausted, or closed.
+    """
+
+    def __init__(self, response, kind='chunks', chunk_size=DFLT_CHUNK_SIZE, encoding=None, loads=json.loads):
+        self.response = response
+        self.kind = kind
+        self._items = self._mk_items(chunk_size, _encoding_of(response, encoding), loads)
+
+    async def _mk_items(self, chunk_size, encoding, loads):
+        try:
+            if self.kind == 'chunks':
+                async for chunk in self.response.content.iter_chunked(chunk_size):
+                    yield chunk
+            else:
+                async for line in _alines_of(self.response.content.iter_chunked(chunk_size)):
+                    line = line.decode(encoding).rstrip('\r')
+                    if self.kind == 'lines':
+                        yield line
+                    elif line.strip():
+                        yield loads(line)
+        finally:
+            self.response.release()
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return self._items.__anext__()
+
+    async def aclose(self):
+        """Stop iterating, and release the connection of the response"""
+        await self._items.aclose()
+        self.response.release()  # in case iteration didn't start
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,193 @@
+"""
+Transports: The objects that actually make the http requests of the methods of a Py2Request.
+
+A transport has a request(method, url, **kwargs) method, taking the same arguments as requests.request, and returning
+a response. Contrary to requests.request, which makes (and throws away) a new Session, so new connections, on every
+call, an HttpTransport keeps a pooled requests.Session, so that connections to a host are kept alive and reused.
+
+A transport can also limit the rate (rate_limit_of_host) and the concurrency (adaptive_concurrency) of the requests
+to every host (see i2i.py2request.rate_limit).
+
+>>> transport = HttpTransport(pool_maxsize=4, pool_maxsize_of_host={'api.example.com': 32}, timeout=10)
+>>> transport.stats()
+{'requests': 0, 'pools': {}}
+>>> transport.close()
+"""
+import threading
+import time
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from i2i.py2request.instrumentation import stamp_headers_received
+from i2i.py2request.rate_limit import host_limits_of
+
+DFLT_POOL_CONNECTIONS = 10
+DFLT_POOL_MAXSIZE = 10
+DFLT_TIMEOUT = None  # (the default of the HttpTransport and the AsyncHttpTransport: no timeout)
+
+
+def _mount_prefixes(host):
+    """The session mount prefixes of a host, or of a 'scheme://host[:port]' url prefix"""
+    if '://' in host:
+        return [host.rstrip('/') + '/']
+    return ['http://{}/'.format(host), 'https://{}/'.format(host)]
+
+
+class _ClosingHTTPConnectionPool(HTTPConnectionPool):
+    """A connection pool whose connections are closed when they're put back (their response was read), not kept"""
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn.close()
+        HTTPConnectionPool._put_conn(self, None)  # (the slot of the connection is free again)
+
+
+class _ClosingHTTPSConnectionPool(HTTPSConnectionPool):
+    _put_conn = _ClosingHTTPConnectionPool._put_conn
+
+
+class _ClosingHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter that doesn't reuse connections: Every request gets a new one, closed after its response"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        HTTPAdapter.init_poolmanager(self, *args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _ClosingHTTPConnectionPool,
+                                                   'https': _ClosingHTTPSConnectionPool}
+
+
+class HttpTransport(object):
+    """
+    A transport that makes http requests with a requests.Session, whose connections are pooled (per host) and kept
+    alive between requests.
+    """
+
+    def __init__(self, pool_connections=DFLT_POOL_CONNECTIONS, pool_maxsize=DFLT_POOL_MAXSIZE,
+                 pool_maxsize_of_host=None, pool_block=False, keep_alive=True, timeout=DFLT_TIMEOUT, max_retries=0,
+                 headers=None, rate_limit_of_host=None, adaptive_concurrency=None):
+        """
+        :param pool_connections: The number of (host) connection pools to keep
+        :param pool_maxsize: The maximum number of connections kept alive, per host
+        :param pool_maxsize_of_host: A {host: pool_maxsize, ...} dict to specify pool_maxsize for some hosts. A host can
+            be a host name (for both http and https) or a 'scheme://host[:port]' prefix.
+        :param pool_block: Whether to wait for a connection of a full pool to be free (instead of making a connection
+            that won't be kept)
+        :param keep_alive: Whether to keep connections alive. If False, every request is made with a new connection,
+            which is closed once its response is read (and servers are asked to close it too).
+        :param timeout: The timeout of requests that don't specify theirs: A number of seconds, or a
+            (connect timeout, read timeout) pair. None (the default, as with requests) means waiting forever.
+        :param max_retries: The number of retries of failed connections (see requests.adapters.HTTPAdapter)
+        :param headers: Headers to send with every request
+        :param rate_limit_of_host: A {host: rate_limit, ...} dict of the rate limits (a number of requests per second,
+            TokenBucket kwargs, or TokenBucket) of the requests to some hosts (host as in pool_maxsize_of_host)
+        :param adaptive_concurrency: True, or a dict of AdaptiveConcurrency kwargs, to limit the number of concurrent
+            requests to every host, adapting the limit to the latency and overload (429 and 503) responses of the host
+        """
+        self.timeout = timeout
+        self.host_limits = host_limits_of(rate_limit_of_host, adaptive_concurrency)
+        self.session = Session()
+        adapter_kwargs = dict(pool_connections=pool_connections, pool_block=pool_block, max_retries=max_retries)
+        adapter_class = HTTPAdapter if keep_alive else _ClosingHTTPAdapter
+        for prefix in ('http://', 'https://'):
+            self.session.mount(prefix, adapter_class(pool_maxsize=pool_maxsize, **adapter_kwargs))
+        for host, host_pool_maxsize in (pool_maxsize_of_host or {}).items():
+            adapter = adapter_class(pool_maxsize=host_pool_maxsize, **adapter_kwargs)
+            for prefix in _mount_prefixes(host):
+                self.session.mount(prefix, adapter)
+        self.session.hooks['response'].append(stamp_headers_received)  # (called before the body is read)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        if headers:
+            self.session.headers.update(headers)
+        self._lock = threading.Lock()
+        self._n_requests = 0
+
+    def request(self, method, url, **kwargs):
+        """Make a request (see requests.request for the arguments), with the pooled session"""
+        if 'timeout' not in kwargs:
+            kwargs['timeout'] = self.timeout
+        with self._lock:
+            self._n_requests += 1
+        if self.host_limits is None:
+            return self.session.request(method, url, **kwargs)
+        rate_limit, concurrency = self.host_limits.limits_of(url)
+        if rate_limit is not None:
+            rate_limit.acquire()
+        if concurrency is None:
+            return self.session.request(method, url, **kwargs)
+        concurrency.acquire()
+        latency = status = None
+        try:
+            tic = time.perf_counter()
+            response = self.session.request(method, url, **kwargs)
+            latency, status = time.perf_counter() - tic, response.status_code
+            return response
+        finally:
+            concurrency.release(latency, status)
+
+    def _adapters(self):
+        adapters = []
+        for adapter in self.session.adapters.values():
+            if all(adapter is not a for a in adapters):
+                adapters.append(adapter)
+        return adapters
+
+    def stats(self):
+        """
+        The number of requests made, the state of the connection pools, and of the limits of hosts (if any).
+        The state of the connection pools is a
+        {'scheme://host:port': {'connections': ..., 'requests': ..., 'idle': ..., 'maxsize': ...}, ...} dict, where
+        connections is the number of connections the pool made (so more than maxsize if the pool was full), requests
+        the number of requests it sent, and idle the number of connections that are currently kept alive, waiting.
+        """
+        pools = {}
+        for adapter in self._adapters():
+            pool_manager = adapter.poolmanager
+            for key in list(pool_manager.pools.keys()):
+                pool = pool_manager.pools.get(key)
+                if pool is None:  # the pool was evicted in the meanwhile
+                    continue
+                idle_connections = list(pool.pool.queue) if pool.pool is not None else []
+                pools['{}://{}:{}'.format(pool.scheme, pool.host, pool.port)] = {
+                    'connections': pool.num_connections,
+                    'requests': pool.num_requests,
+                    'idle': sum(conn is not None for conn in idle_connections),
+                    'maxsize': pool.pool.maxsize if pool.pool is not None else 0,
+                }
+        stats = {'requests': self._n_requests, 'pools': pools}
+        if self.host_limits is not None:
+            stats['limits'] = self.host_limits.stats()
+        return stats
+
+    def close(self):
+        """Close the session, and all the connections it kept alive"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_dflt_transport = None
+_dflt_transport_lock = threading.Lock()
+
+
+def get_dflt_transport():
+    """The transport shared by the request functions that aren't called from an object that has its own"""
+    global _dflt_transport
+    if _dflt_transport is None:
+        with _dflt_transport_lock:
+            if _dflt_transport is None:
+                _dflt_transport = HttpTransport()
+    return _dflt_transport
+
+
+def transport_of(obj):
+    """The transport of obj (the object a request method was called from), or the default one if it doesn't have one"""
+    transport = getattr(obj, 'transport', None)
+    if transport is None:
+        return get_dflt_transport()
+    return transport
@@ -1,4 +1,21 @@
+import hashlib
+import importlib
+import importlib.util
 import inspect
+import json
+import os
+import pickle
+import pkgutil
+import re
+import sys
+import weakref
+from collections import ChainMap, namedtuple
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from warnings import warn
+
+from i2i.json_schema import json_schema_of_annotation
 
 
 class Empty(object):
@@ -34,19 +51,18 @@ no_default = NoDefault()
 
 NO_NAME = '_no_name'
 
-import re
-import sys
+# A field line is a line starting with ":<field>", optionally followed by space-separated head words (a type and/or a
+# name), optionally followed by ":" and some text. For example ":param int x: the x", ":return:" or ":tags foo, bar".
+# The regex is anchored and can't backtrack, so tokenizing is linear in the size of the docstring.
+FIELD_LINE_REGEX = re.compile(r':(?P<field>\w+)(?P<head>(?:\s[^:]*)?)(?::(?P<text>.*))?$')
 
-PARAM_OR_RETURNS_REGEX = re.compile(":(?:param|returns)")
-RETURNS_REGEX = re.compile(":returns: (?P<doc>.*)", re.S)
-PARAM_REGEX = re.compile(":param (?P<name>[\*\w]+): (?P<doc>.*?)"
-                         "(?:(?=:param)|(?=:return)|(?=:raises)|\Z)", re.S)
+DocField = namedtuple('DocField', ['field', 'head', 'text', 'lines'])
+DocField.__doc__ = """A block of a docstring: The field (None for the leading text), the head words of the field line,
+the text following the field's colon, and the continuation lines."""
 
 
-def trim(docstring):
-    """trim function from PEP-257"""
-    if not docstring:
-        return ""
+def _trimmed_lines(docstring):
+    """The lines of a docstring, with indentation removed according to PEP-257"""
     # Convert tabs to spaces (following the normal Python rules)
     # and split into a list of lines:
     lines = docstring.expandtabs().splitlines()
@@ -57,15 +73,25 @@ def trim(docstring):
         if stripped:
             indent = min(indent, len(line) - len(stripped))
     # Remove indentation (first line is special):
-    trimmed = [lines[0].strip()]
+    trimmed = [lines[0].strip()] if lines else []
     if indent < sys.maxsize:
         for line in lines[1:]:
             trimmed.append(line[indent:].rstrip())
     # Strip off trailing and leading blank lines:
-    while trimmed and not trimmed[-1]:
-        trimmed.pop()
-    while trimmed and not trimmed[0]:
-        trimmed.pop(0)
+    end = len(trimmed)
+    while end and not trimmed[end - 1]:
+        end -= 1
+    start = 0
+    while start < end and not trimmed[start]:
+        start += 1
+    return trimmed[start:end]
+
+
+def trim(docstring):
+    """trim function from PEP-257"""
+    if not docstring:
+        return ""
+    trimmed = _trimmed_lines(docstring)
 
     # Current code/unittests expects a line return at
     # end of multiline docstrings
@@ -81,6 +107,109 @@ def reindent(string):
     return "\n".join(l.strip() for l in string.strip().split("\n"))
 
 
+def tokenize_docstring(docstring):
+    """
+    Split a docstring into a list of DocField blocks, in a single pass over its (trimmed) lines.
+    The first block is the leading text (field None), and there's one block per field line.
+
+    >>> for block in tokenize_docstring('''Summary
+    ...
+    ...     :param int x: the x
+    ...         more about x
+    ...     :return: nothing
+    ...     :tags foo, bar
+    ...     '''):
+    ...     print(block)
+    DocField(field=None, head='', text='', lines=['Summary', ''])
+    DocField(field='param', head='int x', text=' the x', lines=['    more about x'])
+    DocField(field='return', head='', text=' nothing', lines=[])
+    DocField(field='tags', head='foo, bar', text='', lines=[])
+    """
+    block = DocField(None, '', '', [])
+    blocks = [block]
+    if docstring:
+        match_field_line = FIELD_LINE_REGEX.match
+        for line in _trimmed_lines(docstring):
+            m = line.startswith(':') and match_field_line(line)
+            if m:
+                block = DocField(m.group('field'), m.group('head').strip(), m.group('text') or '', [])
+                blocks.append(block)
+            else:
+                block.lines.append(line)
+    return blocks
+
+
+def _param_name_and_type(head):
+    """Get (name, type) from the head of a param field ("name" or "type name"). type is ANY_TYPE if not given"""
+    type_, _, name = head.rpartition(' ')
+    return name, (type_.strip() or ANY_TYPE)
+
+
+def _docstring_of_blocks(blocks):
+    """The parse_docstring dict, made from DocField blocks"""
+    text_lines = blocks[0].lines
+    short_description = text_lines[0] if text_lines else ''
+    long_description = '\n'.join(text_lines[1:]).strip()
+    params = []
+    returns = None
+    last_idx = len(blocks) - 1
+    for i, block in enumerate(blocks[1:], 1):
+        if block.field == 'param':
+            name, _ = _param_name_and_type(block.head)
+            if name:
+                # the doc spans up to (and includes the newline preceding) the next field
+                doc = block.text[1:] if block.text.startswith(' ') else block.text
+                if block.lines:
+                    doc += '\n' + '\n'.join(block.lines)
+                if i < last_idx:
+                    doc += '\n'
+                params.append({"name": name, "doc": trim(doc)})
+        elif block.field in ('return', 'returns') and returns is None:
+            returns = reindent('\n'.join([block.text] + block.lines))
+    return {
+        "short_description": short_description,
+        "long_description": long_description,
+        "params": params,
+        "returns": returns or ''
+    }
+
+
+def _mint_doc_of_blocks(blocks):
+    """The parse_mint_doc dict, made from DocField blocks"""
+    text_lines = blocks[0].lines
+    summary = text_lines[0] if text_lines else ''
+    inputs = {}
+    return_value = {}
+    tags = []
+    for block in blocks[1:]:
+        description = ''.join([block.text] + [' ' + line for line in block.lines])
+        if block.field == 'param':
+            name, type_ = _param_name_and_type(block.head)
+            if name:
+                inputs[name] = {'type': type_, 'description': description}
+        elif block.field in ('return', 'returns'):
+            return_value = {'type': block.head or ANY_TYPE, 'description': description}
+        elif block.field == 'tags':
+            tags = [tag for tag in (block.head + block.text).replace(' ', '').split(',') if tag]
+    return {
+        'description': ' '.join(text_lines[1:]),
+        'inputs': inputs,
+        'return': return_value,
+        'summary': summary,
+        'tags': tags,
+    }
+
+
+def parse_doc(docstring):
+    """
+    Parse a docstring once, getting both the parse_mint_doc and parse_docstring forms of it.
+    :param docstring: The docstring to parse
+    :return: A (mint_doc, parsed_docstring) pair
+    """
+    blocks = tokenize_docstring(docstring)
+    return _mint_doc_of_blocks(blocks), _docstring_of_blocks(blocks)
+
+
 def parse_docstring(docstring):
     """Parse the docstring into its components.
     :returns: a dictionary of form
@@ -91,43 +220,7 @@ def parse_docstring(docstring):
                   "returns": ...
               }
     """
-
-    short_description = long_description = returns = ""
-    params = []
-
-    if docstring:
-        docstring = trim(docstring)
-
-        lines = docstring.split("\n", 1)
-        short_description = lines[0]
-
-        if len(lines) > 1:
-            long_description = lines[1].strip()
-
-            params_returns_desc = None
-
-            match = PARAM_OR_RETURNS_REGEX.search(long_description)
-            if match:
-                long_desc_end = match.start()
-                params_returns_desc = long_description[long_desc_end:].strip()
-                long_description = long_description[:long_desc_end].rstrip()
-
-            if params_returns_desc:
-                params = [
-                    {"name": name, "doc": trim(doc)}
-                    for name, doc in PARAM_REGEX.findall(params_returns_desc)
-                    ]
-
-                match = RETURNS_REGEX.search(params_returns_desc)
-                if match:
-                    returns = reindent(match.group("doc"))
-
-    return {
-        "short_description": short_description,
-        "long_description": long_description,
-        "params": params,
-        "returns": returns
-    }
+    return _docstring_of_blocks(tokenize_docstring(docstring))
 
 
 valid_json_types = [str, dict, list, float, int, bool]
@@ -144,6 +237,32 @@ name_of_pytype = {
 }
 
 
+name_of_json_type = {'integer': 'int', 'number': 'float'}
+
+
+def type_name_of_annotation(annotation):
+    """
+    The (mint) type name of an annotation: The name_of_pytype of the annotation if it has one, and the name of the
+    JSON type of the annotation's json_schema_of_annotation if not (or '{}', if that schema doesn't have a single type).
+
+    >>> from typing import List, Optional
+    >>> type_name_of_annotation(int), type_name_of_annotation(List[int]), type_name_of_annotation(Optional[int])
+    ('int', 'array', '{}')
+    """
+    try:
+        return name_of_pytype[annotation]
+    except (KeyError, TypeError):  # TypeError: The annotation isn't hashable
+        json_type = json_schema_of_annotation(annotation).get('type', '{}')
+        return name_of_json_type.get(json_type, json_type)
+
+
+def _type_and_schema_of_annotation(annotation):
+    """The 'type' and 'schema' of the (input or output) specs of an annotation (falsy annotations are kept as is)"""
+    if not annotation:
+        return {'type': annotation}
+    return {'type': type_name_of_annotation(annotation), 'schema': json_schema_of_annotation(annotation)}
+
+
 def name_of_obj(o):
     if hasattr(o, '__name__'):
         return o.__name__
@@ -154,78 +273,22 @@ def name_of_obj(o):
 
 
 def parse_mint_doc(doc: str) -> dict:
-    DESCRIPTION = 0
-    PARAMS = 1
-    RETURN = 2
-    split_doc = doc.split('\n')
-    summary = ''
-    description_lines = []
-    inputs = {}
-    return_value = {}
-    tags = []
-    reading = DESCRIPTION
-    cur_item_name = ''
-    for line in split_doc:
-        if line.startswith(':param'):
-            param_type = ANY_TYPE
-            reading = PARAMS
-            split_line = line.split(':')
-            param_def = split_line[1]
-            split_param_def = param_def.split(' ')
-            param_name = ''
-            if len(split_param_def) >= 3:
-                param_type = split_param_def[1]
-                param_name = split_param_def[2]
-
-                # TODO: Put validation externally, and avoid eval if possible
-                # try:
-                #     assert len(param_type) <= 5
-                #     param_type = eval(param_type)
-                #     assert param_type in valid_json_types
-                # except Exception:
-                #     pass
-            elif len(split_param_def) == 2:
-                param_name = split_param_def[1]
-            if param_name:
-                cur_item_name = param_name
-                inputs[param_name] = {'type': param_type}
-                inputs[param_name]['description'] = ':'.join(split_line[2:]) \
-                    if len(split_line) > 2 else ''
-        elif line.startswith(':return'):
-            reading = RETURN
-            split_line = line.split(':')
-            return_type = split_line[1]
-
-            # TODO: Put validation externally, and avoid eval if possible
-            # try:
-            #     assert len(return_type) <= 5
-            #     return_type = eval(return_type)
-            #     assert return_type in valid_json_types
-            # except Exception:
-            #     return_type = ANY_TYPE
-            return_value = {'type': return_type}
-            return_value['description'] = ':'.join(split_line[2:]) \
-                if len(split_line) > 2 else ''
-        elif line.startswith(':tags'):  # TODO: Doesn't seem to be a valid spider doc key
-            split_line = line.split(':')
-            tags = split_line[1].replace(' ', '').split(',')
-        else:
-            if reading == DESCRIPTION:
-                if not summary:
-                    summary = line
-                else:
-                    description_lines.append(line)
-            elif reading == PARAMS:
-                inputs[cur_item_name]['description'] += ' ' + line
-            elif reading == RETURN:
-                return_value['description'] += ' ' + line
-    return {
-        'description': ' '.join(description_lines),
-        'inputs': inputs,
-        'return': return_value,
-        'summary': summary,
-        'tags': tags,
-    }
+    """
+    Parse a (cleaned) docstring into the description, summary, tags, and inputs and return descriptions of a mint.
+
+    >>> d = parse_mint_doc('''The summary
+    ... :param int x: the x
+    ... :param y:
+    ... :return str: a string
+    ... :tags foo, bar''')
+    >>> d['summary'], d['tags']
+    ('The summary', ['foo', 'bar'])
+    >>> d['inputs']
+    {'x': {'type': 'int', 'description': ' the x'}, 'y': {'type': AnyType, 'description': ''}}
+    >>> d['return']
+    {'type': 'str', 'description': ' a string'}
+    """
+    return _mint_doc_of_blocks(tokenize_docstring(doc))
 
 
 # TODO: Expand so that user can specify what to include in the mint
@@ -249,59 +312,383 @@ def mint_of_instance_method(base_class, method):
     return dict(method_mint, input=dict(method_mint['input'], **constructor_mint['input']))
 
 
-def mint_of_callable(f, ismethod=False):
+MINT_KEYS = ('name', 'module', 'doc', 'input', 'output')
+MINT_FORMAT_VERSION = 1  # to increment when what mints contain changes (so that stored mints are made again)
+
+
+class Mint(Mapping):
+    """
+    A lazy, read-only mint of a callable.
+
+    A Mint is a mapping with the same keys as the dicts mint_of_callable makes (name, module, doc, input and output),
+    but nothing is computed until it's asked for: Asking for the arg_names of a Mint doesn't get or parse its doc,
+    and doesn't map annotations to types. Computed values are kept (in slots), so are only computed once.
+
+    >>> def f(a, b: int = 2) -> str:
+    ...     '''A function'''
+    >>> mint = Mint(f)
+    >>> mint.arg_names
+    ['a', 'b']
+    >>> mint['input']
+    {'a': {}, 'b': {'default': 2, 'type': 'int', 'schema': {'type': 'integer'}}}
+    >>> dict(mint) == mint_of_callable(f)
+    True
+    >>> dict(mint.renamed('g'))['name']
+    'g'
+
+    Note that, to be computed once and shared, the values of a Mint should not be modified. Make a dict of it first.
+    """
+    __slots__ = ('_func', '_weakly', 'ismethod', 'constructor', '_name', '_base',
+                 '_doc', '_argspec', '_arg_names', '_own_input', '_input', '_output', '_parsed_doc', '_fingerprint')
+
+    def __init__(self, func, ismethod=False, name=None, constructor=None):
+        """
+        :param func: The callable to mint
+        :param ismethod: Whether func should be considered as a method (so that it's first argument is dropped)
+        :param name: The name to give the mint (defaults to the name of func)
+        :param constructor: The Mint of the constructor of the class func is a method of. Its inputs are added to
+            (and take precedence over) the inputs of func, without being copied (see input).
+        """
+        self._func = func
+        self._weakly = False
+        self.ismethod = bool(ismethod or inspect.ismethod(func))
+        self.constructor = constructor
+        self._name = name
+        self._base = None
+
+    @property
+    def func(self):
+        return self._func() if self._weakly else self._func
+
+    def _weaken(self):
+        """Only hold a weak reference to func (so that a cache of mints doesn't keep the funcs alive)"""
+        if not self._weakly:
+            self._func = weakref.ref(self._func)
+            self._weakly = True
+
+    def _strengthened(self):
+        """A Mint holding a strong reference to func (if this one doesn't), sharing everything else with this one"""
+        if not self._weakly:
+            return self
+        mint = Mint(self.func, self.ismethod, self._name, self.constructor)
+        mint._base = self
+        return mint
+
+    def renamed(self, name):
+        """A Mint with a different name, sharing everything else (including what's already computed) with this one"""
+        mint = Mint(self.func, self.ismethod, name, self.constructor)
+        mint._base = self
+        return mint
+
+    def with_constructor(self, constructor):
+        """A Mint with a (different) constructor, sharing everything else with this one"""
+        mint = Mint(self.func, self.ismethod, self._name, constructor)
+        mint._base = self
+        return mint
+
+    @property
+    def name(self):
+        if self._name is None:
+            self._name = name_of_obj(self.func)  # TODO: Better NO_NAME or just not the name field?
+        return self._name
+
+    @property
+    def module(self):
+        return self.func.__module__
+
+    @property
+    def doc(self):
+        try:
+            return self._doc
+        except AttributeError:
+            self._doc = self._base.doc if self._base is not None else inspect.getdoc(self.func)
+            return self._doc
+
+    @property
+    def parsed_doc(self):
+        """The parse_mint_doc of the doc"""
+        try:
+            return self._parsed_doc
+        except AttributeError:
+            self._parsed_doc = self._base.parsed_doc if self._base is not None else parse_mint_doc(self.doc)
+            return self._parsed_doc
+
+    @property
+    def argspec(self):
+        try:
+            return self._argspec
+        except AttributeError:
+            self._argspec = self._base.argspec if self._base is not None else inspect.getfullargspec(self.func)
+            return self._argspec
+
+    @property
+    def arg_names(self):
+        """The names of the (positional or keyword) arguments of func (without the first one if it's a method)"""
+        try:
+            return self._arg_names
+        except AttributeError:
+            args = self.argspec.args or []
+            if len(args) > 0 and self.ismethod:
+                args = args[1:]
+            self._arg_names = args
+            return self._arg_names
+
+    @property
+    def own_input(self):
+        """The inputs of func itself (without the constructor's)"""
+        try:
+            return self._own_input
+        except AttributeError:
+            if self._base is not None:
+                self._own_input = self._base.own_input
+            else:
+                self._own_input = self._mk_input()
+            return self._own_input
+
+    @property
+    def input(self):
+        """The inputs of func, and of the constructor, if any (as a ChainMap referencing both, in that case)"""
+        if self.constructor is None:
+            return self.own_input
+        try:
+            return self._input
+        except AttributeError:
+            self._input = ChainMap(self.constructor.input, self.own_input)
+            return self._input
+
+    @property
+    def output(self):
+        try:
+            return self._output
+        except AttributeError:
+            if self._base is not None:
+                self._output = self._base.output
+            else:
+                self._output = self._mk_output()
+            return self._output
+
+    def _mk_input(self):
+        annotations = self.argspec.annotations
+        input_specs = {}
+        args = self.arg_names
+        defaults = self.argspec.defaults or []
+        for arg_name, dflt in zip(args, [no_default] * (len(args) - len(defaults)) + list(defaults)):
+            input_specs[arg_name] = {}
+            if dflt is not no_default:
+                input_specs[arg_name]['default'] = dflt
+
+            if arg_name in annotations:
+                input_specs[arg_name].update(_type_and_schema_of_annotation(annotations[arg_name]))
+        return input_specs
+
+    @property
+    def fingerprint(self):
+        """The fingerprint_of_mint of this mint"""
+        try:
+            return self._fingerprint
+        except AttributeError:
+            self._fingerprint = fingerprint_of_mint(self)
+            return self._fingerprint
+
+    def _mk_output(self):
+        annotations = self.argspec.annotations
+        output = {}
+        if 'return' in annotations:
+            output.update(_type_and_schema_of_annotation(annotations['return']))
+        return output
+
+    def __getitem__(self, k):
+        if k in MINT_KEYS:
+            return getattr(self, k)
+        raise KeyError(k)
+
+    def __iter__(self):
+        return iter(MINT_KEYS)
+
+    def __len__(self):
+        return len(MINT_KEYS)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, dict(self))
+
+
+def _jsonable(o):
+    if isinstance(o, Mapping):  # the ChainMap inputs of class mints, for example
+        return dict(o)
+    return repr(o)
+
+
+def fingerprint_of_mint(mint) -> str:
+    """
+    A fingerprint of the contents of a mint: Its name, module, doc, inputs (in order, with their defaults, types and
+    schemas) and output, and any other field the mint has (a summary, or descriptions, for example).
+
+    Fingerprints are stable across processes as long as the mint is, so can be stored to find out what mints changed
+    since (see make_openapi_spec_incrementally). Values that aren't JSON serializable (some defaults, for example)
+    are fingerprinted by their repr, so a default whose repr holds its id will make the fingerprint change every time.
+
+    >>> def f(a, b: int = 2) -> str:
+    ...     '''A function'''
+    >>> fingerprint = fingerprint_of_mint(mint_of_callable(f))
+    >>> fingerprint == Mint(f).fingerprint
+    True
+    >>> def f(a, b: int = 3) -> str:
+    ...     '''A function'''
+    >>> fingerprint == fingerprint_of_mint(mint_of_callable(f))
+    False
+    """
+    serialized = json.dumps(dict(mint), default=_jsonable)
+    return hashlib.sha1(serialized.encode()).hexdigest()
+
+
+class Mints(Sequence):
+    """
+    A lazy sequence of Mint objects: A Mint is only made (or taken from the mint_cache) when it's accessed.
+    """
+    __slots__ = ('_specs', '_mints')
+
+    def __init__(self, specs):
+        """
+        :param specs: A list of (func, ismethod, name, constructor) tuples, where constructor is None, or the Mint
+            of the constructor of the class func is a method of
+        """
+        self._specs = list(specs)
+        self._mints = [None] * len(self._specs)
+
+    def _mint_of_spec(self, func, ismethod, name, constructor):
+        # (the cached Mint only weakly references func: the Mints given out keep it alive)
+        mint = mint_cache.mint(func, ismethod=ismethod)._strengthened()
+        if constructor is not None:
+            mint = mint.with_constructor(constructor)
+        if name is not None:
+            mint = mint.renamed(name)
+        return mint
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        mint = self._mints[i]
+        if mint is None:
+            mint = self._mints[i] = self._mint_of_spec(*self._specs[i])
+        return mint
+
+    def __len__(self):
+        return len(self._specs)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, list(self))
+
+
+def _copy_of_mint(mint):
+    """Copy a mint deep enough that callers can modify it without corrupting a cached one.
+    Values (defaults, types...) are shared, not copied."""
+    return dict(mint,
+                input={k: dict(v) for k, v in mint['input'].items()},
+                output=dict(mint['output']))
+
+
+def _version_of_callable(f):
+    """A tuple of the objects a mint of f depends on. Compared by identity to detect changes."""
+    target = getattr(f, '__func__', f)
+    if inspect.isclass(target):
+        target = getattr(target, '__init__', target)
+    annotations = getattr(target, '__annotations__', None) or {}
+    return (getattr(target, '__code__', None),
+            getattr(target, '__defaults__', None),
+            getattr(target, '__kwdefaults__', None),
+            getattr(f, '__doc__', None),
+            *annotations.keys(),
+            *annotations.values())
+
+
+class MintCache(object):
+    """
+    A cache of mints, keyed weakly on the callable, so that entries go away when the callable is garbage collected.
+
+    An entry is invalidated (and the callable re-minted) when any of the __code__, __defaults__, __kwdefaults__,
+    __annotations__ or __doc__ of the callable changes.
+    Bound methods are keyed on their underlying function (bound method objects are created on every attribute access).
+    Callables that can't be weakly referenced are minted every time.
+
+    >>> mint_cache = MintCache()
+    >>> def f(a, b: int = 2):
+    ...     return a * b
+    >>> mint_cache(f) == mint_cache(f)
+    True
+    >>> mint_cache.stats()
+    {'hits': 1, 'misses': 1, 'invalidations': 0, 'size': 1}
+    >>> f.__defaults__ = (3,)
+    >>> mint_cache(f)['input']['b']
+    {'default': 3, 'type': 'int', 'schema': {'type': 'integer'}}
+    >>> mint_cache.stats()
+    {'hits': 1, 'misses': 2, 'invalidations': 1, 'size': 1}
+    >>> del f
+    >>> mint_cache.stats()['size']
+    0
+    """
+
+    def __init__(self, mint_func=Mint):
+        self.mint_func = mint_func
+        self._mints = weakref.WeakKeyDictionary()
+        self.clear()
+
+    def __call__(self, f, ismethod=False):
+        """Get a (dict) mint of f, that can be modified freely"""
+        return _copy_of_mint(self.mint(f, ismethod=ismethod))
+
+    def mint(self, f, ismethod=False):
+        """Get the (shared) Mint of f"""
+        ismethod = bool(ismethod or inspect.ismethod(f))
+        key = getattr(f, '__func__', f)
+        version = _version_of_callable(f)
+        try:
+            mints_of_key = self._mints.get(key)
+        except TypeError:  # not weakly referenceable (or not hashable)
+            self.misses += 1
+            return self.mint_func(f, ismethod=ismethod)
+
+        if mints_of_key is None:
+            mints_of_key = self._mints[key] = {}
+        cached = mints_of_key.get(ismethod)
+        if cached is not None:
+            cached_version, mint = cached
+            if len(cached_version) == len(version) and all(x is y for x, y in zip(cached_version, version)):
+                self.hits += 1
+                return mint
+            self.invalidations += 1
+        self.misses += 1
+        mint = self.mint_func(key, ismethod=ismethod)
+        if isinstance(mint, Mint):
+            mint._weaken()
+        mints_of_key[ismethod] = (version, mint)
+        return mint
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations,
+                'size': len(self._mints)}
+
+    def clear(self):
+        self._mints.clear()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+
+mint_cache = MintCache()
+
+
+def mint_of_callable(f, ismethod=False, use_cache=True):
     """
     Get meta-data about a callable.
     :param f: A callable (function, method, ...)
+    :param ismethod: Whether f should be considered as a method (so that it's first argument is dropped)
+    :param use_cache: Whether to use (and feed) the module's mint_cache
     :return: A dict containing information about the interface of f, that is, name, module, doc, and input and output
     information.
     """
-    raw_doc = inspect.getdoc(f)
-    # parsed_doc = parse_mint_doc(raw_doc)
-    # doc_inputs = parsed_doc['inputs']
-    # doc_return = parsed_doc['return']
-    mint = {
-        'name': name_of_obj(f),  # TODO: Better NO_NAME or just not the name field?
-        'module': f.__module__,
-        'doc': raw_doc,
-        # 'description': parsed_doc['description'] or '',
-        # 'summary': parsed_doc['summary'],
-        # 'tags': parsed_doc['tags']
-    }
-
-    argspec = inspect.getfullargspec(f)
-    annotations = argspec.annotations
-    input_specs = {}
-    args = argspec.args or []
-    if len(args) > 0 and (ismethod or inspect.ismethod(f)):
-        args = args[1:]
-    defaults = argspec.defaults or []
-    for arg_name, dflt in zip(args, [no_default] * (len(args) - len(defaults)) + list(defaults)):
-        input_specs[arg_name] = {}
-        if dflt is not no_default:
-            input_specs[arg_name]['default'] = dflt
-        # if arg_name in doc_inputs:
-        #     doc_input_arg = doc_inputs[arg_name]
-        #     input_specs[arg_name]['type'] = doc_input_arg['type']
-        #     input_specs[arg_name]['description'] = doc_input_arg['description']
-
-        # TODO: It's probaby better to keep the ming closer to the original data
-        # TODO: For example, an annotation could be something else than a type
-        if arg_name in annotations:
-            input_specs[arg_name]['type'] = annotations[arg_name]
-        if input_specs[arg_name].get('type', None):
-            input_specs[arg_name]['type'] = name_of_pytype.get(input_specs[arg_name]['type'], '{}')
-
-    mint['input'] = input_specs
-
-    mint['output'] = {}
-    # if doc_return:
-    #     mint['output'] = doc_return
-    if 'return' in annotations:
-        mint['output']['type'] = annotations['return']
-    if mint['output'].get('type'):
-        mint['output']['type'] = name_of_pytype[mint['output']['type']]
-    return mint
+    if use_cache:
+        return mint_cache(f, ismethod=ismethod)
+    return _copy_of_mint(Mint(f, ismethod=ismethod))
 
 
 def parsed_parameters(parameters):
@@ -337,16 +724,222 @@ def parsed_signature(obj):
 """
 
 
-def mint_many(input_construct) -> list:
+def methods_of_class(cls):
+    """
+    Get the (name, method) pairs of the (non-dunder) callable attributes of a class, as getattr(cls, name) would give
+    them, walking the mro once (instead of calling getattr for every name of dir(cls)).
+    :param cls: A class
+    :return: A list of (name, method) pairs, sorted by name
+
+    >>> class A(object):
+    ...     def f(self): ...
+    ...     def __call__(self): ...
+    >>> class B(A):
+    ...     x = 3
+    ...     @classmethod
+    ...     def g(cls): ...
+    ...     @property
+    ...     def p(self): ...
+    >>> [name for name, method in methods_of_class(B)]
+    ['f', 'g']
+    """
+    attrs = {}
+    for klass in cls.__mro__:
+        for name, attr in vars(klass).items():
+            if name not in attrs and not name.startswith('__'):
+                attrs[name] = attr
+    methods = []
+    for name, attr in sorted(attrs.items()):
+        if hasattr(type(attr), '__get__'):  # resolve descriptors (classmethods, staticmethods...) as getattr would
+            try:
+                attr = attr.__get__(None, cls)
+            except Exception:
+                attr = getattr(cls, name, None)
+        if callable(attr):
+            methods.append((name, attr))
+    return methods
+
+
+def _takes_instance_or_class(cls, name):
+    """
+    Whether the first argument of the name method of cls is the instance (or class) it's called from: False for
+    staticmethods (found as they are, without the descriptor protocol, in the mro)
+    """
+    return not isinstance(inspect.getattr_static(cls, name), staticmethod)
+
+
+def mint_many(input_construct, lazy=False) -> list:
+    """
+    Mint many callables.
+
+    With lazy=True, the mints are Mint objects, made when they're accessed, and shared (with the mint_cache): For a
+    class, the constructor is minted once, and the input of each method's Mint references (instead of copying) the
+    constructor's input.
+
+    :param input_construct: A list of callables, a {name: callable, ...} dict, or a class (whose methods to mint)
+    :param lazy: If True, return a (lazy) Mints sequence of (read-only) Mint objects, instead of a list of (dict)
+        mints that can be modified
+    :return: A list of (dict) mints, or a Mints sequence if lazy
+    """
     if isinstance(input_construct, dict):
-        minted = [dict(mint_of_callable(item), name=name)
-                  for name, item in input_construct.items() if callable(item)]
+        specs = [(item, False, name, None) for name, item in input_construct.items() if callable(item)]
     elif inspect.isclass(input_construct):
-        method_list = [getattr(input_construct, funcname) for funcname in dir(input_construct)
-                       if callable(getattr(input_construct, funcname)) and
-                       not funcname.startswith('__')]
-        minted = [mint_of_instance_method(input_construct, method) for method in method_list]
+        constructor = mint_cache.mint(input_construct.__init__, ismethod=True)._strengthened()
+        specs = [(method, _takes_instance_or_class(input_construct, name), None, constructor)
+                 for name, method in methods_of_class(input_construct)]
     else:
-        minted = [mint_of_callable(item) for item in input_construct
-                  if callable(item)]
-    return minted
+        specs = [(item, False, None, None) for item in input_construct if callable(item)]
+    if lazy:
+        return Mints(specs)
+    return [_copy_of_mint(mint) for mint in Mints(specs)]
+
+
+def callables_of_module(module, include_private=False):
+    """
+    Get the (name, callable) pairs of the functions and classes defined in a module (not the ones it imports).
+    :param module: A module object or name
+    :param include_private: Whether to include callables whose name starts with an underscore
+    :return: A list of (name, callable) pairs, sorted by name
+    """
+    if isinstance(module, str):
+        module = importlib.import_module(module)
+    return [(name, obj) for name, obj in sorted(vars(module).items())
+            if (inspect.isfunction(obj) or inspect.isclass(obj))
+            and getattr(obj, '__module__', None) == module.__name__
+            and (include_private or not name.startswith('_'))]
+
+
+def mint_module(module, include_private=False, skip_errors=False) -> list:
+    """
+    Mint the functions and classes (minted as their constructor) defined in a module.
+    :param module: A module object or name
+    :param include_private: Whether to include callables whose name starts with an underscore
+    :param skip_errors: If True, callables that can't be minted are skipped (with a warning) instead of raising an
+        error.
+    :return: A list of (dict) mints, sorted by name
+    """
+    mints = []
+    for name, obj in callables_of_module(module, include_private):
+        try:
+            mints.append(mint_of_callable(obj, ismethod=inspect.isclass(obj)))
+        except Exception as e:
+            if not skip_errors:
+                raise
+            warn("Couldn't mint {}: {!r}".format(name, e))
+    return mints
+
+
+def module_filepaths_of_package(package_name):
+    """
+    Get the filepaths of the modules of a package (including the package itself and its subpackages), without
+    importing them (only the package's parents are imported, to find the package).
+    :param package_name: The (dotted) name of the package
+    :return: A {module_name: filepath, ...} dict, sorted by module name. The filepath is None for modules that don't
+        have one (namespace packages, for example).
+    """
+    spec = importlib.util.find_spec(package_name)
+    if spec is None:
+        raise ModuleNotFoundError("No module named '{}'".format(package_name))
+    filepaths = {package_name: spec.origin if spec.has_location else None}
+    if spec.submodule_search_locations:  # it's a package, not a single module
+        def _walk(paths, prefix):
+            for module_info in pkgutil.iter_modules(paths, prefix):
+                module_spec = module_info.module_finder.find_spec(module_info.name)
+                filepaths[module_info.name] = module_spec.origin if module_spec.has_location else None
+                if module_info.ispkg:
+                    _walk(module_spec.submodule_search_locations, module_info.name + '.')
+
+        _walk(list(spec.submodule_search_locations), package_name + '.')
+    return dict(sorted(filepaths.items()))
+
+
+def module_names_of_package(package_name):
+    """
+    List the names of the modules of a package (including the package itself and its subpackages), without importing
+    them (only the package's parents are imported, to find the package).
+    :param package_name: The (dotted) name of the package
+    :return: A sorted list of module names
+    """
+    return list(module_filepaths_of_package(package_name))
+
+
+def source_filepath_of_module(module_name):
+    """
+    The filepath of the python source of a module (without importing it -- though its parents are imported).
+    None if the module doesn't have one (builtin and extension modules, namespace packages...)
+    """
+    spec = importlib.util.find_spec(module_name)
+    if spec is None:
+        raise ModuleNotFoundError("No module named '{}'".format(module_name))
+    origin = spec.origin
+    if spec.has_location and origin and origin.endswith('.py'):
+        return origin
+    return None
+
+
+def _picklable_mint(mint):
+    """A copy of a (dict) mint where unpicklable defaults are replaced by their repr"""
+    input_specs = {}
+    for arg_name, arg_spec in mint['input'].items():
+        if 'default' in arg_spec:
+            try:
+                pickle.dumps(arg_spec['default'])
+            except Exception:
+                arg_spec = dict(arg_spec, default=repr(arg_spec['default']))
+        input_specs[arg_name] = arg_spec
+    return dict(mint, input=input_specs)
+
+
+def _mint_module_in_worker(module_name, include_private, skip_errors):
+    return [_picklable_mint(mint) for mint in mint_module(module_name, include_private, skip_errors)]
+
+
+def mint_modules(module_names, max_workers=None, include_private=False, skip_errors=False, mp_context=None) -> dict:
+    """
+    Import and mint modules in a pool of processes.
+
+    :param module_names: The (dotted) names of the modules to mint
+    :param max_workers: The number of processes to use (defaults to the number of cpus).
+        If 1, the modules are imported and minted serially in the current process.
+    :param include_private: Whether to include callables whose name starts with an underscore
+    :param skip_errors: If True, modules that can't be imported, and callables that can't be minted, are skipped
+        (with a warning) instead of raising an error.
+    :param mp_context: The multiprocessing context to make the processes with (see concurrent.futures)
+    :return: A {module_name: mints, ...} dict, whose items are in the order of module_names, whatever order the
+        modules were minted in. When minted in worker processes, defaults that can't be pickled are replaced by their
+        repr.
+    """
+    module_names = list(module_names)
+    minted = {}
+
+    def _gather(module_name, get_mints):
+        try:
+            minted[module_name] = get_mints()
+        except Exception as e:
+            if not skip_errors:
+                raise
+            warn("Couldn't mint {}: {!r}".format(module_name, e))
+
+    if max_workers == 1 or not module_names:
+        for module_name in module_names:
+            _gather(module_name, partial(mint_module, module_name, include_private, skip_errors))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+            futures = [(module_name,
+                        executor.submit(_mint_module_in_worker, module_name, include_private, skip_errors))
+                       for module_name in module_names]
+            for module_name, future in futures:
+                _gather(module_name, future.result)
+    return {module_name: minted[module_name] for module_name in module_names if module_name in minted}
+
+
+def mint_package(package_name, max_workers=None, include_private=False, skip_errors=False, mp_context=None) -> dict:
+    """
+    Mint all the modules of a package, importing and minting modules in a pool of processes.
+    See mint_modules for a description of the arguments.
+
+    :param package_name: The (dotted) name of the package (or of a single module)
+    :return: A {module_name: mints, ...} dict, whose items are sorted by module name.
+    """
+    return mint_modules(module_names_of_package(package_name), max_workers=max_workers,
+                        include_private=include_private, skip_errors=skip_errors, mp_context=mp_context)
@@ -0,0 +1,243 @@
+"""
+Minting from source, without importing.
+
+mint_of_callable needs the callable, so needs its module to be imported, which can be much more expensive than the
+minting itself (and can have side effects). The functions here parse the source of a module with ast instead, and
+make mints in the same format as mint_module does.
+
+What can't be known without executing the module is approximated:
+    * defaults that are not literals are SourceExpression strings (the source code of the default's expression)
+    * annotations are mapped to types (and schemas) by name, for builtin types and typing generics only (so `x: int`
+      is an 'int', whatever `int` refers to, and `x: List[int]` is the 'array' of integers it is at runtime). The
+      names that aren't known are resolved as Any, and the source of their annotation is kept, as an 'annotation'
+      SourceExpression: `x: Optional[Point]` is {'type': '{}', 'schema': {'anyOf': [{}, {'type': 'null'}]},
+      'annotation': SourceExpression('Optional[Point]')}
+    * classes are minted from the __init__ defined in their body (if any), and their doc isn't inherited
+    * only the functions and classes defined at the top level of the module are minted (not the ones defined
+      conditionally, in an if or try block), and decorators are ignored
+
+>>> src = '''
+... def f(a, b: int = 2, *, c=None) -> str:
+...     \"\"\"The doc of f\"\"\"
+... class A(object):
+...     def __init__(self, x=len('abc')):
+...         pass
+... '''
+>>> for mint in static_mints_of_source(src, module_name='mod'):
+...     print(mint)
+{'name': 'A', 'module': 'mod', 'doc': None, 'input': {'x': {'default': SourceExpression("len('abc')")}}, 'output': {}}
+{'name': 'f', 'module': 'mod', 'doc': 'The doc of f', 'input': {'a': {}, \
+'b': {'default': 2, 'type': 'int', 'schema': {'type': 'integer'}}}, 'output': {'type': 'string', 'schema': {'type': \
+'string'}}}
+"""
+import ast
+import builtins
+import typing
+
+from i2i.json_schema import json_schema_of_annotation
+from i2i.pymint import (type_name_of_annotation, module_filepaths_of_package, source_filepath_of_module,
+                        parse_mint_doc)
+
+builtin_type_of_name = {name: getattr(builtins, name)
+                        for name in ('str', 'int', 'float', 'bool', 'bytes', 'list', 'tuple', 'set', 'frozenset',
+                                     'dict')}
+type_name_of_annotation_name = {name: type_name_of_annotation(pytype) for name, pytype in builtin_type_of_name.items()}
+DFLT_TYPE_NAME = '{}'
+typing_obj_of_name = {name: getattr(typing, name)
+                      for name in ('Any', 'List', 'Dict', 'Set', 'FrozenSet', 'Tuple', 'Optional', 'Union', 'Literal',
+                                   'Sequence', 'MutableSequence', 'Mapping', 'MutableMapping', 'Iterable', 'Iterator',
+                                   'Collection', 'Generator', 'AbstractSet', 'Annotated')}
+annotation_obj_of_name = dict(builtin_type_of_name, **typing_obj_of_name)
+
+
+class SourceExpression(str):
+    """The source code of an expression that couldn't be evaluated statically"""
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, super().__repr__())
+
+
+def _default_of_node(node):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        return SourceExpression(ast.unparse(node))
+
+
+class _Unresolved(Exception):
+    """Raised when (a part of) an annotation can't be resolved statically"""
+
+
+def _annotation_of_node(node, unresolved):
+    """
+    The annotation object of an annotation node, with the names of builtin types and typing objects (or typing.<name>)
+    resolved by name, and anything else resolved as Any (the nodes of which are appended to unresolved)
+    """
+    if isinstance(node, ast.Constant) and node.value is None:
+        return None
+    if isinstance(node, ast.Name) and node.id in annotation_obj_of_name:
+        return annotation_obj_of_name[node.id]
+    if (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == 'typing'
+            and node.attr in typing_obj_of_name):
+        return typing_obj_of_name[node.attr]
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):  # X | Y
+        return typing.Union[_annotation_of_node(node.left, unresolved), _annotation_of_node(node.right, unresolved)]
+    if isinstance(node, ast.Subscript):
+        origin = _annotation_of_node(node.value, unresolved)
+        arg_nodes = node.slice.elts if isinstance(node.slice, ast.Tuple) else [node.slice]
+        try:
+            if origin is typing.Literal:
+                args = [ast.literal_eval(arg_node) for arg_node in arg_nodes]
+            else:
+                args = [Ellipsis if isinstance(arg_node, ast.Constant) and arg_node.value is Ellipsis
+                        else _annotation_of_node(arg_node, unresolved) for arg_node in arg_nodes]
+            return origin[tuple(args) if len(args) > 1 else args[0]]
+        except (TypeError, ValueError):  # not a generic, or not with these arguments
+            pass
+    unresolved.append(node)
+    return typing.Any
+
+
+def _type_and_schema_of_annotation_node(node):
+    """The 'type' and 'schema' (and if it can't be resolved, the source 'annotation') of an annotation node"""
+    if isinstance(node, ast.Constant) and node.value is None:
+        return {'type': None}
+    unresolved = []
+    annotation = _annotation_of_node(node, unresolved)
+    specs = {'type': type_name_of_annotation(annotation), 'schema': json_schema_of_annotation(annotation)}
+    if unresolved:
+        specs['annotation'] = SourceExpression(ast.unparse(node))
+    return specs
+
+
+def static_mint_of_function_node(node, module_name, ismethod=False, with_parsed_doc=False):
+    """
+    Mint a function from its ast node.
+    :param node: An ast.FunctionDef or ast.AsyncFunctionDef
+    :param module_name: The name of the module the function is defined in
+    :param ismethod: Whether the function is a method (so that its first argument is dropped)
+    :param with_parsed_doc: If True, the summary, description and tags of the parse_mint_doc of the docstring are added
+        to the mint, and its input and output descriptions (and their type, if not given by the signature) too.
+    :return: A (dict) mint
+    """
+    mint = {
+        'name': node.name,
+        'module': module_name,
+        'doc': ast.get_docstring(node, clean=True),
+    }
+    mint['input'], mint['output'] = _input_and_output_of_arguments(node, ismethod)
+    if with_parsed_doc:
+        _add_parsed_doc(mint)
+    return mint
+
+
+def _input_and_output_of_arguments(node, ismethod):
+    arguments = node.args
+    args = arguments.posonlyargs + arguments.args
+    defaults = [None] * (len(args) - len(arguments.defaults)) + list(arguments.defaults)
+    if ismethod and args:
+        args, defaults = args[1:], defaults[1:]
+    input_specs = {}
+    for arg, dflt in zip(args, defaults):
+        input_specs[arg.arg] = {}
+        if dflt is not None:
+            input_specs[arg.arg]['default'] = _default_of_node(dflt)
+        if arg.annotation is not None:
+            input_specs[arg.arg].update(_type_and_schema_of_annotation_node(arg.annotation))
+    output = {}
+    if node.returns is not None:
+        output.update(_type_and_schema_of_annotation_node(node.returns))
+    return input_specs, output
+
+
+def static_mint_of_class_node(node, module_name, with_parsed_doc=False):
+    """
+    Mint a class (as its constructor) from its ast node. See static_mint_of_function_node.
+    """
+    init_node = None
+    for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == '__init__':
+            init_node = item
+    mint = {
+        'name': node.name,
+        'module': module_name,
+        'doc': ast.get_docstring(node, clean=True),
+    }
+    if init_node is not None:
+        mint['input'], _ = _input_and_output_of_arguments(init_node, ismethod=True)
+    else:
+        mint['input'] = {}
+    mint['output'] = {}
+    if with_parsed_doc:
+        _add_parsed_doc(mint)
+    return mint
+
+
+def _add_parsed_doc(mint):
+    parsed_doc = parse_mint_doc(mint['doc'])
+    mint.update(summary=parsed_doc['summary'], description=parsed_doc['description'], tags=parsed_doc['tags'])
+    for arg_name, doc_input in parsed_doc['inputs'].items():
+        if arg_name in mint['input']:
+            input_spec = mint['input'][arg_name]
+            input_spec['description'] = doc_input['description']
+            if 'type' not in input_spec and isinstance(doc_input['type'], str):
+                input_spec['type'] = type_name_of_annotation_name.get(doc_input['type'], DFLT_TYPE_NAME)
+    doc_return = parsed_doc['return']
+    mint['output']['description'] = doc_return.get('description', '')
+    if 'type' not in mint['output'] and isinstance(doc_return.get('type'), str):
+        mint['output']['type'] = type_name_of_annotation_name.get(doc_return['type'], DFLT_TYPE_NAME)
+
+
+def static_mints_of_source(source, module_name, include_private=False, with_parsed_doc=False, filename='<unknown>'):
+    """
+    Mint the functions and classes (minted as their constructor) defined at the top level of some python source.
+    :param source: The python source code
+    :param module_name: The name of the module the source is the code of
+    :param include_private: Whether to include callables whose name starts with an underscore
+    :param with_parsed_doc: Whether to add parsed doc information to the mints (see static_mint_of_function_node)
+    :param filename: The filename to report in syntax errors
+    :return: A list of (dict) mints, sorted by name
+    """
+    tree = ast.parse(source, filename=filename)
+    nodes = {}
+    for node in tree.body:  # later definitions replace earlier ones, as they would at runtime
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if include_private or not node.name.startswith('_'):
+                nodes[node.name] = node
+    mints = []
+    for name, node in sorted(nodes.items()):
+        if isinstance(node, ast.ClassDef):
+            mints.append(static_mint_of_class_node(node, module_name, with_parsed_doc))
+        else:
+            mints.append(static_mint_of_function_node(node, module_name, with_parsed_doc=with_parsed_doc))
+    return mints
+
+
+def static_mint_file(filepath, module_name, include_private=False, with_parsed_doc=False) -> list:
+    """Mint the python source file of a module (see static_mints_of_source)"""
+    with open(filepath, 'rb') as fp:
+        source = fp.read()
+    return static_mints_of_source(source, module_name, include_private, with_parsed_doc, filename=filepath)
+
+
+def static_mint_module(module_name, include_private=False, with_parsed_doc=False) -> list:
+    """
+    Mint a module from its source file, without importing it (its parent packages are imported to find it though).
+    The static equivalent of mint_module.
+    """
+    filepath = source_filepath_of_module(module_name)
+    if filepath is None:
+        raise ValueError("Can't find the python source of module {}".format(module_name))
+    return static_mint_file(filepath, module_name, include_private, with_parsed_doc)
+
+
+def static_mint_package(package_name, include_private=False, with_parsed_doc=False) -> dict:
+    """
+    Mint all the modules of a package from their source files, without importing them (only the parents of the
+    package are imported, to find it). The static equivalent of mint_package.
+    :return: A {module_name: mints, ...} dict, whose items are sorted by module name. Modules that don't have a
+        python source file are skipped.
+    """
+    return {module_name: static_mint_file(filepath, module_name, include_private, with_parsed_doc)
+            for module_name, filepath in module_filepaths_of_package(package_name).items()
+            if filepath is not None and filepath.endswith('.py')}
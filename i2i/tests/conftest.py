@@ -0,0 +1,89 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """
+    Responds to any request with the JSON of the request's method, path, body and headers (keeping connections alive,
+    unless the request asks to close them).
+    Query parameters of the request can ask for a status, an ETag (responding 304 if the request's If-None-Match
+    matches it) and a Cache-Control header, or (with ndjson=n) for a body of n NDJSON records {"i": 0}, {"i": 1}, ...
+    (with a "pad" string of pad=m characters in every record, if asked for).
+    With n_items=n, it's a paged API of items 0, 1, ..., n - 1, whose pages are asked for with limit (default 10) and
+    offset, page (from 1) or cursor parameters, and respond with {'items': [...], 'next_cursor': ...} and a Link header.
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('latin-1') if length else ''
+        self.server.requests.append((self.command, self.path))
+        query = dict(parse_qsl(urlsplit(self.path).query))
+        status = int(query.get('status', 200))
+        if 'etag' in query and self.headers.get('If-None-Match') == query['etag']:
+            status = 304
+        if 'n_items' in query:
+            self._respond_page(query)
+            return
+        if 'ndjson' in query:
+            pad = {'pad': 'x' * int(query['pad'])} if 'pad' in query else {}
+            content = b''.join(json.dumps(dict({'i': i}, **pad)).encode() + b'\n' for i in range(int(query['ndjson'])))
+        else:
+            content = b'' if status == 304 else json.dumps(
+                {'method': self.command, 'path': self.path, 'body': body, 'headers': dict(self.headers)}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/x-ndjson' if 'ndjson' in query else 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        if 'etag' in query:
+            self.send_header('ETag', query['etag'])
+        if 'cache_control' in query:
+            self.send_header('Cache-Control', query['cache_control'])
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _respond_page(self, query):
+        n_items, limit = int(query['n_items']), int(query.get('limit', 10))
+        if 'page' in query:
+            offset = (int(query['page']) - 1) * limit
+        else:
+            offset = int(query.get('cursor', query.get('offset', 0)))
+        next_offset = offset + limit if offset + limit < n_items else None
+        content = json.dumps({'items': list(range(offset, min(offset + limit, n_items))),
+                              'next_cursor': next_offset and str(next_offset)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        if next_offset is not None:
+            next_url = '{}?n_items={}&limit={}&offset={}'.format(urlsplit(self.path).path, n_items, limit, next_offset)
+            self.send_header('Link', '<{}>; rel="next"'.format(next_url))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def end_headers(self):
+        if self.close_connection:  # (so that the client doesn't keep the connection either)
+            self.send_header('Connection', 'close')
+        BaseHTTPRequestHandler.end_headers(self)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    """A local http server (with a requests list attribute, of the (method, path) of the requests it got)"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+    server.daemon_threads = True  # don't wait for kept-alive connections to be closed
+    server.requests = []
+    server.url = 'http://127.0.0.1:{}'.format(server.server_port)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
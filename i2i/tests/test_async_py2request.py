@@ -0,0 +1,61 @@
+import asyncio
+import warnings
+
+import pytest
+
+pytest.importorskip('aiohttp')
+pytest.importorskip('i2')
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.async_py2request import AsyncHttpTransport, AsyncPy2Request
+
+
+def _method_specs(url):
+    return {
+        'echo': {
+            'url_template': url + '/echo/{x}',
+            'input_trans': {'x': lambda x: x * 2},
+            'output_trans': lambda r: r.json(),
+        },
+        'post': {
+            'url': url + '/post',
+            'request_kwargs': {'method': 'POST'},
+            'json_arg_names': ['a'],
+            'output_trans': lambda r: r.status,
+        },
+    }
+
+
+def test_async_py2request(local_server):
+    async def main():
+        async with AsyncPy2Request(_method_specs(local_server.url), max_concurrency=3) as pr:
+            echoes = await asyncio.gather(*[pr.echo(i) for i in range(10)])
+            return echoes, await pr.post(a=1), pr.transport.stats()
+
+    echoes, status, stats = asyncio.run(main())
+    assert [echo['path'] for echo in echoes] == ['/echo/{}'.format(2 * i) for i in range(10)]
+    assert status == 200
+    assert stats == {'requests': 11}
+    assert ('POST', '/post') in local_server.requests
+
+
+def test_async_py2request_concurrency_limit(local_server):
+    async def main():
+        transport = AsyncHttpTransport()
+        pr = AsyncPy2Request(_method_specs(local_server.url), transport=transport, max_concurrency=2)
+        in_flight = []
+        request = transport.request
+
+        async def counting_request(*args, **kwargs):
+            in_flight.append(2 - pr.semaphore._value)
+            return await request(*args, **kwargs)
+
+        transport.request = counting_request
+        await asyncio.gather(*[pr.echo(i) for i in range(8)])
+        await pr.close()  # doesn't close the given transport
+        assert not transport.session.closed
+        await transport.close()
+        return in_flight
+
+    assert max(asyncio.run(main())) == 2
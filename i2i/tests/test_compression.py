@@ -0,0 +1,115 @@
+import asyncio
+import gzip
+import json
+import os
+import warnings
+
+import pytest
+
+from i2i.py2request import compression
+from i2i.py2request.compression import BodyCompressor, body_compressor_of
+
+pytest.importorskip('requests')
+pytest.importorskip('i2')
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request
+    from i2i.py2request.async_py2request import AsyncPy2Request
+
+
+def _method_specs(url, compress=True):
+    return {
+        'post': {'url': url + '/post', 'request_kwargs': {'method': 'POST'}, 'json_arg_names': ['items'],
+                 'output_format': 'json', 'compress': compress},
+        'upload': {'url': url + '/upload', 'request_kwargs': {'method': 'PUT'}, 'args': ['data'],
+                   'url_template': url + '/upload', 'output_format': 'json', 'compress': compress},
+    }
+
+
+def _sent_json(response):
+    body = response['body'].encode('latin-1')  # (the local server echoes the body as a latin-1 str)
+    if response['headers'].get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def test_big_json_bodies_are_compressed(local_server):
+    items = [{'name': 'item', 'value': i} for i in range(1000)]
+    with Py2Request(_method_specs(local_server.url)) as pr:
+        response = pr.post(items=items)
+        assert response['headers']['Content-Encoding'] == 'gzip'
+        assert response['headers']['Content-Type'] == 'application/json'
+        assert response['headers']['Accept-Encoding'] == compression.ACCEPT_ENCODING
+        assert int(response['headers']['Content-Length']) < len(json.dumps(items)) / 5
+        assert _sent_json(response) == {'items': items}
+
+        response = pr.post(items=items[:3])  # too small to compress
+        assert 'Content-Encoding' not in response['headers']
+        assert _sent_json(response) == {'items': items[:3]}
+        assert pr.post.compressor.stats()['compressed'] == 1
+
+
+def test_compression_is_skipped_when_it_does_not_pay_off():
+    compressor = BodyCompressor(min_size=10)
+    random_bytes = os.urandom(10000)
+    request_kwargs = compressor.compressed({'method': 'PUT', 'url': 'http://host', 'data': random_bytes})
+    assert request_kwargs['data'] is random_bytes
+    assert 'Content-Encoding' not in request_kwargs['headers']
+    assert compressor.stats() == {'compressed': 0, 'skipped': 1, 'bytes_in': 0, 'bytes_out': 0}
+
+    request_kwargs = compressor.compressed({'method': 'PUT', 'url': 'http://host', 'data': b'a' * 10000,
+                                            'headers': {'Content-Type': 'text/plain'}})
+    assert gzip.decompress(request_kwargs['data']) == b'a' * 10000
+    assert request_kwargs['headers'] == {'Content-Type': 'text/plain', 'Content-Encoding': 'gzip',
+                                         'Accept-Encoding': compression.ACCEPT_ENCODING}
+
+
+def test_body_compressor_of():
+    assert body_compressor_of(None) is None
+    assert body_compressor_of(True).encoding == 'gzip'
+    assert body_compressor_of({'min_size': 10, 'level': 1}).level == 1
+    compressor = BodyCompressor()
+    assert body_compressor_of(compressor) is compressor
+    with pytest.raises(ValueError):
+        BodyCompressor('lzma')
+    if compression.zstandard is None:
+        with pytest.raises(ModuleNotFoundError):
+            body_compressor_of('zstd')
+    else:
+        compressor = body_compressor_of('zstd')
+        data = compressor.compressed({'json': list(range(1000))})['data']
+        assert json.loads(compression.zstandard.ZstdDecompressor().decompress(data)) == list(range(1000))
+
+
+def test_async_compression(local_server):
+    pytest.importorskip('aiohttp')
+    items = list(range(2000))
+
+    async def main():
+        async with AsyncPy2Request(_method_specs(local_server.url, {'min_size': 100})) as pr:
+            return await pr.post(items=items)
+
+    response = asyncio.run(main())
+    assert response['headers']['Content-Encoding'] == 'gzip'
+    assert response['headers']['Accept-Encoding'] == compression.AIOHTTP_ACCEPT_ENCODING  # (what aiohttp can decode)
+    assert _sent_json(response) == {'items': items}
+
+
+def test_json_bodies_are_serialized_once(monkeypatch):
+    n_dumps = []
+    dumps_json = compression._dumps_json
+    monkeypatch.setattr(compression, '_dumps_json', lambda obj: n_dumps.append(1) or dumps_json(obj))
+    compressor = BodyCompressor(min_size=100)
+    request_kwargs = compressor.compressed({'method': 'POST', 'url': 'http://host', 'json': {'x': 1}})
+    assert 'json' not in request_kwargs and json.loads(request_kwargs['data']) == {'x': 1}
+    assert request_kwargs['headers']['Content-Type'] == 'application/json'
+    assert len(n_dumps) == 1
+
+
+def test_accept_encoding():
+    request_kwargs = {'method': 'GET', 'url': 'http://host'}
+    assert BodyCompressor().compressed(request_kwargs, 'gzip')['headers'] == {'Accept-Encoding': 'gzip'}
+    assert BodyCompressor(accept_encoding='identity').compressed(request_kwargs)['headers'] == {
+        'Accept-Encoding': 'identity'}
+    assert BodyCompressor(accept_encoding=None).compressed(request_kwargs)['headers'] == {}
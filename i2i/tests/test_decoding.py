@@ -0,0 +1,99 @@
+import asyncio
+import json
+import warnings
+
+import pytest
+
+from i2i.py2request import decoding
+from i2i.py2request.decoding import decoder_of, loads_json, loads_ndjson
+
+pytest.importorskip('requests')
+pytest.importorskip('i2')
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request
+    from i2i.py2request.async_py2request import AsyncPy2Request
+
+
+def test_loads():
+    assert loads_json('{"é": [1, 2.5, null]}'.encode()) == {'é': [1, 2.5, None]}
+    assert loads_ndjson(b'{"a": 1}\r\n  \n[2]\n3') == [{'a': 1}, [2], 3]
+    assert loads_ndjson(b'') == []
+    with pytest.raises(ValueError):
+        loads_ndjson(b'{"a": 1}\n{oops}\n')
+
+
+def test_decoder_of():
+    assert decoder_of(None) is None
+    assert decoder_of(len) is len
+    assert decoder_of('ndjson') is loads_ndjson
+    with pytest.raises(ValueError):
+        decoder_of('xml')
+    if decoding.msgpack is None:
+        with pytest.raises(ModuleNotFoundError):
+            decoder_of('msgpack')
+
+
+def _method_specs(url, **method_spec):
+    return {
+        'echo': dict({'url_template': url + '/echo/{x}', 'output_format': 'json'}, **method_spec),
+        'records': {'url_template': url + '/records?ndjson={n}', 'output_format': 'ndjson'},
+    }
+
+
+def test_output_format(local_server):
+    with Py2Request(_method_specs(local_server.url)) as pr:
+        assert pr.echo('a')['path'] == '/echo/a'
+        assert pr.records(3) == [{'i': 0}, {'i': 1}, {'i': 2}]
+    with Py2Request(_method_specs(local_server.url, output_trans=lambda body: body['method'])) as pr:
+        assert pr.echo('a') == 'GET'  # output_trans is applied to the decoded body
+
+
+def test_output_format_with_a_custom_backend_cache_and_pagination(local_server):
+    decoded = []
+
+    def loads(content):
+        decoded.append(content)
+        return json.loads(content)
+
+    method_specs = {
+        'echo': {'url_template': local_server.url + '/echo/{x}', 'output_format': loads, 'cache': True},
+        'items': {'url_template': local_server.url + '/items?n_items={n}', 'output_format': loads,
+                  'paginate': {'items': 'items', 'page_size': 5}},
+    }
+    with Py2Request(method_specs) as pr:
+        assert pr.echo('a') == pr.echo('a')
+        assert list(pr.items(12)) == list(range(12))
+    assert all(isinstance(content, bytes) for content in decoded)
+    assert len(decoded) == 1 + 3  # (the cache has the decoded body)
+
+
+def test_decode_time_is_instrumented(local_server):
+    with Py2Request(_method_specs(local_server.url), instrument=True) as pr:
+        pr.records(100)
+    stats = pr.instrumentation.stats()['records']
+    assert stats['decode']['count'] == 1
+    assert stats['output_trans']['count'] == 0
+
+
+def test_cache_has_decoded_bodies(local_server):
+    method_specs = _method_specs(local_server.url, cache=True, output_trans=lambda body: body['path'])
+    with Py2Request(method_specs, instrument=True) as pr:
+        assert [pr.echo('a'), pr.echo('a'), pr.echo('b')] == ['/echo/a', '/echo/a', '/echo/b']
+        cached_body = pr.echo.cache._get(pr.echo.cache.key_of({'url': local_server.url + '/echo/a'})).value
+        assert cached_body['path'] == '/echo/a'
+    stats = pr.instrumentation.stats()['echo']
+    assert (stats['decode']['count'], stats['output_trans']['count']) == (2, 3)
+
+
+def test_async_output_format(local_server):
+    pytest.importorskip('aiohttp')
+
+    async def main():
+        async with AsyncPy2Request(_method_specs(local_server.url), instrument=True) as pr:
+            return await pr.echo('a'), await pr.records(2), pr.instrumentation.stats()
+
+    echo, records, stats = asyncio.run(main())
+    assert (echo['path'], records) == ('/echo/a', [{'i': 0}, {'i': 1}])
+    assert stats['echo']['decode']['count'] == 1
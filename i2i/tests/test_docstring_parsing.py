@@ -0,0 +1,54 @@
+import inspect
+
+from i2i.pymint import ANY_TYPE, parse_doc, parse_docstring, parse_mint_doc
+from i2i.tests import test_pymint
+
+
+def test_parse_mint_doc_of_test_funcs():
+    d = parse_mint_doc(inspect.getdoc(test_pymint.test_func_1))
+    assert d['summary'] == 'This is the first line,'
+    assert d['tags'] == ['foo', 'bar']
+    assert {name: v['type'] for name, v in d['inputs'].items()} == {
+        'any_var': ANY_TYPE, 'a_list': 'list', 'a_dict': ANY_TYPE, 'an_int': 'int',
+        'a_float': 'float', 'a_bool': ANY_TYPE, 'a_str': 'str'}
+    assert d['inputs']['a_str']['description'].endswith('not of that type line description')
+    assert d['return'] == {'type': 'str', 'description': " Will just return the 'test_func_1 returned' string"}
+
+    d = parse_mint_doc(inspect.getdoc(test_pymint.test_func_2))
+    assert d['tags'] == ['any', 'old', 'tag']
+    assert d['inputs']['a_float'] == {'type': ANY_TYPE, 'description': ''}
+    assert d['return'] == {'type': ANY_TYPE, 'description': ' Just pi'}
+
+
+def test_parse_docstring():
+    d = parse_docstring("""Short.
+
+    Long desc
+    more.
+
+    :param a: first
+        continued
+    :param *args: stuff
+    :returns: something
+        else
+    """)
+    assert d == {
+        'short_description': 'Short.',
+        'long_description': 'Long desc\nmore.',
+        'params': [{'name': 'a', 'doc': 'first\ncontinued\n'}, {'name': '*args', 'doc': 'stuff\n'}],
+        'returns': 'something\nelse',
+    }
+    assert parse_docstring('') == parse_docstring(None) == {
+        'short_description': '', 'long_description': '', 'params': [], 'returns': ''}
+
+
+def test_parse_doc_gives_both_forms():
+    doc = inspect.getdoc(test_pymint.test_func_2)
+    assert parse_doc(doc) == (parse_mint_doc(doc), parse_docstring(doc))
+
+
+def test_colons_in_text_are_not_fields():
+    d = parse_mint_doc('Summary: with a colon\nA url: http://foo.com\n:param x: a: b')
+    assert d['summary'] == 'Summary: with a colon'
+    assert d['description'] == 'A url: http://foo.com'
+    assert d['inputs'] == {'x': {'type': ANY_TYPE, 'description': ' a: b'}}
@@ -0,0 +1,72 @@
+import asyncio
+import inspect
+import threading
+import time
+import warnings
+
+import pytest
+
+from i2i.py2request.fan_out import MappableMethod, fan_out_map
+
+pytest.importorskip('requests')
+pytest.importorskip('i2')
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request
+    from i2i.py2request.async_py2request import AsyncPy2Request
+
+
+def _method_specs(url):
+    return {'echo': {'url_template': url + '/echo/{x}', 'output_trans': lambda r: r.json()['path']}}
+
+
+def test_py2request_methods_have_a_map(local_server):
+    with Py2Request(_method_specs(local_server.url)) as pr:
+        assert isinstance(pr.echo, MappableMethod)
+        assert list(inspect.signature(pr.echo).parameters) == ['x']
+        assert list(pr.echo.map(range(20), max_workers=4)) == ['/echo/{}'.format(i) for i in range(20)]
+        assert sorted(pr.echo.map(range(5), ordered=False)) == sorted('/echo/{}'.format(i) for i in range(5))
+        results = pr.echo.map([{'x': 1}, {'y': 2}], unpack='**')
+        assert list(results)[0] == '/echo/1'
+        (index, error), = results.errors
+        assert (index, type(error)) == (1, KeyError)
+
+
+def test_fan_out_map_is_concurrent_and_bounded():
+    lock = threading.Lock()
+    running, max_running, consumed = [0], [0], []
+
+    def slow(x):
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return x
+
+    def inputs():
+        for i in range(1000):
+            consumed.append(i)
+            yield i
+
+    results = fan_out_map(slow, inputs(), max_workers=4, max_pending=6)
+    assert [next(results) for _ in range(8)] == list(range(8))
+    assert max_running[0] == 4
+    assert len(consumed) <= 8 + 6  # the inputs are consumed as results are
+    results.close()
+
+
+async def _path_of_response(r):
+    return (await r.json())['path']
+
+
+def test_async_py2request_methods_have_an_async_map(local_server):
+    method_specs = {'echo': dict(_method_specs(local_server.url)['echo'], output_trans=_path_of_response)}
+
+    async def main():
+        async with AsyncPy2Request(method_specs) as pr:
+            return [path async for path in pr.echo.map(range(10), max_workers=3)]
+
+    assert asyncio.run(main()) == ['/echo/{}'.format(i) for i in range(10)]
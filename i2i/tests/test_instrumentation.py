@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import warnings
+
+import pytest
+
+from i2i.py2request.instrumentation import STAGES, Histogram, Instrumentation, MethodStats
+
+pytest.importorskip('requests')
+pytest.importorskip('i2')
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request
+    from i2i.py2request.async_py2request import AsyncPy2Request
+
+
+def _method_specs(url):
+    return {
+        'echo': {'url_template': url + '/echo/{x}?status={status}', 'input_trans': {'x': int},
+                 'output_trans': lambda r: r.json()},
+        'post': {'url': url + '/post', 'request_kwargs': {'method': 'POST'}, 'json_arg_names': ['a']},
+        'records': {'url_template': url + '/records?ndjson={n}', 'stream': 'ndjson'},
+    }
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for i in range(1, 1001):
+        histogram.record(i / 1000)
+    stats = histogram.stats()
+    assert (stats['count'], stats['min'], stats['max']) == (1000, 0.001, 1)
+    for percent in (50, 90, 99):
+        assert stats['p{}'.format(percent)] == pytest.approx(percent / 100, rel=0.05)
+    histogram.record(0)
+    assert histogram.percentile(0) == 0
+    assert Histogram().stats()['p50'] is None
+
+
+def test_py2request_instrumentation(local_server):
+    forwarded = []
+    instrumentation = Instrumentation(hooks=[lambda name, measurements: forwarded.append((name, measurements))])
+    with Py2Request(_method_specs(local_server.url), instrument=instrumentation) as pr:
+        for i in range(5):
+            pr.echo(str(i), status=200)
+        pr.echo('0', status=404)
+        pr.post(a='x' * 100)
+        with pytest.raises(ValueError):
+            pr.echo('not a number', status=200)
+        assert list(pr.records(2)) == [{'i': 0}, {'i': 1}]
+
+    stats = pr.instrumentation.stats()
+    assert sorted(stats) == ['echo', 'post', 'records']
+    echo_stats = stats['echo']
+    assert (echo_stats['calls'], echo_stats['statuses'], echo_stats['errors']) == (7, {200: 5, 404: 1},
+                                                                                  {'ValueError': 1})
+    for stage in STAGES:
+        assert echo_stats[stage]['count'] == {'total': 7, 'decode': 0}.get(stage, 6)  # no output_format
+    assert echo_stats['response_bytes']['min'] > 0
+    assert stats['post']['request_bytes']['max'] == len('{"a": "' + 'x' * 100 + '"}')
+    assert stats['post']['output_trans']['count'] == 0
+
+    records_stats = stats['records']
+    assert (records_stats['calls'], records_stats['statuses']) == (1, {200: 1})
+    assert records_stats['time_to_first_byte']['count'] == 1
+    assert records_stats['download']['count'] == records_stats['response_bytes']['count'] == 0  # read when iterated
+
+    assert len(forwarded) == 9
+    name, measurements = forwarded[0]
+    assert name == 'echo' and measurements['status'] == 200 and measurements['total'] > 0
+
+    pr.instrumentation.reset()
+    assert pr.instrumentation.stats()['echo']['calls'] == 0
+
+
+def test_cached_and_paginated_methods_are_instrumented(local_server):
+    method_specs = {
+        'cached': {'url_template': local_server.url + '/cached?x={x}', 'cache': True, 'output_format': 'json'},
+        'items': {'url': local_server.url + '/items?n_items=5', 'paginate': {'style': 'offset', 'page_size': 2,
+                                                                             'items': 'items'}},
+    }
+    with Py2Request(method_specs, instrument=True) as pr:
+        for x in ['a', 'a', 'b', 'a']:
+            assert pr.cached(x)['path'] == '/cached?x=' + x
+        assert list(pr.items()) == [0, 1, 2, 3, 4]
+
+    stats = pr.instrumentation.stats()
+    cached_stats = stats['cached']
+    assert (cached_stats['calls'], cached_stats['cache']) == (4, {'miss': 2, 'hit': 2})
+    assert cached_stats['time_to_first_byte']['count'] == 2  # only misses make requests
+    assert cached_stats['decode']['count'] == 2  # (the cache has the decoded bodies)
+    items_stats = stats['items']
+    assert (items_stats['calls'], items_stats['pages'], items_stats['statuses']) == (1, 3, {200: 3})
+    for key in ('page', 'time_to_first_byte', 'download', 'decode', 'response_bytes'):
+        assert items_stats[key]['count'] == 3
+
+
+def test_method_spec_instrumentation_is_thread_safe():
+    class _Transport(object):
+        def request(self, **request_kwargs):
+            return request_kwargs
+
+    method_stats = MethodStats()
+    pr = Py2Request({'get': {'url_template': 'http://host/{x}', 'instrument': method_stats}}, transport=_Transport())
+    threads = [threading.Thread(target=lambda: [pr.get(i) for i in range(200)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert pr.get.stats is method_stats
+    stats = method_stats.stats()
+    assert stats['calls'] == stats['total']['count'] == stats['url_format']['count'] == 1600
+
+
+def test_async_py2request_instrumentation(local_server):
+    pytest.importorskip('aiohttp')
+
+    async def main():
+        async with AsyncPy2Request(_method_specs(local_server.url), instrument=True) as pr:
+            await asyncio.gather(*[pr.post(a=i) for i in range(10)])
+            return pr.instrumentation.stats()
+
+    stats = asyncio.run(main())['post']
+    assert (stats['calls'], stats['statuses']) == (10, {200: 10})
+    assert stats['time_to_first_byte']['count'] == stats['download']['count'] == 10
+    assert stats['response_bytes']['min'] > 0
+
+
+def test_async_cached_streamed_and_paginated_methods_are_instrumented(local_server):
+    pytest.importorskip('aiohttp')
+    method_specs = dict(_method_specs(local_server.url), **{
+        'cached': {'url_template': local_server.url + '/cached?x={x}', 'cache': True, 'output_format': 'json'},
+        'items': {'url': local_server.url + '/items?n_items=5', 'paginate': {'style': 'cursor', 'page_size': 2,
+                                                                             'items': 'items'}},
+    })
+
+    async def main():
+        async with AsyncPy2Request(method_specs, instrument=True) as pr:
+            for x in ['a', 'a', 'b']:
+                await pr.cached(x)
+            async with await pr.records(3) as records:
+                assert [record async for record in records] == [{'i': 0}, {'i': 1}, {'i': 2}]
+            assert [item async for item in await pr.items()] == [0, 1, 2, 3, 4]
+            return pr.instrumentation.stats()
+
+    stats = asyncio.run(main())
+    assert stats['cached']['cache'] == {'miss': 2, 'hit': 1}
+    assert stats['records']['time_to_first_byte']['count'] == 1
+    assert (stats['items']['pages'], stats['items']['page']['count']) == (3, 3)
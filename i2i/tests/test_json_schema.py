@@ -0,0 +1,131 @@
+import dataclasses
+import enum
+from typing import Any, Dict, List, Literal, NamedTuple, Optional, Set, Tuple, TypedDict, Union
+
+from i2i.json_schema import json_schema_of_annotation
+from i2i.pymint import mint_of_callable
+
+
+class _Color(enum.Enum):
+    red = 1
+    green = 2
+
+
+class _Movie(TypedDict):
+    title: str
+    year: int
+
+
+class _Pair(NamedTuple):
+    key: str
+    value: float = 0.0
+
+
+@dataclasses.dataclass
+class _Node:
+    name: str
+    children: List['_Node'] = dataclasses.field(default_factory=list)
+
+
+def test_json_schema_of_generics():
+    assert json_schema_of_annotation(Dict[str, List[int]]) == {
+        'type': 'object', 'additionalProperties': {'type': 'array', 'items': {'type': 'integer'}}}
+    assert json_schema_of_annotation(dict[str, bool]) == {
+        'type': 'object', 'additionalProperties': {'type': 'boolean'}}
+    assert json_schema_of_annotation(Set[str]) == {'type': 'array', 'uniqueItems': True, 'items': {'type': 'string'}}
+    assert json_schema_of_annotation(Tuple[int, ...]) == {'type': 'array', 'items': {'type': 'integer'}}
+    assert json_schema_of_annotation(Tuple[int, str]) == {
+        'type': 'array', 'prefixItems': [{'type': 'integer'}, {'type': 'string'}], 'minItems': 2, 'maxItems': 2}
+    assert json_schema_of_annotation(Any) == {}
+
+
+def test_json_schema_of_unions_and_literals():
+    assert json_schema_of_annotation(Optional[int]) == {'anyOf': [{'type': 'integer'}, {'type': 'null'}]}
+    assert json_schema_of_annotation(Union[int, str]) == json_schema_of_annotation(int | str)
+    assert json_schema_of_annotation(Literal[1, 'a']) == {'enum': [1, 'a']}
+    assert json_schema_of_annotation(_Color) == {'type': 'integer', 'enum': [1, 2]}
+
+
+def test_json_schema_of_structured_types():
+    assert json_schema_of_annotation(_Movie) == {
+        'type': 'object', 'title': '_Movie', 'properties': {'title': {'type': 'string'}, 'year': {'type': 'integer'}},
+        'required': ['title', 'year']}
+    assert json_schema_of_annotation(_Pair) == {
+        'type': 'array', 'title': '_Pair', 'prefixItems': [{'type': 'string'}, {'type': 'number'}],
+        'minItems': 2, 'maxItems': 2}
+    node_schema = json_schema_of_annotation(_Node)  # a recursive type
+    assert node_schema['required'] == ['name']
+    assert node_schema['properties']['children'] == {'type': 'array', 'items': {}}
+    assert json_schema_of_annotation(_Node) == node_schema  # (the schemas cut in its resolution aren't memoized)
+    assert json_schema_of_annotation(List[_Node]) == {'type': 'array', 'items': node_schema}
+
+    def f(node: _Node):
+        pass
+
+    assert mint_of_callable(f)['input']['node']['schema'] == node_schema
+
+
+def test_json_schema_is_memoized():
+    annotation = Dict[str, Tuple[_Pair, ...]]
+    schema = json_schema_of_annotation(annotation)
+    hits = json_schema_of_annotation.cache_info().hits
+    assert json_schema_of_annotation(annotation) == schema
+    assert json_schema_of_annotation.cache_info().hits == hits + 1
+
+
+def test_json_schemas_can_be_modified():
+    schema = json_schema_of_annotation(List[int])
+    schema['items']['nullable'] = True
+    assert json_schema_of_annotation(List[int]) == {'type': 'array', 'items': {'type': 'integer'}}
+    assert json_schema_of_annotation(int) is not json_schema_of_annotation(int)
+
+
+def test_mint_of_callable_resolves_annotations():
+    def f(x: Optional[List[str]] = None) -> Dict[str, _Color]:
+        pass
+
+    mint = mint_of_callable(f, use_cache=False)
+    assert mint['input']['x'] == {'default': None, 'type': '{}',
+                                  'schema': {'anyOf': [{'type': 'array', 'items': {'type': 'string'}},
+                                                       {'type': 'null'}]}}
+    assert mint['output'] == {'type': 'object', 'schema': {
+        'type': 'object', 'additionalProperties': {'type': 'integer', 'enum': [1, 2]}}}
+
+
+def test_make_openapi_path_uses_the_schemas():
+    from i2i.py2openapi.openapi_gen import make_openapi_path
+
+    def f(a: List[int], b: str = 'b') -> float:
+        pass
+
+    name, path = make_openapi_path(mint_of_callable(f))
+    post = path['post']
+    assert post['requestBody']['content']['application/json']['schema'] == {
+        'type': 'object',
+        'properties': {'a': {'type': 'array', 'items': {'type': 'integer'}, 'nullable': True},
+                       'b': {'type': 'string', 'nullable': True, 'default': 'b'}},
+        'required': ['a']}
+    assert post['responses']['200']['content']['application/json']['schema'] == {'type': 'number'}
+
+
+def test_openapi_specs_have_openapi_3_0_schemas():
+    from i2i.py2openapi.openapi_gen import make_openapi_path
+
+    def f(a: Optional[Tuple[int, str]], b: Tuple[int, int] = (1, 2)) -> Optional[List[float]]:
+        pass
+
+    mint = mint_of_callable(f)
+    name, path = make_openapi_path(mint)
+    post = path['post']
+    properties = post['requestBody']['content']['application/json']['schema']['properties']
+    assert properties == {
+        'a': {'type': 'array', 'items': {'anyOf': [{'type': 'integer'}, {'type': 'string'}]},
+              'minItems': 2, 'maxItems': 2, 'nullable': True},
+        'b': {'type': 'array', 'items': {'type': 'integer'}, 'minItems': 2, 'maxItems': 2, 'nullable': True,
+              'default': (1, 2)}}
+    output_schema = post['responses']['200']['content']['application/json']['schema']
+    assert output_schema == {'type': 'array', 'items': {'type': 'number'}, 'nullable': True}
+    output_schema['description'] = 'the floats'  # (modifying the spec doesn't modify the mints)
+    assert 'description' not in make_openapi_path(mint)[1]['post']['responses']['200']['content'][
+        'application/json']['schema']
+    assert mint['input']['a']['schema']['anyOf'][1] == {'type': 'null'}
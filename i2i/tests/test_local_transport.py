@@ -0,0 +1,91 @@
+import warnings
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('i2')
+
+from requests import HTTPError
+
+from i2i.py2request.local_transport import LocalResponse, LocalTransport
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request
+
+
+def items(n_items, limit=10, offset=0):
+    """The pages of the paged API of the local_server (see conftest), as a function"""
+    n_items, limit, offset = int(n_items), int(limit), int(offset)
+    next_offset = offset + limit if offset + limit < n_items else None
+    return {'items': list(range(offset, min(offset + limit, n_items))), 'next_cursor': next_offset and str(next_offset)}
+
+
+def test_same_method_specs_remote_and_local(local_server):
+    method_specs = {
+        'items': {'url_template': local_server.url + '/items?n_items={n}',
+                  'input_trans': {'n': int}, 'paginate': {'items': 'items', 'page_size': 4}},
+        'page': {'url_template': local_server.url + '/items?n_items={n}&offset={offset}', 'output_format': 'json',
+                 'output_trans': lambda body: body['items']},
+    }
+    with Py2Request(method_specs) as remote, Py2Request(method_specs, transport=LocalTransport([items])) as local:
+        assert list(local.items('10')) == list(remote.items('10')) == list(range(10))
+        assert local.page(5, offset=3) == remote.page(5, offset=3) == [3, 4]
+
+
+def test_objects_are_not_serialized():
+    data = {'x': [1, 2]}
+    transport = LocalTransport({'/users/{user}/data': lambda user, value: (user, value)})
+    method_specs = {'put': {'url_template': 'http://api/users/{user}/data', 'request_kwargs': {'method': 'PUT'},
+                            'json_arg_names': ['value'], 'output_trans': lambda r: r.json()}}
+    user, value = Py2Request(method_specs, transport=transport).put('bob', value=data)
+    assert (user, value) == ('bob', data)
+    assert value is data  # no JSON round-trip
+
+    response = transport.request('GET', 'http://api/users/bob/data', params={'value': 3})
+    assert response.json() == ('bob', 3)
+    assert response.content == b'["bob", 3]'  # serialized only when asked for
+    assert transport.stats() == {'requests': 2}
+
+
+def test_errors():
+    def fail(x):
+        raise ValueError(x)
+
+    transport = LocalTransport([fail])
+    response = transport.request('GET', 'http://api/nothing_here')
+    assert response.status_code == 404
+    with pytest.raises(HTTPError):
+        response.raise_for_status()
+    with pytest.raises(ValueError):
+        transport.request('POST', 'http://api/fail', json={'x': 1})
+    response = LocalTransport([fail], raise_errors=False).request('POST', 'http://api/fail', json={'x': 1})
+    assert (response.status_code, response.json()) == (500, {'error': 'ValueError(1)'})
+
+
+def test_compressed_bodies_and_instrumentation():
+    method_specs = {'total': {'url': 'http://api/total', 'request_kwargs': {'method': 'POST'},
+                              'json_arg_names': ['numbers'], 'output_format': 'json',
+                              'compress': {'min_size': 10}}}
+    with Py2Request(method_specs, transport=LocalTransport({'/total': lambda numbers: sum(numbers)}),
+                    instrument=True) as pr:
+        assert pr.total(numbers=list(range(100))) == 4950
+    stats = pr.instrumentation.stats()['total']
+    assert stats['total']['count'] == stats['decode']['count'] == 1
+    assert stats['response_bytes']['count'] == 0  # (the body isn't serialized to be measured)
+    assert isinstance(LocalResponse(None), LocalResponse) and LocalResponse(None).ok
+
+
+def test_bodies_of_other_encodings():
+    from i2i.py2request import compression
+
+    transport = LocalTransport({'/total': lambda numbers: sum(numbers)})
+    with pytest.raises(ValueError, match="Content-Encoding 'br'"):
+        transport.request('POST', 'http://api/total', data=b'...', headers={'Content-Encoding': 'br'})
+    if compression.zstandard is None:
+        return
+    method_specs = {'total': {'url': 'http://api/total', 'request_kwargs': {'method': 'POST'},
+                              'json_arg_names': ['numbers'], 'output_format': 'json',
+                              'compress': {'encoding': 'zstd', 'min_size': 10}}}
+    with Py2Request(method_specs, transport=transport) as pr:
+        assert pr.total(numbers=list(range(100))) == 4950
@@ -0,0 +1,110 @@
+from i2i.pymint import Mint, Mints, mint_many, mint_of_callable, mint_of_instance_method
+
+
+def _func(a, b: int = 2, c: str = 'hi') -> float:
+    """The summary
+    :param int a: the a
+    """
+    return 3.14
+
+
+class _Obj(object):
+    def __init__(self, x: str):
+        self.x = x
+
+    def meth(self, y: int = 1) -> int:
+        return y
+
+
+def test_mint_is_lazy():
+    mint = Mint(_func)
+    assert mint.arg_names == ['a', 'b', 'c']
+    assert not hasattr(mint, '_doc') and not hasattr(mint, '_input')
+    assert mint.parsed_doc['summary'] == 'The summary'
+    assert mint['input'] == {'a': {}, 'b': {'default': 2, 'type': 'int', 'schema': {'type': 'integer'}},
+                             'c': {'default': 'hi', 'type': 'string', 'schema': {'type': 'string'}}}
+
+
+def test_mint_is_a_mapping_equal_to_the_dict_mint():
+    mint = Mint(_func)
+    assert list(mint) == ['name', 'module', 'doc', 'input', 'output']
+    assert mint == mint_of_callable(_func, use_cache=False)
+    assert dict(mint, name='other')['name'] == 'other'
+
+
+def test_mint_many():
+    minted = mint_many({'f': _func, 'not_callable': 3}, lazy=True)
+    assert isinstance(minted, Mints)
+    assert len(minted) == 1
+    assert minted[0]['name'] == 'f'
+    assert minted[0]['input'] == mint_of_callable(_func)['input']
+
+    minted = mint_many(_Obj, lazy=True)
+    assert [m['name'] for m in minted] == ['meth']
+    assert minted[0] == mint_of_instance_method(_Obj, _Obj.meth)
+
+
+def test_mint_many_makes_dicts_by_default():
+    minted = mint_many(_Obj)
+    assert isinstance(minted, list) and minted == [mint_of_instance_method(_Obj, _Obj.meth)]
+    assert all(type(mint) is dict and type(mint['input']) is dict for mint in minted)
+    minted[0]['input']['y']['default'] = 2  # (dicts can be modified, without changing the shared mints)
+    assert mint_many(_Obj)[0]['input']['y']['default'] == 1
+    assert mint_many({'f': _func})[0]['name'] == 'f'
+
+
+def test_lazy_mints_keep_their_funcs_alive():
+    import gc
+
+    def mk():
+        def f(a, b: int = 2):
+            return a * b
+        return f
+
+    def mk_class():
+        class A(object):
+            def __init__(self, x: str):
+                self.x = x
+
+            def g(self, y=1):
+                return y
+        return A
+
+    mint = mint_many([mk()], lazy=True)[0]
+    class_mint = mint_many(mk_class(), lazy=True)[0]
+    gc.collect()
+    assert dict(mint)['input'] == {'a': {}, 'b': {'default': 2, 'type': 'int', 'schema': {'type': 'integer'}}}
+    assert dict(class_mint['input']) == {'y': {'default': 1}, 'x': {'type': 'string', 'schema': {'type': 'string'}}}
+
+
+class _SubObj(_Obj):
+    @classmethod
+    def from_x(cls, x: str, z=0):
+        return cls(x)
+
+    @staticmethod
+    def static(w, v=2):
+        return w
+
+    @property
+    def prop(self):
+        return self.x
+
+
+def test_class_mints_share_the_constructor_input():
+    minted = mint_many(_SubObj, lazy=True)
+    assert [m['name'] for m in minted] == ['from_x', 'meth', 'static']
+    constructor_input = minted[0].constructor.input
+    for mint in minted:
+        assert mint.constructor is minted[0].constructor
+        assert mint['input'].maps[0] is constructor_input
+    assert dict(minted[1]['input']) == {'y': {'default': 1, 'type': 'int', 'schema': {'type': 'integer'}},
+                                        'x': {'type': 'string', 'schema': {'type': 'string'}}}
+    assert minted[0]['input']['x'] is constructor_input['x']
+
+
+def test_class_mints_keep_the_first_argument_of_staticmethods():
+    from_x, meth, static = mint_many(_SubObj)
+    assert list(static['input']) == ['w', 'v', 'x']
+    assert list(from_x['input']) == ['x', 'z']  # (without cls)
+    assert list(meth['input']) == ['y', 'x']  # (without self)
@@ -0,0 +1,59 @@
+import gc
+
+from i2i.pymint import MintCache, mint_of_callable
+
+
+def _func(a, b: int = 2, c='hi'):
+    """A func to mint"""
+    return a, b, c
+
+
+def test_cache_hits_and_returns_independent_copies():
+    cache = MintCache()
+    mint = cache(_func)
+    mint['input']['a']['default'] = 'corrupted'
+    assert cache(_func) == mint_of_callable(_func, use_cache=False)
+    assert cache.stats()['hits'] == 1
+
+
+def test_cache_invalidation():
+    cache = MintCache()
+
+    def f(x, y: int = 1):
+        return x + y
+
+    cache(f)
+    f.__annotations__['x'] = str
+    assert cache(f)['input']['x'] == {'type': 'string', 'schema': {'type': 'string'}}
+    f.__doc__ = 'New doc'
+    assert cache(f)['doc'] == 'New doc'
+    f.__code__ = (lambda z: z).__code__
+    f.__defaults__ = None
+    assert list(cache(f)['input']) == ['z']
+    assert cache.stats() == {'hits': 0, 'misses': 4, 'invalidations': 3, 'size': 1}
+
+
+def test_cache_of_bound_methods():
+    class A(object):
+        def meth(self, x, y=1):
+            return x
+
+    cache = MintCache()
+    a = A()
+    assert list(cache(a.meth)['input']) == ['x', 'y']
+    assert list(cache(A().meth)['input']) == ['x', 'y']
+    assert list(cache(A.meth)['input']) == ['self', 'x', 'y']
+    assert cache.stats()['hits'] == 1
+
+
+def test_cache_entries_are_weak():
+    cache = MintCache()
+
+    def f(x):
+        return x
+
+    cache(f)
+    assert cache.stats()['size'] == 1
+    del f
+    gc.collect()
+    assert cache.stats()['size'] == 0
@@ -0,0 +1,54 @@
+import sys
+import threading
+
+import pytest
+
+from i2i.pymint import mint_module, mint_package, module_names_of_package
+
+PACKAGE_FILES = {
+    '__init__.py': '',
+    'a.py': 'def f(x, y: int = 1):\n    return x\n\n\ndef _private(z):\n    pass\n',
+    'b.py': 'import threading\n\n\nclass B(object):\n    def __init__(self, lock=threading.Lock()):\n        pass\n',
+    'sub/__init__.py': 'def g(a: str) -> str:\n    return a\n',
+    'sub/c.py': 'from ..a import f\n\n\ndef h():\n    pass\n',
+    'broken.py': 'import this_module_does_not_exist\n',
+}
+
+
+@pytest.fixture
+def package_name(tmp_path, monkeypatch):
+    for filepath, content in PACKAGE_FILES.items():
+        (tmp_path / 'mint_pkg' / filepath).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / 'mint_pkg' / filepath).write_text(content)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield 'mint_pkg'
+    for module_name in [name for name in sys.modules if name.startswith('mint_pkg')]:
+        del sys.modules[module_name]
+
+
+def test_module_names_of_package(package_name):
+    assert module_names_of_package(package_name) == [
+        'mint_pkg', 'mint_pkg.a', 'mint_pkg.b', 'mint_pkg.broken', 'mint_pkg.sub', 'mint_pkg.sub.c']
+
+
+def test_mint_module(package_name):
+    assert [m['name'] for m in mint_module('mint_pkg.a')] == ['f']
+    assert [m['name'] for m in mint_module('mint_pkg.a', include_private=True)] == ['_private', 'f']
+    assert [m['name'] for m in mint_module('mint_pkg.sub.c')] == ['h']  # f is imported, not defined, there
+    assert list(mint_module('mint_pkg.b')[0]['input']) == ['lock']
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_mint_package(package_name, max_workers):
+    with pytest.raises(ModuleNotFoundError):
+        mint_package(package_name, max_workers=max_workers)
+    with pytest.warns(UserWarning, match='mint_pkg.broken'):
+        minted = mint_package(package_name, max_workers=max_workers, skip_errors=True)
+    assert {module_name: [m['name'] for m in mints] for module_name, mints in minted.items()} == {
+        'mint_pkg': [], 'mint_pkg.a': ['f'], 'mint_pkg.b': ['B'], 'mint_pkg.sub': ['g'], 'mint_pkg.sub.c': ['h']}
+    assert list(minted) == sorted(minted)
+    lock_default = minted['mint_pkg.b'][0]['input']['lock']['default']
+    if max_workers == 1:
+        assert isinstance(lock_default, type(threading.Lock()))
+    else:  # locks can't be pickled back from the worker processes
+        assert isinstance(lock_default, str)
@@ -0,0 +1,120 @@
+import os
+import sys
+
+import pytest
+
+from i2i.mint_registry import MintRegistry
+
+
+@pytest.fixture
+def module_dir(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    sys.modules.pop('registry_mod', None)
+
+
+def _write_module(module_dir, src, mtime_ns=None):
+    filepath = module_dir / 'registry_mod.py'
+    filepath.write_text(src)
+    if mtime_ns is not None:
+        os.utime(filepath, ns=(mtime_ns, mtime_ns))
+    sys.modules.pop('registry_mod', None)
+
+
+@pytest.mark.parametrize('validate', ['mtime', 'hash'])
+def test_registry_only_imports_stale_modules(module_dir, tmp_path, validate):
+    registry = MintRegistry(str(tmp_path / 'mints.sqlite'), validate=validate)
+    _write_module(module_dir, 'def f(x, y=(1, 2)):\n    pass\n', mtime_ns=10 ** 18)
+    mints = registry.mints_of_module('registry_mod')
+    assert [m['name'] for m in mints] == ['f']
+    assert mints[0]['input']['y'] == {'default': [1, 2]}  # as it will be when loaded from the registry
+    assert 'registry_mod' in sys.modules
+
+    sys.modules.pop('registry_mod')
+    assert registry.mints_of_module('registry_mod') == mints
+    assert 'registry_mod' not in sys.modules  # the module wasn't imported to get its mints
+    assert registry.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+    # same content, other mtime: stale with 'mtime', but not with 'hash'
+    _write_module(module_dir, 'def f(x, y=(1, 2)):\n    pass\n', mtime_ns=2 * 10 ** 18)
+    registry.mints_of_module('registry_mod')
+    assert ('registry_mod' in sys.modules) == (validate == 'mtime')
+
+    _write_module(module_dir, 'def g(z):\n    pass\n', mtime_ns=3 * 10 ** 18)
+    assert [m['name'] for m in registry.mints_of_module('registry_mod')] == ['g']
+
+
+def test_registry_persists(module_dir, tmp_path):
+    _write_module(module_dir, 'def f(x):\n    pass\n')
+    MintRegistry(str(tmp_path / 'mints.sqlite')).mints_of_module('registry_mod')
+    registry = MintRegistry(str(tmp_path / 'mints.sqlite'))
+    assert [m['name'] for m in registry.mints_of_module('registry_mod')] == ['f']
+    assert registry.stats() == {'hits': 1, 'misses': 0, 'size': 1}
+
+
+def test_invalid_validate():
+    with pytest.raises(ValueError):
+        MintRegistry(':memory:', validate='ctime')
+
+
+def test_file_changed_while_minting_is_stale(module_dir, tmp_path, monkeypatch):
+    from i2i import mint_registry
+
+    mint_modules = mint_registry.mint_modules
+
+    def mint_modules_while_file_changes(*args, **kwargs):
+        minted = mint_modules(*args, **kwargs)
+        _write_module(module_dir, 'def g(z):\n    pass\n', mtime_ns=2 * 10 ** 18)
+        return minted
+
+    _write_module(module_dir, 'def f(x):\n    pass\n', mtime_ns=10 ** 18)
+    registry = MintRegistry(str(tmp_path / 'mints.sqlite'))
+    monkeypatch.setattr(mint_registry, 'mint_modules', mint_modules_while_file_changes)
+    assert [m['name'] for m in registry.mints_of_module('registry_mod')] == ['f']
+    monkeypatch.setattr(mint_registry, 'mint_modules', mint_modules)
+    assert [m['name'] for m in registry.mints_of_module('registry_mod')] == ['g']  # and not the stored f
+
+
+def test_openapi_spec_of_modules(module_dir, tmp_path):
+    pytest.importorskip('yaml')
+    from i2i.py2openapi.openapi_gen import make_openapi_spec_of_modules
+
+    _write_module(module_dir, 'def f(x: int):\n    pass\n')
+    registry = MintRegistry(str(tmp_path / 'mints.sqlite'))
+    spec = make_openapi_spec_of_modules(['registry_mod'], 'Mods', registry)
+    sys.modules.pop('registry_mod')
+    assert make_openapi_spec_of_modules(['registry_mod'], 'Mods', registry) == spec
+    assert 'registry_mod' not in sys.modules  # the spec was made from the registry
+    assert spec['info']['title'] == 'Mods' and list(spec['paths']) == ['f']
+
+
+def test_mints_of_another_format_are_stale(module_dir, tmp_path, monkeypatch):
+    from i2i import mint_registry
+
+    _write_module(module_dir, 'def f(x):\n    pass\n')
+    registry = MintRegistry(str(tmp_path / 'mints.sqlite'))
+    registry.mints_of_module('registry_mod')
+    monkeypatch.setattr(mint_registry, 'MINT_FORMAT_VERSION', mint_registry.MINT_FORMAT_VERSION + 1)
+    sys.modules.pop('registry_mod')
+    registry.mints_of_module('registry_mod')
+    assert 'registry_mod' in sys.modules  # (re-minted)
+    assert registry.stats() == {'hits': 0, 'misses': 2, 'size': 1}
+
+
+def test_registries_without_format_versions_are_emptied(module_dir, tmp_path):
+    import sqlite3
+
+    filepath = str(tmp_path / 'mints.sqlite')
+    _write_module(module_dir, 'def f(x):\n    pass\n')
+    with sqlite3.connect(filepath) as conn:
+        conn.execute('CREATE TABLE module_mints (module TEXT NOT NULL, include_private INTEGER NOT NULL, '
+                     'filepath TEXT NOT NULL, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, hash TEXT NOT NULL, '
+                     'mints TEXT NOT NULL, PRIMARY KEY (module, include_private))')
+        stat = os.stat(module_dir / 'registry_mod.py')
+        conn.execute('INSERT INTO module_mints VALUES (?, ?, ?, ?, ?, ?, ?)',
+                     ('registry_mod', 0, str(module_dir / 'registry_mod.py'), stat.st_mtime_ns, stat.st_size, '',
+                      '[{"name": "old"}]'))
+    conn.close()
+    registry = MintRegistry(filepath)
+    assert registry.stats()['size'] == 0
+    assert [m['name'] for m in registry.mints_of_module('registry_mod')] == ['f']
@@ -0,0 +1,165 @@
+import inspect
+import json
+import os
+import warnings
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('i2')
+yaml = pytest.importorskip('yaml')
+
+from i2i.py2openapi.openapi_gen import make_and_save_openapi_yaml, make_openapi_spec
+from i2i.py2request.local_transport import LocalTransport
+from i2i.py2request.openapi_client import (cached_client_module, client_module_code, method_specs_of_openapi,
+                                           write_client_module)
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request
+
+
+def add(a: int, b: int = 2) -> int:
+    """Add a and b"""
+    return a + b
+
+
+def greet(name: str, greeting='Hello'):
+    return '{}, {}!'.format(greeting, name)
+
+
+def _users_spec(url):
+    return {
+        'openapi': '3.0.2',
+        'info': {'title': 'users', 'version': '1'},
+        'servers': [{'url': '{root}/v1', 'variables': {'root': {'default': url}}}],
+        'components': {'parameters': {'fields': {'name': 'fields', 'in': 'query'}}},
+        'paths': {
+            '/users/{user-id}': {
+                'parameters': [{'name': 'user-id', 'in': 'path', 'required': True}],
+                'get': {'summary': 'A user', 'parameters': [{'$ref': '#/components/parameters/fields'}],
+                        'responses': {'200': {'content': {'application/json; charset=utf-8': {}}}}},
+                'delete': {'operationId': 'close', 'responses': {'204': {}}},  # (close is a method of clients)
+            },
+        },
+    }
+
+
+def test_method_specs_of_make_openapi_spec(tmp_path):
+    openapi_spec = make_openapi_spec([add, greet], 'api', url='http://localhost:3000')
+    method_specs = method_specs_of_openapi(openapi_spec)
+    assert method_specs['add'] == {'url_template': 'http://localhost:3000/add', 'request_kwargs': {'method': 'POST'},
+                                   'args': ['a'], 'json_arg_names': ['a', 'b'], 'output_format': 'json'}
+    pr = Py2Request(method_specs, transport=LocalTransport([add, greet]))
+    assert (pr.add(1), pr.add(1, b=3), pr.greet('you', greeting='Hi')) == (3, 4, 'Hi, you!')
+
+    make_and_save_openapi_yaml([add, greet], 'api', target_path=str(tmp_path / 'openapi.yml'),
+                               url='http://localhost:3000')
+    method_specs = method_specs_of_openapi(str(tmp_path / 'openapi.yml'))  # (yaml sorts the properties)
+    assert sorted(method_specs['greet']['json_arg_names']) == ['greeting', 'name']
+    assert Py2Request(method_specs, transport=LocalTransport([greet])).greet('you') == 'Hello, you!'
+
+
+def test_path_and_query_parameters(local_server):
+    openapi_spec = _users_spec(local_server.url)
+    with Py2Request(method_specs_of_openapi(openapi_spec)) as pr:
+        assert pr.get_users_user_id('bob')['path'] == '/v1/users/bob'
+        assert pr.get_users_user_id('bob', fields='name')['path'] == '/v1/users/bob?fields=name'
+        assert pr.close_('bob').status_code == 200
+
+
+def test_client_module(tmp_path, local_server):
+    openapi_path = str(tmp_path / 'openapi.yaml')
+    with open(openapi_path, 'w') as fp:
+        yaml.dump(_users_spec(local_server.url), fp)
+    module = cached_client_module(openapi_path, str(tmp_path / 'users_client.py'), class_name='Users')
+    with module.Users() as users:
+        assert str(inspect.signature(users.get_users_user_id)) == '(user_id, fields=None)'
+        assert users.get_users_user_id.__doc__ == 'A user'
+        assert users.get_users_user_id('bob', fields='name')['path'] == '/v1/users/bob?fields=name'
+        assert users.close_('bob').status_code == 200
+    local_client = module.Users(base_url='', transport=LocalTransport({'/users/{user_id}': lambda user_id: user_id}))
+    assert local_client.get_users_user_id('bob') == 'bob'
+
+
+def test_names_that_arent_identifiers_or_collide(tmp_path):
+    def book(**kwargs):
+        return kwargs
+
+    openapi_spec = {
+        'openapi': '3.0.2',
+        'info': {'title': 'trips', 'version': '1'},
+        'paths': {'/book': {'post': {
+            'operationId': 'book',
+            'parameters': [{'name': 'params', 'in': 'query'}, {'name': 'response', 'in': 'query'}],
+            'requestBody': {'content': {'application/json': {'schema': {
+                'type': 'object', 'required': ['from'],
+                'properties': {'from': {}, 'class': {}, 'self': {}, '_json': {}, 'to-city': {}}}}}},
+            'responses': {'200': {'content': {'application/json': {}}}}}}},
+    }
+    method_specs = method_specs_of_openapi(openapi_spec, base_url='')
+    assert method_specs['book']['json_arg_names'] == {'from_': 'from', 'class_': 'class', 'self_': 'self',
+                                                      '_json_': '_json', 'to_city': 'to-city'}
+    kwargs = dict(class_='first', self_='me', _json_='j', to_city='Rome', params='p', response='r')
+    expected = {'from': 'Paris', 'class': 'first', 'self': 'me', '_json': 'j', 'to-city': 'Rome', 'params': 'p',
+                'response': 'r'}
+    transport = LocalTransport([book])
+    assert Py2Request(method_specs, transport=transport).book('Paris', **kwargs) == expected
+
+    openapi_path = str(tmp_path / 'trips.json')
+    with open(openapi_path, 'w') as fp:
+        json.dump(openapi_spec, fp)
+    module = cached_client_module(openapi_path, str(tmp_path / 'trips_client.py'), base_url='')
+    assert module.Client(transport=transport).book('Paris', **kwargs) == expected
+
+
+def test_args_and_methods_that_would_have_the_same_names():
+    def item(**kwargs):
+        return kwargs
+
+    openapi_spec = {
+        'openapi': '3.0.2',
+        'info': {'title': 'items', 'version': '1'},
+        'paths': {
+            '/items/{name}': {'put': {
+                'operationId': 'transport',
+                'parameters': [{'name': 'name', 'in': 'path', 'required': True},
+                               {'name': 'name', 'in': 'query', 'required': True}],
+                'requestBody': {'content': {'application/json': {'schema': {
+                    'type': 'object', 'required': ['name'], 'properties': {'name': {}, 'size': {}}}}}},
+                'responses': {'200': {'content': {'application/json': {}}}}}},
+            '/base': {'get': {'operationId': 'base_url'}},
+        },
+    }
+    method_specs = method_specs_of_openapi(openapi_spec, base_url='')
+    assert sorted(method_specs) == ['base_url_', 'transport_']
+    assert method_specs['transport_']['args'] == ['name', 'query_name', 'body_name']
+    assert method_specs['transport_']['json_arg_names'] == {'body_name': 'name', 'size': 'size'}
+    client = Py2Request(method_specs, transport=LocalTransport({'/items/{name}': item}))
+    assert client.transport_('a', 'b', 'c', size=1) == {'name': 'c', 'size': 1}  # (the body's name wins)
+    assert isinstance(client.transport, LocalTransport)
+
+
+def test_cached_client_module(tmp_path):
+    openapi_path = str(tmp_path / 'openapi.json')
+    module_path = str(tmp_path / 'api_client.py')
+    with open(openapi_path, 'w') as fp:
+        fp.write(json.dumps(make_openapi_spec([add], 'api', url='http://localhost:3000')))
+    module = cached_client_module(openapi_path, module_path)
+    assert module.Client(transport=LocalTransport([add])).add(1, b=1) == 2
+    assert '_json = {' in client_module_code(openapi_path)
+    with open(write_client_module(openapi_path, str(tmp_path / 'other.py'), class_name='Other')) as fp:
+        assert 'class Other(Py2Request):' in fp.read()
+
+    os.utime(openapi_path, (0, 0))  # the module isn't written again if the document didn't change...
+    with open(module_path, 'a') as fp:
+        fp.write('\nNOT_WRITTEN_AGAIN = True\n')
+    assert cached_client_module(openapi_path, module_path).NOT_WRITTEN_AGAIN
+    os.utime(module_path, (0, 0))  # ... but it is if it did
+    os.utime(openapi_path, (1, 1))
+    assert not hasattr(cached_client_module(openapi_path, module_path), 'NOT_WRITTEN_AGAIN')
+
+    # nor if it was written with another class_name or base_url
+    assert cached_client_module(openapi_path, module_path, class_name='Api').Api
+    assert cached_client_module(openapi_path, module_path, class_name='Api', base_url='http://other').BASE_URL == (
+        'http://other')
@@ -0,0 +1,53 @@
+from i2i.pymint import Mint, fingerprint_of_mint, mint_many, mint_of_callable
+from i2i.py2openapi.openapi_gen import make_openapi_spec, make_openapi_spec_incrementally
+
+
+def _f(a, b: int = 2) -> str:
+    """The f"""
+
+
+def _g(x: float):
+    pass
+
+
+def _h():
+    pass
+
+
+def test_fingerprint_of_mint():
+    assert fingerprint_of_mint(mint_of_callable(_f)) == Mint(_f).fingerprint
+    assert mint_many([_f], lazy=True)[0].fingerprint == Mint(_f).fingerprint
+
+    def reordered_f(b: int = 2, a=None) -> str:  # same inputs, in another order
+        """The f"""
+
+    reordered_f.__name__ = '_f'
+    assert fingerprint_of_mint(mint_of_callable(reordered_f)) != Mint(_f).fingerprint
+    assert Mint(_f).renamed('other').fingerprint != Mint(_f).fingerprint
+
+
+def test_make_openapi_spec():
+    spec = make_openapi_spec([_f, _g], 'api', api_version='1.2', bad_request_description='Bad!')
+    assert spec['info']['version'] == '1.2'
+    assert list(spec['paths']) == ['_f', '_g']
+    assert spec['paths']['_g']['post']['responses']['400']['description'] == 'Bad!'
+
+
+def test_make_openapi_spec_incrementally():
+    spec, fingerprints = make_openapi_spec_incrementally(mint_many([_f, _g], lazy=True), 'api')
+    assert spec == make_openapi_spec([_f, _g], 'api')
+
+    def changed_g(x: float, y=1):
+        pass
+
+    changed_g.__name__ = '_g'
+    new_spec, new_fingerprints = make_openapi_spec_incrementally(mint_many([changed_g, _h], lazy=True), 'api', spec,
+                                                                 fingerprints)
+    assert list(new_spec['paths']) == ['_g', '_h']  # _f was removed, _h added
+    assert new_spec == make_openapi_spec([changed_g, _h], 'api')
+    assert new_fingerprints['_g'] != fingerprints['_g']
+
+    same_spec, same_fingerprints = make_openapi_spec_incrementally(
+        mint_many([changed_g, _h], lazy=True), 'api', new_spec, new_fingerprints)
+    assert same_fingerprints == new_fingerprints
+    assert all(same_spec['paths'][name] is new_spec['paths'][name] for name in ['_g', '_h'])
@@ -0,0 +1,153 @@
+import asyncio
+import time
+import warnings
+
+import pytest
+
+from i2i.py2request.pagination import AsyncPaginatedItems, PaginatedItems, Pagination, pagination_of
+
+pytest.importorskip('requests')
+pytest.importorskip('i2')
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request
+    from i2i.py2request.async_py2request import AsyncPy2Request
+
+
+def _method_specs(url, paginate, **method_spec):
+    return {'items': dict({'url_template': url + '/items?n_items={n}', 'paginate': paginate}, **method_spec)}
+
+
+@pytest.mark.parametrize('paginate', [
+    {'style': 'offset', 'items': 'items', 'page_size': 7},
+    {'style': 'offset', 'items': 'items'},  # until an empty page
+    {'style': 'page', 'items': 'items', 'page_size': 7, 'prefetch': 3},
+    {'style': 'cursor', 'items': 'items', 'page_size': 7, 'prefetch': 0},
+    {'style': 'link', 'items': lambda body: body['items'], 'page_size': 7},
+])
+def test_paginated_items(local_server, paginate):
+    with Py2Request(_method_specs(local_server.url, paginate)) as pr:
+        items = pr.items(50)
+        assert isinstance(items, PaginatedItems)
+        assert list(items) == list(range(50))
+        assert items.n_pages >= 6
+
+
+def test_output_trans_is_applied_to_items(local_server):
+    paginate = {'style': 'cursor', 'items': 'items', 'max_pages': 2}
+    with Py2Request(_method_specs(local_server.url, paginate, output_trans=str)) as pr:
+        assert list(pr.items(50)) == [str(i) for i in range(20)]
+
+
+class _SlowPages(object):
+    """A transport of a paged API of 5 pages of 2 items, taking delay seconds per page"""
+
+    class _Response(object):
+        def __init__(self, body):
+            self.body = body
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return self.body
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.n_requests = 0
+
+    def request(self, **request_kwargs):
+        self.n_requests += 1
+        time.sleep(self.delay)
+        offset = request_kwargs['params']['offset']
+        return self._Response([i for i in range(offset, offset + 2) if i < 10])
+
+
+def test_next_pages_are_prefetched():
+    transport = _SlowPages(delay=0.02)
+    pr = Py2Request({'items': {'url': 'http://host/items', 'paginate': {'page_size': 2, 'prefetch': 2}}},
+                    transport=transport)
+    items = pr.items()
+    assert next(items) == 0
+    time.sleep(0.1)  # the next pages are fetched while the first one is consumed
+    assert transport.n_requests == 4  # the first one, the prefetched ones, and the one waiting for room in the queue
+    tic = time.perf_counter()
+    assert [next(items) for _ in range(5)] == [1, 2, 3, 4, 5]
+    assert time.perf_counter() - tic < 0.02
+    items.close()
+    items._thread.join(1)
+    assert not items._thread.is_alive()
+    assert transport.n_requests <= 5  # no more pages are fetched once closed
+
+
+def test_abandoned_items_stop_fetching():
+    import gc
+
+    transport = _SlowPages(delay=0)
+    pr = Py2Request({'items': {'url': 'http://host/items', 'paginate': {'page_size': 2, 'prefetch': 1}}},
+                    transport=transport)
+    items = pr.items()
+    assert items._thread is None  # (nothing is fetched until the first iteration)
+    for item in items:
+        break
+    thread = items._thread
+    del items, item
+    gc.collect()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert transport.n_requests < 5
+
+
+def test_pagination_of():
+    assert pagination_of(None) is None
+    assert pagination_of('link').style == 'link'
+    pagination = Pagination('page')
+    assert pagination_of(pagination) is pagination
+    with pytest.raises(ValueError):
+        Pagination('random')
+    with pytest.raises(ValueError):
+        Py2Request({'items': {'url': 'http://host/items', 'paginate': 'offset', 'stream': True}})
+
+
+def test_async_paginated_items(local_server):
+    pytest.importorskip('aiohttp')
+    paginate = {'style': 'link', 'items': 'items', 'page_size': 7, 'prefetch': 2}
+
+    async def main():
+        async with AsyncPy2Request(_method_specs(local_server.url, paginate)) as pr:
+            items = await pr.items(50)
+            assert isinstance(items, AsyncPaginatedItems)
+            all_items = [item async for item in items]
+            async with await pr.items(50) as items:
+                first_items = [await items.__anext__() for _ in range(3)]
+            return all_items, first_items
+
+    all_items, first_items = asyncio.run(main())
+    assert all_items == list(range(50))
+    assert first_items == [0, 1, 2]
+
+
+def test_async_paginated_items_are_closed():
+    closed = []
+
+    async def send(**request_kwargs):
+        return request_kwargs
+
+    async def pages():
+        try:
+            for i in range(100):
+                yield [i]
+        finally:
+            closed.append(True)
+
+    async def main():
+        items = AsyncPaginatedItems(send, {'url': 'http://host/items'}, Pagination(prefetch=1))
+        items._pages = pages()
+        assert await items.__anext__() == 0
+        await items.aclose()
+        assert closed == [True]  # the pages are closed by the time aclose returns
+        with pytest.raises(StopAsyncIteration):
+            await items.__anext__()
+
+    asyncio.run(main())
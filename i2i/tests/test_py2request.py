@@ -0,0 +1,121 @@
+import gc
+import warnings
+import weakref
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('i2')
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request
+from i2i.py2request.transport import HttpTransport
+
+
+def _method_specs(url):
+    return {
+        'echo': {
+            'url_template': url + '/echo/{x}',
+            'output_trans': lambda r: r.json(),
+        },
+        'post': {
+            'url': url + '/post',
+            'request_kwargs': {'method': 'POST'},
+            'json_arg_names': ['a', 'b'],
+            'output_trans': lambda r: r.json(),
+        },
+    }
+
+
+def test_py2request_methods(local_server):
+    with Py2Request(_method_specs(local_server.url)) as pr:
+        assert pr.echo('hi')['path'] == '/echo/hi'
+        assert pr.echo(x=3)['path'] == '/echo/3'
+        response = pr.post(a=1, b='b')
+        assert (response['method'], response['body']) == ('POST', '{"a": 1, "b": "b"}')
+
+
+def test_py2request_keeps_connections_alive(local_server):
+    pr = Py2Request(_method_specs(local_server.url))
+    for i in range(5):
+        pr.echo(i)
+    stats = pr.transport.stats()
+    assert stats['requests'] == 5
+    pool_stats, = stats['pools'].values()
+    assert (pool_stats['connections'], pool_stats['requests'], pool_stats['idle']) == (1, 5, 1)
+    pr.close()
+
+
+def test_shared_transport(local_server):
+    with HttpTransport(pool_maxsize=2, pool_maxsize_of_host={local_server.url: 3}, keep_alive=False) as transport:
+        pr1 = Py2Request(_method_specs(local_server.url), transport=transport)
+        pr2 = Py2Request(_method_specs(local_server.url), transport=transport)
+        pr1.echo(1)
+        pr2.echo(2)
+        pr1.close()  # doesn't close the shared transport
+        assert pr2.echo(3)['headers']['Connection'] == 'close'
+        stats = transport.stats()
+        assert stats['requests'] == 3
+        pool_stats, = stats['pools'].values()
+        assert (pool_stats['maxsize'], pool_stats['connections'], pool_stats['idle']) == (3, 3, 0)  # none reused
+        assert [pr2.echo(i) for i in range(10)]  # (a pool of closed connections doesn't run out of slots)
+
+
+class _RecordingTransport(object):
+    def request(self, **request_kwargs):
+        return request_kwargs
+
+
+def test_calls_get_their_own_request_kwargs():
+    method_specs = {'post': {'url_template': 'http://host/{x}', 'json_arg_names': ['body'],
+                             'request_kwargs': {'method': 'POST', 'headers': {'h': 'v'}}}}
+    pr = Py2Request(method_specs, transport=_RecordingTransport())
+    assert pr.post(1, body='b') == {'method': 'POST', 'headers': {'h': 'v'}, 'url': 'http://host/1',
+                                    'json': {'body': 'b'}}
+    assert pr.post(2) == {'method': 'POST', 'headers': {'h': 'v'}, 'url': 'http://host/2'}  # no json left over
+    assert method_specs['post']['request_kwargs'] == {'method': 'POST', 'headers': {'h': 'v'}}
+
+    results = pr.post.map([{'x': i, 'body': i} for i in range(2000)], max_workers=16, unpack='**')
+    assert all(r['url'] == 'http://host/{}'.format(i) and r['json'] == {'body': i} for i, r in enumerate(results))
+
+
+def test_class_of_specs(local_server):
+    method_specs = dict(_method_specs(local_server.url), **{
+        'endpoint_{}'.format(i): {'url_template': local_server.url + '/endpoint_{}/{{x}}'.format(i)}
+        for i in range(1000)})
+    Api = Py2Request.class_of_specs(method_specs)
+    assert Py2Request.class_of_specs(method_specs) is Api
+    transport = HttpTransport()
+    apis = [Api(transport=transport) for _ in range(100)]
+    assert all(not api.__dict__.keys() & method_specs.keys() for api in apis)  # no methods are made yet
+    assert Api.__dict__['echo']._func is None
+
+    assert apis[0].echo('a')['path'] == '/echo/a'
+    assert apis[1].post(a=1, b=2)['body'] == '{"a": 1, "b": 2}'
+    assert apis[2].echo.__func__ is apis[0].echo.__func__  # the function is shared
+    assert [result['path'] for result in Api.echo.map(apis[0], ['b', 'c'])] == ['/echo/b', '/echo/c']
+    assert Api.__dict__['endpoint_0']._func is None
+    assert all(not api.__dict__.keys() & method_specs.keys() for api in apis)  # instances don't keep methods
+
+    with pytest.raises(ValueError):
+        Py2Request.class_of_specs({'close': {'url': local_server.url}})
+
+
+def test_class_of_specs_with_instrumentation(local_server):
+    Api = Py2Request.class_of_specs(_method_specs(local_server.url))
+    api, instrumented_api = Api(), Api(instrument=True)
+    api.echo('a')
+    instrumented_api.echo('a')
+    assert instrumented_api.echo.__func__ is not api.echo.__func__
+    assert instrumented_api.instrumentation.stats()['echo']['calls'] == 1
+    other_api = Api(instrument=instrumented_api.instrumentation)  # (the functions of an instrumentation are shared)
+    assert other_api.echo.__func__ is instrumented_api.echo.__func__
+
+
+def test_classes_of_specs_are_not_kept_when_unused():
+    Api = Py2Request.class_of_specs({'search': {'url_template': 'http://host/search?q={query}'}})
+    api_ref = weakref.ref(Api)
+    del Api
+    gc.collect()
+    assert api_ref() is None
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+import warnings
+
+import pytest
+
+from i2i.py2request.rate_limit import AdaptiveConcurrency, HostLimits, TokenBucket, token_bucket_of
+
+pytest.importorskip('requests')
+pytest.importorskip('i2')
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request
+from i2i.py2request.transport import HttpTransport
+
+
+class _Clock(object):
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+def test_token_bucket():
+    clock = _Clock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [bucket.reserve() for _ in range(5)] == [0, 0, 0, 0.5, 1.0]
+    clock.time = 10  # the bucket refills, up to burst tokens
+    assert [bucket.reserve() for _ in range(4)] == [0, 0, 0, 0.5]
+    assert bucket.stats()['requests'] == 9
+
+
+def test_token_bucket_of():
+    assert token_bucket_of(None) is None
+    assert (token_bucket_of(5).rate, token_bucket_of(5).burst) == (5, 5)
+    assert token_bucket_of({'rate': 0.5}).burst == 1
+    bucket = TokenBucket(3)
+    assert token_bucket_of(bucket) is bucket
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_adaptive_concurrency_adapts_the_limit():
+    clock = _Clock()
+    concurrency = AdaptiveConcurrency(initial_limit=4, min_limit=2, max_limit=5, clock=clock)
+    for _ in range(20):
+        concurrency.acquire()
+        concurrency.release(0.1, 200)
+    assert concurrency.limit == 5
+    for _ in range(3):  # overload responses (to concurrent requests) within a latency decrease the limit once
+        concurrency.acquire()
+        concurrency.release(0.1, 429)
+    assert concurrency.limit == 2.5
+    clock.time = 1
+    concurrency.acquire()
+    concurrency.release(1.0, 200)  # too slow
+    assert concurrency.limit == 2
+    concurrency.acquire()
+    concurrency.release(None, None)  # failed
+    assert concurrency.stats()['limit'] == 2  # not under min_limit
+
+
+def test_adaptive_concurrency_limits_the_running_requests():
+    concurrency = AdaptiveConcurrency(initial_limit=3, max_limit=3)
+    lock = threading.Lock()
+    running, max_running = [0], [0]
+
+    def work():
+        concurrency.acquire()
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        concurrency.release(0.01, 200)
+
+    threads = [threading.Thread(target=work) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max_running[0] == 3
+    assert concurrency.in_flight == 0
+
+
+def test_adaptive_concurrency_in_an_event_loop():
+    concurrency = AdaptiveConcurrency(initial_limit=2, max_limit=2)
+    max_running = [0]
+
+    async def work():
+        await concurrency.aacquire()
+        max_running[0] = max(max_running[0], concurrency.in_flight)
+        await asyncio.sleep(0.01)
+        concurrency.release(0.01, 200)
+
+    async def main():
+        await asyncio.gather(*[work() for _ in range(8)])
+
+    asyncio.run(main())
+    assert max_running[0] == 2
+
+
+def test_adaptive_concurrency_with_cancelled_waiters():
+    concurrency = AdaptiveConcurrency(initial_limit=1, max_limit=1)
+
+    async def main():
+        concurrency.acquire()
+        cancelled = asyncio.ensure_future(concurrency.aacquire())
+        waiting = asyncio.ensure_future(concurrency.aacquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        concurrency.release(latency=0.01, status=200)
+        await asyncio.wait_for(waiting, timeout=1)  # the wakeup isn't spent on the cancelled waiter
+        assert concurrency.in_flight == 1
+
+        # cancelled after it was woken up: the wakeup is passed on
+        woken = asyncio.ensure_future(concurrency.aacquire())
+        waiting = asyncio.ensure_future(concurrency.aacquire())
+        await asyncio.sleep(0)
+        concurrency.release(latency=0.01, status=200)
+        woken.cancel()
+        await asyncio.wait_for(waiting, timeout=1)
+        assert concurrency.in_flight == 1
+
+    asyncio.run(main())
+
+
+def test_host_limits():
+    host_limits = HostLimits({'api.example.com': 10, 'http://other.com:8080': {'rate': 1, 'burst': 5}},
+                             adaptive_concurrency={'initial_limit': 2})
+    rate_limit, concurrency = host_limits.limits_of('https://api.example.com/a')
+    assert (rate_limit.rate, concurrency.limit) == (10, 2)
+    assert host_limits.limits_of('https://api.example.com/b') == (rate_limit, concurrency)  # shared by the host
+    assert host_limits.limits_of('http://other.com:8080/c')[0].burst == 5
+    assert host_limits.limits_of('http://other.com/c')[0] is None
+    assert sorted(host_limits.stats()) == ['http://other.com', 'http://other.com:8080', 'https://api.example.com']
+
+
+def test_rate_limit_of_method_spec(local_server):
+    method_specs = {'echo': {'url_template': local_server.url + '/echo/{x}', 'rate_limit': {'rate': 100, 'burst': 1}}}
+    with Py2Request(method_specs) as pr:
+        tic = time.perf_counter()
+        for i in range(6):
+            pr.echo(i)
+        assert time.perf_counter() - tic >= 0.05
+        assert pr.echo.rate_limit.stats()['requests'] == 6
+
+
+def test_transport_limits_of_hosts(local_server):
+    transport = HttpTransport(rate_limit_of_host={'127.0.0.1': 1000}, adaptive_concurrency={'initial_limit': 8})
+    method_specs = {'echo': {'url_template': local_server.url + '/echo/{x}?status={status}'}}
+    with Py2Request(method_specs, transport=transport) as pr:
+        pr.echo(1, 200)
+        pr.echo(2, 429)
+    (limits,) = transport.stats()['limits'].values()
+    assert limits['rate_limit']['requests'] == 2
+    assert (limits['concurrency']['limit'], limits['concurrency']['overloads']) == (4.0625, 1)
+    transport.close()
@@ -0,0 +1,94 @@
+import warnings
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('i2')
+
+from i2i.py2request.response_cache import ResponseCache
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _py2request(url, **cache_kwargs):
+    clock = _Clock()
+    method_specs = {
+        'get': {
+            'url_template': url + '/{path}',
+            'output_trans': lambda r: r.json()['path'],
+            'cache': ResponseCache(clock=clock, **cache_kwargs),
+        },
+    }
+    return Py2Request(method_specs), clock
+
+
+def test_ttl_and_lru(local_server):
+    pr, clock = _py2request(local_server.url, maxsize=2, ttl=10)
+    for path in ['a', 'a', 'b', 'a', 'c', 'b']:  # b is dropped when c is cached (a is more recent)
+        assert pr.get(path) == '/' + path
+    assert pr.get.cache.stats() == {'hits': 2, 'misses': 4, 'revalidations': 0, 'size': 2}
+    clock.now = 11
+    pr.get('c')
+    assert len(local_server.requests) == 5
+
+
+def test_cache_control_and_etag_revalidation(local_server):
+    pr, clock = _py2request(local_server.url, ttl=1000)
+    path = 'x?etag=v1&cache_control=max-age%3D5'
+    assert pr.get(path) == pr.get(path) == '/' + path
+    assert len(local_server.requests) == 1
+    clock.now = 6  # stale: revalidated, and the server says it's not modified
+    assert pr.get(path) == '/' + path
+    assert pr.get(path) == '/' + path  # fresh again
+    assert len(local_server.requests) == 2
+    assert pr.get.cache.stats()['revalidations'] == 1
+
+    pr.get('y?cache_control=no-store')
+    pr.get('y?cache_control=no-store')
+    assert len(local_server.requests) == 4
+    assert pr.get('z?status=500') == '/z?status=500'
+    pr.get('z?status=500')
+    assert len(local_server.requests) == 6  # errors aren't cached
+
+
+def test_responses_with_validators_are_revalidated_without_ttl(local_server):
+    pr, clock = _py2request(local_server.url)
+    assert pr.get('x?etag=v1') == pr.get('x?etag=v1') == '/x?etag=v1'
+    assert pr.get.cache.stats() == {'hits': 1, 'misses': 1, 'revalidations': 1, 'size': 1}
+    assert pr.get('y') == pr.get('y') == '/y'  # without validators: fresh for ever
+    assert len(local_server.requests) == 3
+
+
+def test_s_maxage_is_ignored(local_server):
+    pr, clock = _py2request(local_server.url, ttl=1000)
+    path = 'x?cache_control=s-maxage%3D100%2C%20max-age%3D5'
+    pr.get(path)
+    clock.now = 6
+    pr.get(path)
+    assert len(local_server.requests) == 2
+
+
+def test_cache_output(local_server):
+    n_trans = []
+
+    def output_trans(r):
+        n_trans.append(1)
+        return r.json()['body']
+
+    method_specs = {'post': {'url': local_server.url + '/post', 'json_arg_names': ['a'],
+                             'request_kwargs': {'method': 'POST'}, 'output_trans': output_trans,
+                             'cache': {'cache_output': True}}}
+    pr = Py2Request(method_specs)
+    assert pr.post(a=1) == pr.post(a=1) == '{"a": 1}'
+    assert pr.post(a=2) == '{"a": 2}'  # the json body is part of the key
+    assert (len(local_server.requests), len(n_trans)) == (2, 2)
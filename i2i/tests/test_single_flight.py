@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+import warnings
+
+import pytest
+
+from i2i.py2request.single_flight import SingleFlight, single_flight_of
+
+pytest.importorskip('requests')
+pytest.importorskip('i2')
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request
+from i2i.py2request.local_transport import LocalTransport
+
+
+class _SlowTransport(object):
+    """Responds (after a while) with the request_kwargs and the number of the request"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.n_requests = 0
+        self._lock = threading.Lock()
+
+    def request(self, **request_kwargs):
+        with self._lock:
+            self.n_requests += 1
+            n = self.n_requests
+        time.sleep(self.delay)
+        if 'fail' in request_kwargs['url']:
+            raise ConnectionError(n)
+        return dict(request_kwargs, n=n)
+
+
+_method_specs = {
+    'get': {'url_template': 'http://host/{x}'},
+    'post': {'url_template': 'http://host/{x}', 'request_kwargs': {'method': 'POST'}},
+}
+
+
+def _concurrent_calls(func, args_list):
+    results = [None] * len(args_list)
+
+    def call(i):
+        try:
+            results[i] = func(*args_list[i])
+        except Exception as exception:
+            results[i] = exception
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(args_list))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_concurrent_requests_are_coalesced():
+    transport = _SlowTransport()
+    pr = Py2Request(dict(_method_specs), transport=transport, single_flight=True)
+    results = _concurrent_calls(pr.get, [('a',)] * 10 + [('b',)] * 5)
+    assert transport.n_requests == 2
+    assert all(r is results[0] for r in results[:10]) and all(r is results[10] for r in results[10:])
+    assert pr.single_flight.stats() == {'calls': 2, 'coalesced': 13, 'in_flight': 0}
+    pr.get('a')  # requests that are not concurrent are not coalesced
+    assert transport.n_requests == 3
+
+
+def test_instrumented_requests_are_coalesced():
+    calls = []
+
+    def slow(x):
+        calls.append(x)
+        time.sleep(0.05)
+        return x
+
+    method_specs = {'slow': {'url_template': 'http://host/slow?x={x}', 'output_format': 'json'}}
+    pr = Py2Request(method_specs, transport=LocalTransport([slow]), single_flight=True, instrument=True)
+    assert _concurrent_calls(pr.slow, [('a',)] * 8) == ['a'] * 8
+    assert calls == ['a']
+    stats = pr.instrumentation.stats()['slow']
+    assert stats['calls'] == stats['time_to_first_byte']['count'] == 8
+
+
+def test_only_idempotent_methods_are_coalesced_by_default():
+    transport = _SlowTransport()
+    pr = Py2Request(dict(_method_specs), transport=transport, single_flight=True)
+    _concurrent_calls(pr.post, [('a',)] * 4)
+    assert transport.n_requests == 4
+    pr = Py2Request(dict(_method_specs), transport=transport, single_flight={'methods': ['GET', 'POST']})
+    _concurrent_calls(pr.post, [('a',)] * 4)
+    assert transport.n_requests == 5
+
+
+def test_waiters_share_the_exception():
+    transport = _SlowTransport()
+    pr = Py2Request(dict(_method_specs), transport=transport, single_flight=True)
+    results = _concurrent_calls(pr.get, [('fail',)] * 5)
+    assert transport.n_requests == 1
+    assert all(isinstance(r, ConnectionError) for r in results)
+
+
+def test_requests_are_not_coalesced_without_single_flight():
+    transport = _SlowTransport()
+    pr = Py2Request(dict(_method_specs), transport=transport)
+    _concurrent_calls(pr.get, [('a',)] * 3)
+    assert (pr.single_flight, transport.n_requests) == (None, 3)
+
+
+def test_single_flight_of():
+    single_flight = SingleFlight()
+    assert single_flight_of(single_flight) is single_flight
+    assert single_flight_of(None) is None
+    assert single_flight_of({'methods': ['get']}).methods == {'GET'}
+
+
+def test_async_identical_concurrent_requests_are_coalesced():
+    n_requests = [0]
+
+    async def send(**request_kwargs):
+        n_requests[0] += 1
+        await asyncio.sleep(0.02)
+        return request_kwargs['url']
+
+    single_flight = SingleFlight()
+
+    async def main():
+        first = asyncio.ensure_future(single_flight.arequest(send, {'url': 'http://host/a'}))
+        others = [single_flight.arequest(send, {'url': 'http://host/a'}) for _ in range(4)]
+        await asyncio.sleep(0)
+        first.cancel()  # cancelling the first waiter doesn't cancel the request of the others
+        return await asyncio.gather(*others)
+
+    assert asyncio.run(main()) == ['http://host/a'] * 4
+    assert n_requests[0] == 1
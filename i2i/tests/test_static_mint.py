@@ -0,0 +1,98 @@
+import sys
+
+import pytest
+
+from i2i.pymint import mint_module
+from i2i.static_mint import SourceExpression, static_mint_module, static_mint_package, static_mints_of_source
+
+SRC = '''
+import os
+
+def f(a, b: int = 2, c: float = -1.5, *args, d=None, **kwargs) -> str:
+    """The summary
+
+    :param list a: the a
+    :param float b: the b
+    :return: a string
+    :tags foo, bar
+    """
+
+async def g(x: dict = {'y': (1, 2)}, z=os.sep) -> None:
+    pass
+
+class A(object):
+    """The doc of A"""
+    def __init__(self, a: bool = True):
+        pass
+
+if os.name:
+    def not_top_level():
+        pass
+
+def f(redefined):
+    pass
+'''
+
+
+def test_static_mints_of_source():
+    mints = static_mints_of_source(SRC, 'mod')
+    assert [m['name'] for m in mints] == ['A', 'f', 'g']
+    a, f, g = mints
+    assert a == {'name': 'A', 'module': 'mod', 'doc': 'The doc of A',
+                 'input': {'a': {'default': True, 'type': 'boolean', 'schema': {'type': 'boolean'}}}, 'output': {}}
+    assert list(f['input']) == ['redefined']
+    assert g['input'] == {'x': {'default': {'y': (1, 2)}, 'type': 'object', 'schema': {'type': 'object'}},
+                          'z': {'default': SourceExpression('os.sep')}}
+    assert g['output'] == {'type': None}
+
+
+def test_static_mints_with_parsed_doc():
+    f = static_mints_of_source(SRC.replace('def f(redefined)', 'def h(redefined)'), 'mod', with_parsed_doc=True)[1]
+    assert (f['summary'], f['tags']) == ('The summary', ['foo', 'bar'])
+    assert f['input']['a'] == {'description': ' the a', 'type': 'array'}
+    assert f['input']['b'] == {'default': 2, 'type': 'int', 'schema': {'type': 'integer'},  # the signature type wins
+                               'description': ' the b'}
+    assert f['output'] == {'type': 'string', 'schema': {'type': 'string'}, 'description': ' a string'}
+
+
+def test_static_mints_resolve_typing_annotations():
+    from typing import Dict, List, Literal, Optional, Tuple
+    from i2i.pymint import mint_of_callable
+
+    src = '''
+import typing
+def f(a: List[int], b: Optional[str] = None, c: Tuple[int, ...] = (), d: int | None = 1,
+      e: typing.Literal['x', 'y'] = 'x', g: dict[str, float] = {}) -> Dict[str, List[bool]]:
+    pass
+def h(x: Optional[Point], y: 'Point') -> List[Point]:
+    pass
+'''
+
+    def f(a: List[int], b: Optional[str] = None, c: Tuple[int, ...] = (), d: Optional[int] = 1,
+          e: Literal['x', 'y'] = 'x', g: dict[str, float] = {}) -> Dict[str, List[bool]]:
+        pass
+
+    static_f, static_h = static_mints_of_source(src, 'mod')
+    f_mint = mint_of_callable(f)
+    assert (static_f['input'], static_f['output']) == (f_mint['input'], f_mint['output'])
+    assert static_h['input'] == {
+        'x': {'type': '{}', 'schema': {'anyOf': [{}, {'type': 'null'}]},
+              'annotation': SourceExpression('Optional[Point]')},
+        'y': {'type': '{}', 'schema': {}, 'annotation': SourceExpression("'Point'")}}
+    assert static_h['output'] == {'type': 'array', 'schema': {'type': 'array', 'items': {}},
+                                  'annotation': SourceExpression('List[Point]')}
+
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+def test_static_mint_module_matches_mint_module():
+    assert static_mint_module('i2i.tests.test_pymint')[:3] == mint_module('i2i.tests.test_pymint')[:3]
+    static_mints = [m for m in static_mint_module('i2i.util') if m['name'] != 'imdict']  # imdict can't be minted
+    assert static_mints == mint_module('i2i.util', skip_errors=True)
+
+
+def test_static_mint_package_does_not_import():
+    sys.modules.pop('i2i.py2cli.scrap', None)
+    minted = static_mint_package('i2i.py2cli')
+    assert [m['name'] for m in minted['i2i.py2cli.scrap']] == [
+        'is_method_or_function', 'parser_for_class', 'py2cli_test', 'subparser_for_func']
+    assert 'i2i.py2cli.scrap' not in sys.modules
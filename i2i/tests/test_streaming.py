@@ -0,0 +1,107 @@
+import asyncio
+import io
+import json
+import warnings
+
+import pytest
+
+from i2i.py2request.streaming import AsyncResponseStream, ResponseStream, stream_options_of
+
+requests = pytest.importorskip('requests')
+pytest.importorskip('i2')
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')  # the deprecation warning of py2request
+    from i2i.py2request.py2request import Py2Request
+    from i2i.py2request.async_py2request import AsyncPy2Request
+
+
+def _method_specs(url, stream):
+    return {'records': {'url_template': url + '/records?ndjson={n}', 'stream': stream}}
+
+
+def test_stream_options_of():
+    assert stream_options_of(None) is None
+    assert stream_options_of(True) == {'kind': 'chunks'}
+    assert stream_options_of('lines') == {'kind': 'lines'}
+    assert stream_options_of({'kind': 'ndjson', 'chunk_size': 10}) == {'kind': 'ndjson', 'chunk_size': 10}
+    with pytest.raises(ValueError):
+        stream_options_of('words')
+
+
+@pytest.mark.parametrize('stream, expected', [
+    ('ndjson', [{'i': i} for i in range(1000)]),
+    ('lines', [json.dumps({'i': i}) for i in range(1000)]),
+])
+def test_streamed_records_and_lines(local_server, stream, expected):
+    with Py2Request(_method_specs(local_server.url, stream)) as pr:
+        records = pr.records(1000)
+        assert isinstance(records, ResponseStream)
+        assert list(records) == expected
+
+
+@pytest.mark.parametrize('content_type, content', [
+    ('text/plain', 'é\nà\n'.encode('utf-8')),  # (requests would guess ISO-8859-1)
+    ('text/plain; charset="latin-1"', 'é\nà\n'.encode('latin-1')),
+])
+def test_lines_are_utf_8_unless_a_charset_is_declared(content_type, content):
+    response = requests.Response()
+    response.headers['Content-Type'] = content_type
+    response.raw = io.BytesIO(content)
+    assert list(ResponseStream(response, 'lines')) == ['é', 'à']
+
+
+def test_streamed_chunks(local_server):
+    spec = _method_specs(local_server.url, {'kind': 'chunks', 'chunk_size': 100})
+    with Py2Request(spec) as pr:
+        chunks = list(pr.records(1000))
+    assert max(map(len, chunks)) <= 100
+    assert b''.join(chunks).splitlines()[-1] == b'{"i": 999}'
+
+
+def test_the_connection_is_released_when_exhausted_or_closed(local_server):
+    with Py2Request(_method_specs(local_server.url, 'ndjson')) as pr:
+        list(pr.records(10))
+        (pool,) = pr.transport.stats()['pools'].values()
+        assert pool['idle'] == 1
+        with pr.records(10000) as records:
+            assert next(records) == {'i': 0}
+        (pool,) = pr.transport.stats()['pools'].values()
+        assert (pool['connections'], pool['idle']) == (1, 1)
+        assert list(pr.records(3)) == [{'i': 0}, {'i': 1}, {'i': 2}]
+
+
+def test_stream_and_cache_are_exclusive(local_server):
+    with pytest.raises(ValueError):
+        Py2Request({'records': dict(_method_specs(local_server.url, 'ndjson')['records'], cache=True)})
+
+
+def test_async_streamed_records(local_server):
+    pytest.importorskip('aiohttp')
+
+    async def main():
+        async with AsyncPy2Request(_method_specs(local_server.url, 'ndjson')) as pr:
+            records = await pr.records(100)
+            assert isinstance(records, AsyncResponseStream)
+            all_records = [record async for record in records]
+            async with await pr.records(100) as records:
+                first = await records.__anext__()
+            return all_records, first
+
+    all_records, first = asyncio.run(main())
+    assert all_records == [{'i': i} for i in range(100)]
+    assert first == {'i': 0}
+
+
+def test_async_streamed_long_records(local_server):
+    pytest.importorskip('aiohttp')
+    # records longer than the lines aiohttp's readline can read
+    method_specs = {'records': {'url_template': local_server.url + '/records?ndjson={n}&pad=1000000',
+                                'stream': {'kind': 'ndjson', 'chunk_size': 4096}}}
+
+    async def main():
+        async with AsyncPy2Request(method_specs) as pr:
+            return [record async for record in await pr.records(3)]
+
+    records = asyncio.run(main())
+    assert [(record['i'], len(record['pad'])) for record in records] == [(0, 10 ** 6), (1, 10 ** 6), (2, 10 ** 6)]